@@ -0,0 +1,566 @@
+#cython: language_level=3
+"""Compiled HTTP parsers.
+
+Drop-in replacements for pure python ``HttpRequestParser``,
+``HttpResponseParser`` and ``HttpPayloadParser``,
+see ``aiohttp/protocol.py``.
+"""
+
+from cpython.bytes cimport (PyBytes_AS_STRING, PyBytes_Check,
+                            PyBytes_FromStringAndSize, PyBytes_GET_SIZE)
+from cpython.unicode cimport PyUnicode_DecodeUTF8
+from libc.string cimport memchr
+
+cdef extern from "Python.h":
+    const Py_ssize_t PY_SSIZE_T_MAX
+
+from multidict import CIMultiDict, istr
+
+from . import errors, hdrs
+from .protocol import (VERSRE, DeflateBuffer, HttpVersion, HttpVersion10,
+                       HttpVersion11, RawRequestMessage, RawResponseMessage)
+from .log import internal_logger
+
+cdef object CONNECTION = hdrs.CONNECTION
+cdef object CONTENT_ENCODING = hdrs.CONTENT_ENCODING
+cdef object TRANSFER_ENCODING = hdrs.TRANSFER_ENCODING
+
+# upper cased header name bytes -> istr, prefilled with well known
+# headers only, arbitrary peer supplied names are never added
+cdef dict _HEADER_NAMES = {
+    str(name).upper().encode('ascii'): name
+    for name in vars(hdrs).values() if isinstance(name, istr)}
+
+
+cdef inline bint _is_ws(unsigned char c):
+    # same set as bytes.strip()
+    return c == b' ' or c == b'\t' or c == b'\r' or c == b'\n' or \
+        c == b'\x0b' or c == b'\x0c'
+
+
+cdef inline bint _is_invalid_name_char(unsigned char c):
+    # same set as protocol.HDRRE
+    return c < 0x20 or c == 0x7f or c in b'()<>@,;:[]={} \t\\"'
+
+
+cdef inline bint _is_continuation(object line):
+    # line starts with ' ' or '\t'
+    return (PyBytes_Check(line) and PyBytes_GET_SIZE(line) and
+            PyBytes_AS_STRING(line)[0] in b' \t')
+
+
+cdef inline str _decode(const char *buf, Py_ssize_t size):
+    return PyUnicode_DecodeUTF8(buf, size, 'surrogateescape')
+
+
+cdef class HttpParserC:
+
+    cdef public object max_line_size
+    cdef public object max_headers
+    cdef public object max_field_size
+
+    def __init__(self, max_line_size=8190, max_headers=32768,
+                 max_field_size=8190):
+        self.max_line_size = max_line_size
+        self.max_headers = max_headers
+        self.max_field_size = max_field_size
+
+    def parse_headers(self, lines):
+        """Parses RFC 5322 headers from a stream.
+
+        Line continuations are supported. Returns list of header name
+        and value pairs. Header name is in upper case.
+        """
+        return self._parse_headers(lines)
+
+    cdef tuple _parse_headers(self, lines):
+        cdef:
+            Py_ssize_t lines_idx = 1
+            Py_ssize_t header_length, size, pos, start, end, i
+            Py_ssize_t max_field_size = self.max_field_size
+            const char *buf
+            char *upper
+            const char *colon
+            unsigned char c
+            bytes line, bname, bvalue
+            object obj, name, value
+            object conn = None
+            object enc = None
+            object te = None
+            object close_conn = None
+            object encoding = None
+            bint upgrade = False
+            bint chunked = False
+            list raw_headers = []
+            list continuation
+
+        headers = CIMultiDict()
+
+        obj = lines[1]
+        while obj:
+            line = obj
+            buf = PyBytes_AS_STRING(line)
+            header_length = size = PyBytes_GET_SIZE(line)
+
+            # Parse initial header name : value pair.
+            colon = <const char*>memchr(buf, b':', size)
+            if colon == NULL:
+                raise errors.InvalidHeader(line)
+            pos = colon - buf
+
+            start = 0
+            end = pos
+            while start < end and (buf[start] == b' ' or buf[start] == b'\t'):
+                start += 1
+            while end > start and (buf[end-1] == b' ' or buf[end-1] == b'\t'):
+                end -= 1
+
+            bname = PyBytes_FromStringAndSize(NULL, end - start)
+            upper = PyBytes_AS_STRING(bname)
+            for i in range(end - start):
+                c = <unsigned char>buf[start + i]
+                if _is_invalid_name_char(c):
+                    raise errors.InvalidHeader(line[start:end].upper())
+                if b'a' <= c <= b'z':
+                    c -= 32
+                upper[i] = <char>c
+
+            # next line
+            lines_idx += 1
+            obj = lines[lines_idx]
+
+            # consume continuation lines
+            if _is_continuation(obj):
+                continuation = [line[pos+1:]]
+                while _is_continuation(obj):
+                    header_length += len(obj)
+                    if header_length > max_field_size:
+                        raise errors.LineTooLong(
+                            'request header field {}'.format(
+                                bname.decode("utf8", "xmlcharrefreplace")),
+                            self.max_field_size)
+                    continuation.append(obj)
+
+                    # next line
+                    lines_idx += 1
+                    obj = lines[lines_idx]
+                bvalue = b'\r\n'.join(continuation).strip()
+            else:
+                if header_length > max_field_size:
+                    raise errors.LineTooLong(
+                        'request header field {}'.format(
+                            bname.decode("utf8", "xmlcharrefreplace")),
+                        self.max_field_size)
+
+                start = pos + 1
+                end = size
+                while start < end and _is_ws(buf[start]):
+                    start += 1
+                while end > start and _is_ws(buf[end-1]):
+                    end -= 1
+                bvalue = PyBytes_FromStringAndSize(buf + start, end - start)
+
+            name = _HEADER_NAMES.get(bname)
+            if name is None:
+                name = istr(_decode(PyBytes_AS_STRING(bname),
+                                    PyBytes_GET_SIZE(bname)))
+            value = _decode(PyBytes_AS_STRING(bvalue),
+                            PyBytes_GET_SIZE(bvalue))
+
+            # well known names are shared istr objects from hdrs,
+            # remember first values instead of looking them up later
+            if name is CONNECTION:
+                if conn is None:
+                    conn = value
+            elif name is CONTENT_ENCODING:
+                if enc is None:
+                    enc = value
+            elif name is TRANSFER_ENCODING:
+                if te is None:
+                    te = value
+
+            headers.add(name, value)
+            raw_headers.append((bname, bvalue))
+
+        # keep-alive
+        if conn:
+            v = conn.lower()
+            if v == 'close':
+                close_conn = True
+            elif v == 'keep-alive':
+                close_conn = False
+            elif v == 'upgrade':
+                upgrade = True
+
+        # encoding
+        if enc:
+            enc = enc.lower()
+            if enc in ('gzip', 'deflate'):
+                encoding = enc
+
+        # chunking
+        if te and 'chunked' in te.lower():
+            chunked = True
+
+        return headers, raw_headers, close_conn, encoding, upgrade, chunked
+
+
+cdef class HttpRequestParserC(HttpParserC):
+    """Read request status line and headers.
+
+    Exception errors.BadStatusLine could be raised in case
+    of any errors in status line. Returns RawRequestMessage.
+    """
+
+    def parse_message(self, lines):
+        cdef Py_UCS4 first
+
+        # request line
+        line = lines[0].decode('utf-8', 'surrogateescape')
+        try:
+            method, path, version = line.split(None, 2)
+        except ValueError:
+            raise errors.BadStatusLine(line) from None
+
+        # method, same check as protocol.METHRE: '[A-Z0-9$-_.]+'
+        # where '$-_' range covers digits, upper case letters and '.'
+        method = method.upper()
+        first = method[0]
+        if not (u'$' <= first <= u'_'):
+            raise errors.BadStatusLine(method)
+
+        # version
+        if version == 'HTTP/1.1':
+            version = HttpVersion11
+        elif version == 'HTTP/1.0':
+            version = HttpVersion10
+        else:
+            try:
+                if version.startswith('HTTP/'):
+                    n1, n2 = version[5:].split('.', 1)
+                    version = HttpVersion(int(n1), int(n2))
+                else:
+                    raise errors.BadStatusLine(version)
+            except:
+                raise errors.BadStatusLine(version)
+
+        # read headers
+        headers, raw_headers, \
+            close, compression, upgrade, chunked = self._parse_headers(lines)
+        if close is None:  # then the headers weren't set in the request
+            if version <= HttpVersion10:  # HTTP 1.0 must asks to not close
+                close = True
+            else:  # HTTP 1.1 must ask to close.
+                close = False
+
+        return RawRequestMessage(
+            method, path, version, headers, raw_headers,
+            close, compression, upgrade, chunked)
+
+
+cdef inline int _parse_status(str status):
+    # fast path for plain three-digit codes, -1 otherwise
+    cdef:
+        Py_UCS4 c
+        int code = 0
+
+    if len(status) != 3:
+        return -1
+    for c in status:
+        if not (u'0' <= c <= u'9'):
+            return -1
+        code = code * 10 + (<int>c - c'0')
+    if code < 100:
+        return -1
+    return code
+
+
+cdef class HttpResponseParserC(HttpParserC):
+    """Read response status line and headers.
+
+    BadStatusLine could be raised in case of any errors in status line.
+    Returns RawResponseMessage"""
+
+    def parse_message(self, lines):
+        cdef int code
+
+        line = lines[0].decode('utf-8', 'surrogateescape')
+        try:
+            version, status = line.split(None, 1)
+        except ValueError:
+            raise errors.BadStatusLine(line) from None
+        else:
+            try:
+                status, reason = status.split(None, 1)
+            except ValueError:
+                reason = ''
+
+        # version
+        if version == 'HTTP/1.1':
+            version = HttpVersion11
+        elif version == 'HTTP/1.0':
+            version = HttpVersion10
+        else:
+            match = VERSRE.match(version)
+            if match is None:
+                raise errors.BadStatusLine(line)
+            version = HttpVersion(int(match.group(1)), int(match.group(2)))
+
+        # The status code is a three-digit number
+        code = _parse_status(status)
+        if code < 0:
+            try:
+                status = int(status)
+            except ValueError:
+                raise errors.BadStatusLine(line) from None
+
+            if status < 100 or status > 999:
+                raise errors.BadStatusLine(line)
+        else:
+            status = code
+
+        # read headers
+        headers, raw_headers, \
+            close, compression, upgrade, chunked = self._parse_headers(lines)
+
+        if close is None:
+            close = version <= HttpVersion10
+
+        return RawResponseMessage(
+            version, status, reason.strip(),
+            headers, raw_headers, close, compression, upgrade, chunked)
+
+
+cdef enum:
+    PARSE_NONE = 0
+    PARSE_LENGTH = 1
+    PARSE_CHUNKED = 2
+    PARSE_UNTIL_EOF = 3
+
+cdef enum:
+    PARSE_CHUNKED_SIZE = 0
+    PARSE_CHUNKED_CHUNK = 1
+    PARSE_CHUNKED_CHUNK_EOF = 2
+    PARSE_CHUNKED_TRAILERS = 3
+
+
+cdef inline Py_ssize_t _find_crlf(const char *buf,
+                                  Py_ssize_t start, Py_ssize_t size):
+    cdef const char *p
+    while start < size:
+        p = <const char*>memchr(buf + start, b'\r', size - start)
+        if p == NULL:
+            return -1
+        start = p - buf + 1
+        if start < size and buf[start] == b'\n':
+            return start - 1
+    return -1
+
+
+cdef inline Py_ssize_t _parse_hex(const char *buf, Py_ssize_t size):
+    # plain hex digits only, -1 for anything int(size, 16) should handle
+    cdef:
+        Py_ssize_t i
+        Py_ssize_t value = 0
+        unsigned char c
+
+    if size == 0 or size > 15:
+        return -1
+    for i in range(size):
+        c = <unsigned char>buf[i]
+        if b'0' <= c <= b'9':
+            value = value * 16 + (c - c'0')
+        elif b'a' <= c <= b'f':
+            value = value * 16 + (c - c'a' + 10)
+        elif b'A' <= c <= b'F':
+            value = value * 16 + (c - c'A' + 10)
+        else:
+            return -1
+    return value
+
+
+cdef class HttpPayloadParserC:
+
+    cdef public object payload
+    cdef public bint done
+    cdef int _type
+    cdef int _chunk
+    cdef Py_ssize_t _length
+    cdef Py_ssize_t _chunk_size
+    cdef bytes _chunk_tail
+
+    def __init__(self, payload,
+                 length=None, chunked=False, compression=None,
+                 code=None, method=None,
+                 readall=False, response_with_body=True):
+        self.payload = payload
+
+        self._length = 0
+        self._type = PARSE_NONE
+        self._chunk = PARSE_CHUNKED_SIZE
+        self._chunk_size = 0
+        self._chunk_tail = b''
+        self.done = False
+
+        # payload decompression wrapper
+        if (response_with_body and compression):
+            payload = DeflateBuffer(payload, compression)
+
+        # payload parser
+        if not response_with_body:
+            # don't parse payload if it's not expected to be received
+            self._type = PARSE_NONE
+            payload.feed_eof()
+            self.done = True
+
+        elif chunked:
+            self._type = PARSE_CHUNKED
+        elif length is not None:
+            self._type = PARSE_LENGTH
+            self._length = length
+            if self._length == 0:
+                payload.feed_eof()
+                self.done = True
+        else:
+            if readall and code != 204:
+                self._type = PARSE_UNTIL_EOF
+            elif method in ('PUT', 'POST'):
+                internal_logger.warning(  # pragma: no cover
+                    'Content-Length or Transfer-Encoding header is required')
+                self._type = PARSE_NONE
+                payload.feed_eof()
+                self.done = True
+
+        self.payload = payload
+
+    def feed_eof(self):
+        if self._type == PARSE_UNTIL_EOF:
+            self.payload.feed_eof()
+
+    def feed_data(self, chunk):
+        cdef Py_ssize_t required, chunk_len
+
+        # Read specified amount of bytes
+        if self._type == PARSE_LENGTH:
+            required = self._length
+            chunk_len = len(chunk)
+
+            if required >= chunk_len:
+                self._length = required - chunk_len
+                self.payload.feed_data(chunk, chunk_len)
+                if self._length == 0:
+                    self.payload.feed_eof()
+                    return True, b''
+            else:
+                self._length = 0
+                self.payload.feed_data(chunk[:required], required)
+                self.payload.feed_eof()
+                return True, chunk[required:]
+
+        # Chunked transfer encoding parser
+        elif self._type == PARSE_CHUNKED:
+            if not PyBytes_Check(chunk):
+                chunk = bytes(chunk)
+            return self._feed_chunked(chunk)
+
+        # Read all bytes until eof
+        elif self._type == PARSE_UNTIL_EOF:
+            self.payload.feed_data(chunk, len(chunk))
+
+        return False, None
+
+    cdef tuple _feed_chunked(self, bytes chunk):
+        # walks the buffer by offset instead of re-slicing the rest
+        # of the data after every chunk header
+        cdef:
+            const char *buf
+            const char *ext
+            Py_ssize_t size, start, pos, end, required, chunk_len, chunk_size
+
+        if self._chunk_tail:
+            chunk = self._chunk_tail + chunk
+            self._chunk_tail = b''
+
+        buf = PyBytes_AS_STRING(chunk)
+        size = PyBytes_GET_SIZE(chunk)
+        start = 0
+
+        while start < size:
+
+            # read next chunk size
+            if self._chunk == PARSE_CHUNKED_SIZE:
+                pos = _find_crlf(buf, start, size)
+                if pos >= 0:
+                    end = pos
+                    ext = <const char*>memchr(buf + start, b';', pos - start)
+                    if ext != NULL:
+                        end = ext - buf  # strip chunk-extensions
+
+                    chunk_size = _parse_hex(buf + start, end - start)
+                    if chunk_size < 0:
+                        try:
+                            value = int(chunk[start:end], 16)
+                            if value < 0 or value > PY_SSIZE_T_MAX:
+                                raise ValueError(value)
+                        except ValueError:
+                            exc = errors.TransferEncodingError(
+                                chunk[start:pos])
+                            self.payload.set_exception(exc)
+                            raise exc from None
+                        chunk_size = value
+
+                    start = pos + 2
+                    if chunk_size == 0:  # eof marker
+                        self._chunk = PARSE_CHUNKED_TRAILERS
+                    else:
+                        self._chunk = PARSE_CHUNKED_CHUNK
+                        self._chunk_size = chunk_size
+                else:
+                    self._chunk_tail = chunk[start:]
+                    return False, None
+
+            # read chunk and feed buffer
+            if self._chunk == PARSE_CHUNKED_CHUNK:
+                if start == size:
+                    break
+
+                required = self._chunk_size
+                chunk_len = size - start
+
+                if required >= chunk_len:
+                    self._chunk_size = required - chunk_len
+                    if self._chunk_size == 0:
+                        self._chunk = PARSE_CHUNKED_CHUNK_EOF
+
+                    if start:
+                        chunk = chunk[start:]
+                    self.payload.feed_data(chunk, chunk_len)
+                    return False, None
+                else:
+                    self._chunk_size = 0
+                    self.payload.feed_data(
+                        chunk[start:start+required], required)
+                    start += required
+                    self._chunk = PARSE_CHUNKED_CHUNK_EOF
+
+            # toss the CRLF at the end of the chunk
+            if self._chunk == PARSE_CHUNKED_CHUNK_EOF:
+                if (size - start >= 2 and
+                        buf[start] == b'\r' and buf[start+1] == b'\n'):
+                    start += 2
+                    self._chunk = PARSE_CHUNKED_SIZE
+                else:
+                    self._chunk_tail = chunk[start:]
+                    return False, None
+
+            # read and discard trailer up to the CRLF terminator
+            if self._chunk == PARSE_CHUNKED_TRAILERS:
+                pos = _find_crlf(buf, start, size)
+                if pos >= 0:
+                    self.payload.feed_eof()
+                    return True, chunk[pos+2:]
+                else:
+                    self._chunk_tail = chunk[start:]
+                    return False, None
+
+        return False, None
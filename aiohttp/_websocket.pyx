@@ -1,3 +1,4 @@
+#cython: language_level=3
 from cpython cimport PyBytes_AsString
 
 #from cpython cimport PyByteArray_AsString # cython still not exports that
@@ -46,3 +47,420 @@ def _websocket_mask_cython(bytes mask, bytearray data):
         in_buf[i] ^= mask_buf[i]
 
     return data
+
+
+# compiled WebSocketReader, see aiohttp/_ws_impl.py
+
+from cpython.bytes cimport (PyBytes_AS_STRING, PyBytes_FromStringAndSize,
+                            PyBytes_GET_SIZE)
+from cpython.unicode cimport PyUnicode_DecodeUTF8
+
+import zlib
+
+from ._ws_impl import (_DEFLATE_TRAILER, ALLOWED_CLOSE_CODES, MAX_MSG_SIZE,
+                       WebSocketError, WSCloseCode, WSMessage, WSMsgType)
+
+cdef enum:
+    OP_CONTINUATION = 0x0
+    OP_TEXT = 0x1
+    OP_BINARY = 0x2
+    OP_CLOSE = 0x8
+    OP_PING = 0x9
+    OP_PONG = 0xa
+
+cdef object MSG_TEXT = WSMsgType.TEXT
+cdef object MSG_BINARY = WSMsgType.BINARY
+cdef object MSG_CLOSE = WSMsgType.CLOSE
+cdef object MSG_PING = WSMsgType.PING
+cdef object MSG_PONG = WSMsgType.PONG
+cdef object PROTOCOL_ERROR = WSCloseCode.PROTOCOL_ERROR
+cdef object INVALID_TEXT = WSCloseCode.INVALID_TEXT
+cdef object MESSAGE_TOO_BIG = WSCloseCode.MESSAGE_TOO_BIG
+cdef bytes EMPTY = b''
+
+
+cdef inline void _mask_copy(unsigned char* out, const unsigned char* data,
+                            Py_ssize_t size, const unsigned char* mask):
+    # XOR data with mask into out, by 8 bytes where possible
+    cdef:
+        Py_ssize_t i = 0
+        uint32_t uint32_msk = (<uint32_t*>mask)[0]
+        uint64_t uint64_msk = (<uint64_t>uint32_msk << 32) | uint32_msk
+
+    while size - i >= 8:
+        (<uint64_t*>(out + i))[0] = (
+            (<const uint64_t*>(data + i))[0] ^ uint64_msk)
+        i += 8
+    while i < size:
+        out[i] = data[i] ^ mask[i & 3]
+        i += 1
+
+
+cdef class WebSocketReaderC:
+    """Compiled WebSocketReader.
+
+    Frames are decoded from the incoming buffer by offset, payloads
+    received at once are copied (and unmasked) straight from it.  Only
+    incomplete headers are kept between calls.  Completed frames are
+    processed immediately instead of being collected to a list.
+    """
+
+    cdef readonly object queue
+    cdef object _exc
+    cdef list _partial
+    cdef int _opcode
+
+    # current frame
+    cdef bint _frame_fin
+    cdef int _frame_opcode
+    cdef bint _has_mask
+    cdef unsigned char _frame_mask[4]
+    cdef unsigned long long _payload_length
+    cdef bint _read_payload
+    cdef bytearray _frame_payload
+    cdef bytes _tail
+
+    # permessage-deflate
+    cdef object _decompressobj
+    cdef bint _compressed
+    cdef bint _frame_compressed
+    cdef Py_ssize_t _max_msg_size
+    # decompressed size of current message
+    cdef Py_ssize_t _msg_size
+
+    cdef list _frames
+
+    def __init__(self, queue, *, compress=False, max_msg_size=MAX_MSG_SIZE):
+        self.queue = queue
+        self._exc = None
+        self._partial = []
+        self._opcode = -1
+        self._frame_fin = False
+        self._frame_opcode = 0
+        self._has_mask = False
+        self._payload_length = 0
+        self._read_payload = False
+        self._frame_payload = None
+        self._tail = EMPTY
+        self._decompressobj = (zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+                               if compress else None)
+        self._compressed = False
+        self._frame_compressed = False
+        self._max_msg_size = max_msg_size
+        self._msg_size = 0
+        self._frames = None
+
+    def feed_eof(self):
+        self.queue.feed_eof()
+
+    def feed_data(self, data):
+        if self._exc:
+            return True, data
+
+        try:
+            self._parse(data)
+        except Exception as exc:
+            self._exc = exc
+            self.queue.set_exception(exc)
+            return True, EMPTY
+        return False, EMPTY
+
+    def parse_frame(self, buf):
+        """Return frames completed by buf as (fin, opcode, payload)."""
+        self._frames = frames = []
+        try:
+            self._parse(buf)
+        finally:
+            self._frames = None
+        return frames
+
+    cdef _parse(self, buf):
+        cdef:
+            const unsigned char* data
+            Py_ssize_t length
+            Py_ssize_t pos = 0
+            Py_ssize_t size, tail_len
+            bytes head
+
+        if type(buf) is not bytes:
+            buf = bytes(buf)
+        data = <const unsigned char*>PyBytes_AS_STRING(buf)
+        length = PyBytes_GET_SIZE(buf)
+
+        if self._tail:
+            # complete the header from few first bytes of buf
+            tail_len = PyBytes_GET_SIZE(self._tail)
+            head = self._tail + buf[:14]
+            size = self._parse_header(
+                <const unsigned char*>PyBytes_AS_STRING(head),
+                PyBytes_GET_SIZE(head))
+            if size == 0:
+                self._tail = head
+                return
+            self._tail = EMPTY
+            pos = size - tail_len
+
+        while True:
+            if not self._read_payload:
+                size = self._parse_header(data + pos, length - pos)
+                if size == 0:
+                    if pos < length:
+                        self._tail = buf[pos:]
+                    return
+                pos += size
+
+            pos = self._parse_payload(buf, data, pos, length)
+            if self._read_payload:
+                return
+
+    cdef Py_ssize_t _parse_header(self, const unsigned char* data,
+                                  Py_ssize_t length) except -1:
+        """Decode frame header, return its size or 0 if incomplete."""
+        cdef:
+            unsigned char first_byte, second_byte
+            bint fin, rsv1, rsv2, rsv3, has_mask
+            int opcode, length_flag
+            Py_ssize_t size
+            unsigned long long payload_length
+            int i
+
+        if length < 2:
+            return 0
+
+        first_byte = data[0]
+        second_byte = data[1]
+        fin = (first_byte >> 7) & 1
+        rsv1 = (first_byte >> 6) & 1
+        rsv2 = (first_byte >> 5) & 1
+        rsv3 = (first_byte >> 4) & 1
+        opcode = first_byte & 0xf
+
+        if rsv2 or rsv3 or (rsv1 and (
+                self._decompressobj is None or
+                (opcode != OP_TEXT and opcode != OP_BINARY))):
+            raise WebSocketError(
+                PROTOCOL_ERROR,
+                'Received frame with non-zero reserved bits')
+
+        if opcode > 0x7 and not fin:
+            raise WebSocketError(
+                PROTOCOL_ERROR,
+                'Received fragmented control frame')
+
+        if (not fin and opcode == OP_CONTINUATION and
+                self._frame_fin):
+            raise WebSocketError(
+                PROTOCOL_ERROR,
+                'Received new fragment frame with non-zero '
+                'opcode {!r}'.format(opcode))
+
+        has_mask = (second_byte >> 7) & 1
+        length_flag = second_byte & 0x7f
+
+        if opcode > 0x7 and length_flag > 125:
+            raise WebSocketError(
+                PROTOCOL_ERROR,
+                'Control frame payload cannot be '
+                'larger than 125 bytes')
+
+        size = 2
+        if length_flag == 126:
+            size = 4
+        elif length_flag == 127:
+            size = 10
+        if has_mask:
+            size += 4
+        if length < size:
+            return 0
+
+        if length_flag == 126:
+            payload_length = (data[2] << 8) | data[3]
+        elif length_flag == 127:
+            payload_length = 0
+            for i in range(2, 10):
+                payload_length = (payload_length << 8) | data[i]
+        else:
+            payload_length = length_flag
+        if has_mask:
+            for i in range(4):
+                self._frame_mask[i] = data[size - 4 + i]
+
+        if opcode == OP_CONTINUATION:
+            self._frame_compressed = self._compressed
+        elif opcode < 0x8:
+            self._frame_compressed = self._compressed = rsv1
+        else:
+            self._frame_compressed = False
+
+        self._frame_fin = fin
+        self._frame_opcode = opcode
+        self._has_mask = has_mask
+        self._payload_length = payload_length
+        self._read_payload = True
+        return size
+
+    cdef Py_ssize_t _parse_payload(self, bytes buf,
+                                   const unsigned char* data,
+                                   Py_ssize_t pos,
+                                   Py_ssize_t length) except -1:
+        """Read payload of current frame, return new position."""
+        cdef:
+            Py_ssize_t available = length - pos
+            Py_ssize_t size
+            unsigned char* out
+            object payload
+
+        if (self._frame_payload is None and
+                <unsigned long long>available >= self._payload_length):
+            # whole payload is in buf
+            size = <Py_ssize_t>self._payload_length
+            if self._has_mask:
+                payload = PyBytes_FromStringAndSize(NULL, size)
+                _mask_copy(<unsigned char*>PyBytes_AS_STRING(payload),
+                           data + pos, size, self._frame_mask)
+            elif pos == 0 and size == length:
+                payload = buf
+            else:
+                payload = PyBytes_FromStringAndSize(
+                    <const char*>data + pos, size)
+            pos += size
+        else:
+            if self._frame_payload is None:
+                self._frame_payload = bytearray()
+            if <unsigned long long>available >= self._payload_length:
+                size = <Py_ssize_t>self._payload_length
+            else:
+                size = available
+            self._frame_payload.extend(buf[pos:pos + size])
+            self._payload_length -= size
+            pos += size
+            if self._payload_length:
+                return pos
+
+            if self._has_mask:
+                size = len(self._frame_payload)
+                out = <unsigned char*>PyByteArray_AsString(
+                    self._frame_payload)
+                _mask_copy(out, out, size, self._frame_mask)
+            payload = bytes(self._frame_payload)
+            self._frame_payload = None
+
+        self._read_payload = False
+        self._payload_length = 0
+
+        if self._frame_compressed:
+            payload = self._decompress(payload)
+
+        if self._frames is not None:
+            self._frames.append(
+                (self._frame_fin, self._frame_opcode, payload))
+        else:
+            self._handle_frame(self._frame_fin, self._frame_opcode, payload)
+        return pos
+
+    cdef bytes _decompress(self, bytes payload):
+        cdef Py_ssize_t left = self._max_msg_size - self._msg_size
+
+        if self._frame_fin:
+            payload += _DEFLATE_TRAILER
+        try:
+            # one byte over the limit is enough to reject the message
+            payload = self._decompressobj.decompress(
+                payload, left + 1 if self._max_msg_size else 0)
+        except zlib.error as exc:
+            raise WebSocketError(
+                PROTOCOL_ERROR,
+                'Invalid compressed message') from exc
+        if self._max_msg_size and PyBytes_GET_SIZE(payload) > left:
+            raise WebSocketError(
+                MESSAGE_TOO_BIG,
+                'Message size exceeds limit {}'.format(self._max_msg_size))
+        if self._frame_fin:
+            self._msg_size = 0
+        else:
+            self._msg_size += PyBytes_GET_SIZE(payload)
+        return payload
+
+    cdef _handle_frame(self, bint fin, int opcode, bytes payload):
+        cdef:
+            Py_ssize_t size = PyBytes_GET_SIZE(payload)
+            const char* data = PyBytes_AS_STRING(payload)
+            int close_code
+            object text
+
+        if opcode == OP_CLOSE:
+            if size >= 2:
+                close_code = ((<unsigned char>data[0]) << 8) | (
+                    <unsigned char>data[1])
+                if (close_code < 3000 and
+                        close_code not in ALLOWED_CLOSE_CODES):
+                    raise WebSocketError(
+                        PROTOCOL_ERROR,
+                        'Invalid close code: {}'.format(close_code))
+                try:
+                    close_message = PyUnicode_DecodeUTF8(
+                        data + 2, size - 2, NULL)
+                except UnicodeDecodeError as exc:
+                    raise WebSocketError(
+                        INVALID_TEXT,
+                        'Invalid UTF-8 text message') from exc
+                msg = WSMessage(MSG_CLOSE, close_code, close_message)
+            elif size:
+                raise WebSocketError(
+                    PROTOCOL_ERROR,
+                    'Invalid close frame: {} {} {!r}'.format(
+                        int(fin), opcode, payload))
+            else:
+                msg = WSMessage(MSG_CLOSE, 0, '')
+
+            self.queue.feed_data(msg, 0)
+
+        elif opcode == OP_PING:
+            self.queue.feed_data(WSMessage(MSG_PING, payload, ''), size)
+
+        elif opcode == OP_PONG:
+            self.queue.feed_data(WSMessage(MSG_PONG, payload, ''), size)
+
+        elif (opcode != OP_TEXT and opcode != OP_BINARY and
+                self._opcode < 0):
+            raise WebSocketError(
+                PROTOCOL_ERROR,
+                "Unexpected opcode={!r}".format(opcode))
+
+        elif not fin:
+            # got partial frame payload
+            if opcode != OP_CONTINUATION:
+                self._opcode = opcode
+            self._partial.append(payload)
+
+        else:
+            # previous frame was non finished
+            # we should get continuation opcode
+            if self._partial:
+                if opcode != OP_CONTINUATION:
+                    raise WebSocketError(
+                        PROTOCOL_ERROR,
+                        'The opcode in non-fin frame is expected '
+                        'to be zero, got {!r}'.format(opcode))
+                self._partial.append(payload)
+                payload = EMPTY.join(self._partial)
+                self._partial.clear()
+                size = PyBytes_GET_SIZE(payload)
+                data = PyBytes_AS_STRING(payload)
+
+            if opcode == OP_CONTINUATION:
+                opcode = self._opcode
+            self._opcode = -1
+
+            if opcode == OP_TEXT:
+                try:
+                    text = PyUnicode_DecodeUTF8(data, size, NULL)
+                except UnicodeDecodeError as exc:
+                    raise WebSocketError(
+                        INVALID_TEXT,
+                        'Invalid UTF-8 text message') from exc
+                self.queue.feed_data(
+                    WSMessage(MSG_TEXT, text, ''), len(text))
+            else:
+                self.queue.feed_data(
+                    WSMessage(MSG_BINARY, payload, ''), size)
@@ -1,5 +1,6 @@
 """WebSocket protocol versions 13 and 8."""
 
+import asyncio
 import base64
 import binascii
 import collections
@@ -8,14 +9,16 @@ import json
 import os
 import random
 import sys
+import zlib
 from enum import IntEnum
 from struct import Struct
 
-from aiohttp import errors, hdrs
+from aiohttp import errors, hdrs, helpers
 from aiohttp.log import ws_logger
 
 __all__ = ('WebSocketReader', 'WebSocketWriter', 'do_handshake',
-           'WSMessage', 'WebSocketError', 'WSMsgType', 'WSCloseCode')
+           'WSMessage', 'WebSocketError', 'WSMsgType', 'WSCloseCode',
+           'ws_ext_parse', 'ws_ext_gen')
 
 
 class WSCloseCode(IntEnum):
@@ -71,6 +74,15 @@ PACK_LEN3 = Struct('!BBQ').pack
 PACK_CLOSE_CODE = Struct('!H').pack
 MSG_SIZE = 2 ** 14
 DEFAULT_LIMIT = 2 ** 16
+# smaller messages are sent uncompressed by permessage-deflate
+COMPRESS_THRESHOLD = 128
+# max size of decompressed message, 0 for no limit
+MAX_MSG_SIZE = 4 * 1024 * 1024
+# trailer removed from compressed messages, RFC 7692 7.2.1
+_DEFLATE_TRAILER = b'\x00\x00\xff\xff'
+# what WebSocketWriter does with data messages sent while its write
+# buffer is above the high watermark
+OVERFLOW_POLICIES = ('wait', 'drop_oldest', 'drop_newest', 'close')
 
 
 _WSMessageBase = collections.namedtuple('_WSMessageBase',
@@ -148,8 +160,9 @@ class WSParserState(IntEnum):
 
 class WebSocketReader:
 
-    def __init__(self, queue):
+    def __init__(self, queue, *, compress=False, max_msg_size=MAX_MSG_SIZE):
         self.queue = queue
+        self._max_msg_size = max_msg_size
 
         self._exc = None
         self._partial = []
@@ -166,6 +179,15 @@ class WebSocketReader:
         self._payload_length = 0
         self._payload_length_flag = 0
 
+        # permessage-deflate, single decompressor works for peers with
+        # and without context takeover
+        self._decompressobj = (zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+                               if compress else None)
+        self._compressed = False
+        self._frame_compressed = False
+        # decompressed size of current message
+        self._msg_size = 0
+
     def feed_eof(self):
         self.queue.feed_eof()
 
@@ -201,7 +223,7 @@ class WebSocketReader:
                     raise WebSocketError(
                         WSCloseCode.PROTOCOL_ERROR,
                         'Invalid close frame: {} {} {!r}'.format(
-                            fin, opcode, payload))
+                            fin, opcode, bytes(payload)))
                 else:
                     msg = WSMessage(WSMsgType.CLOSE, 0, '')
 
@@ -257,7 +279,7 @@ class WebSocketReader:
                         self.queue.feed_data(
                             WSMessage(WSMsgType.BINARY, data, ''), len(data))
 
-                    self._start_opcode = None
+                    self._opcode = None
                     self._partial.clear()
 
         return False, b''
@@ -294,7 +316,13 @@ class WebSocketReader:
                     #    1 bit, MUST be 0 unless negotiated otherwise
                     # frame-rsv3 = %x0 ;
                     #    1 bit, MUST be 0 unless negotiated otherwise
-                    if rsv1 or rsv2 or rsv3:
+                    #
+                    # permessage-deflate sets rsv1 on the first frame
+                    # of a compressed data message
+                    if rsv2 or rsv3 or (rsv1 and (
+                            self._decompressobj is None or
+                            opcode not in (WSMsgType.TEXT,
+                                           WSMsgType.BINARY))):
                         raise WebSocketError(
                             WSCloseCode.PROTOCOL_ERROR,
                             'Received frame with non-zero reserved bits')
@@ -324,6 +352,13 @@ class WebSocketReader:
                             'Control frame payload cannot be '
                             'larger than 125 bytes')
 
+                    if opcode == WSMsgType.CONTINUATION:
+                        self._frame_compressed = self._compressed
+                    elif opcode < 0x8:
+                        self._frame_compressed = self._compressed = rsv1
+                    else:
+                        self._frame_compressed = False
+
                     self._frame_fin = fin
                     self._frame_opcode = opcode
                     self._has_mask = has_mask
@@ -394,6 +429,9 @@ class WebSocketReader:
                         payload = _websocket_mask(
                             self._frame_mask, payload)
 
+                    if self._frame_compressed:
+                        payload = self._decompress(payload)
+
                     frames.append(
                         (self._frame_fin, self._frame_opcode, payload))
 
@@ -402,46 +440,164 @@ class WebSocketReader:
                 else:
                     break
 
+        # keep incomplete header for the next call
+        self._tail = buf[start_pos:]
         return frames
 
+    def _decompress(self, payload):
+        if self._frame_fin:
+            payload += _DEFLATE_TRAILER
+        max_size = self._max_msg_size
+        left = max_size - self._msg_size
+        try:
+            # one byte over the limit is enough to reject the message
+            payload = self._decompressobj.decompress(
+                payload, left + 1 if max_size else 0)
+        except zlib.error as exc:
+            raise WebSocketError(
+                WSCloseCode.PROTOCOL_ERROR,
+                'Invalid compressed message') from exc
+        if max_size and len(payload) > left:
+            raise WebSocketError(
+                WSCloseCode.MESSAGE_TOO_BIG,
+                'Message size exceeds limit {}'.format(max_size))
+        if self._frame_fin:
+            self._msg_size = 0
+        else:
+            self._msg_size += len(payload)
+        return payload
+
+
+WebSocketReaderPy = WebSocketReader
+
+if not bool(os.environ.get('AIOHTTP_NO_EXTENSIONS')):
+    try:
+        from ._websocket import WebSocketReaderC
+        WebSocketReader = WebSocketReaderC  # noqa
+    except ImportError:  # pragma: no cover
+        pass
+
+
+def _frame_header(opcode, msg_length, use_mask=False):
+    """Return header of final frame."""
+    if use_mask:
+        mask_bit = 0x80
+    else:
+        mask_bit = 0
+
+    if msg_length < 126:
+        return PACK_LEN1(0x80 | opcode, msg_length | mask_bit)
+    elif msg_length < (1 << 16):
+        return PACK_LEN2(0x80 | opcode, 126 | mask_bit, msg_length)
+    else:
+        return PACK_LEN3(0x80 | opcode, 127 | mask_bit, msg_length)
+
+
+def build_frame(message, opcode):
+    """Return unmasked and uncompressed frame with message as payload.
+
+    Result may be written to many connections without compression by
+    WebSocketWriter.send_frame().
+    """
+    return _frame_header(opcode, len(message)) + message
+
 
 class WebSocketWriter:
 
     def __init__(self, stream, *,
-                 use_mask=False, limit=DEFAULT_LIMIT, random=random.Random()):
+                 use_mask=False, limit=DEFAULT_LIMIT, random=random.Random(),
+                 compress=0, notakeover=False,
+                 compress_threshold=COMPRESS_THRESHOLD):
         self.stream = stream
         self.writer = stream.transport
         self.use_mask = use_mask
         self.randrange = random.randrange
+        self.compress = compress
         self._closing = False
         self._limit = limit
         self._output_size = 0
 
+        # write buffer watermarks, see set_write_buffer_limits()
+        self._high_water = None
+        self._overflow = 'wait'
+        self._on_overflow = None
+        self._loop = None
+        # (message, opcode) held back by 'drop_oldest' policy, opcode is
+        # None for frames made by build_frame()
+        self._backlog = collections.deque()
+        self._backlog_size = 0
+        self._flusher = None
+        self.dropped = 0
+
+        # permessage-deflate, compress is window bits of compressor
+        self._compressobj = (zlib.compressobj(wbits=-compress)
+                             if compress else None)
+        self._compress_flush = (zlib.Z_FULL_FLUSH if notakeover
+                                else zlib.Z_SYNC_FLUSH)
+        self._compress_threshold = compress_threshold
+
+    def set_write_buffer_limits(self, high=None, low=None, overflow='wait',
+                                *, on_overflow=None, loop=None):
+        """Set high and low watermarks of write buffer.
+
+        When transport write buffer is above high watermark data
+        messages are handled according to overflow policy:
+
+        'wait' - message is written, drain() waiting for buffer to go
+        below low watermark is returned.
+        'drop_oldest' - message is queued, oldest queued messages are
+        dropped to keep queue within high watermark.  Queue is written
+        when buffer goes below low watermark.
+        'drop_newest' - message is dropped.
+        'close' - message is dropped and on_overflow() is called.
+
+        Control frames are always written.
+        """
+        high, low = write_buffer_limits(high, low, overflow)
+        if high is not None:
+            self.writer.set_write_buffer_limits(high=high, low=low)
+        self._high_water = high
+        self._overflow = overflow
+        self._on_overflow = on_overflow
+        self._loop = loop
+
     def _send_frame(self, message, opcode):
         """Send a frame over the websocket with message as its payload."""
+        if self._put_message(message, opcode):
+            return self.stream.drain()
+        return ()
+
+    def _put_message(self, message, opcode):
+        """Write or queue a frame, return True if stream needs draining."""
         if self._closing:
             ws_logger.warning('websocket connection is closing.')
 
-        msg_length = len(message)
+        if self._overflow != 'wait' and opcode < 0x8:
+            if self._backlog or self._is_full():
+                self._overflowed(message, opcode)
+                return False
 
-        use_mask = self.use_mask
-        if use_mask:
-            mask_bit = 0x80
-        else:
-            mask_bit = 0
+        return self._written(self._write_frame(message, opcode))
 
-        if msg_length < 126:
-            header = PACK_LEN1(0x80 | opcode, msg_length | mask_bit)
-        elif msg_length < (1 << 16):
-            header = PACK_LEN2(0x80 | opcode, 126 | mask_bit, msg_length)
-        else:
-            header = PACK_LEN3(0x80 | opcode, 127 | mask_bit, msg_length)
+    def _write_frame(self, message, opcode):
+        if (self._compressobj is not None and opcode < 0x8 and
+                len(message) >= self._compress_threshold):
+            compressobj = self._compressobj
+            message = (compressobj.compress(message) +
+                       compressobj.flush(self._compress_flush))
+            if message.endswith(_DEFLATE_TRAILER):
+                message = message[:-4]
+            # rsv1 marks compressed message
+            opcode |= 0x40
+
+        use_mask = self.use_mask
+        header = _frame_header(opcode, len(message), use_mask)
         if use_mask:
             mask = self.randrange(0, 0xffffffff)
             mask = mask.to_bytes(4, 'big')
             message = _websocket_mask(mask, bytearray(message))
             self.writer.write(header + mask + message)
-            self._output_size += len(header) + len(mask) + len(message)
+            return len(header) + len(mask) + len(message)
         else:
             if len(message) > MSG_SIZE:
                 self.writer.write(header)
@@ -449,14 +605,89 @@ class WebSocketWriter:
             else:
                 self.writer.write(header + message)
 
-            self._output_size += len(header) + len(message)
+            return len(header) + len(message)
+
+    def _written(self, size):
+        if self._high_water is not None:
+            return self._overflow == 'wait' and self._is_full()
 
+        self._output_size += size
         if self._output_size > self._limit:
             self._output_size = 0
-            return self.stream.drain()
+            return True
+
+        return False
+
+    def _is_full(self):
+        return self.writer.get_write_buffer_size() > self._high_water
+
+    def _overflowed(self, message, opcode):
+        overflow = self._overflow
+        if overflow == 'drop_oldest':
+            # messages are compressed when written from backlog,
+            # dropping them keeps compression context consistent
+            backlog = self._backlog
+            backlog.append((message, opcode))
+            self._backlog_size += len(message)
+            while len(backlog) > 1 and self._backlog_size > self._high_water:
+                self._backlog_size -= len(backlog.popleft()[0])
+                self.dropped += 1
+            if self._flusher is None:
+                self._flusher = helpers.ensure_future(
+                    self._flush_backlog(), loop=self._loop)
+            return
+
+        self.dropped += 1
+        if overflow == 'close' and self._on_overflow is not None:
+            on_overflow, self._on_overflow = self._on_overflow, None
+            on_overflow()
+
+    def _write_backlog(self, limit=True):
+        backlog = self._backlog
+        while backlog and not (limit and self._is_full()):
+            message, opcode = backlog.popleft()
+            self._backlog_size -= len(message)
+            if opcode is None:
+                self.writer.write(message)
+            else:
+                self._write_frame(message, opcode)
+
+    @asyncio.coroutine
+    def _flush_backlog(self):
+        try:
+            while self._backlog:
+                # transport pauses writing above high watermark and
+                # resumes below low one
+                yield from self.stream.drain()
+                self._write_backlog()
+        except Exception:
+            # connection is lost
+            self.dropped += len(self._backlog)
+            self._backlog.clear()
+            self._backlog_size = 0
+        finally:
+            self._flusher = None
 
+    def send_frame(self, frame):
+        """Send frame made by build_frame() as is."""
+        if self._put_frame(frame):
+            return self.stream.drain()
         return ()
 
+    def _put_frame(self, frame):
+        """Write or queue a frame made by build_frame(), return True if
+        stream needs draining."""
+        if self._closing:
+            ws_logger.warning('websocket connection is closing.')
+
+        if self._overflow != 'wait':
+            if self._backlog or self._is_full():
+                self._overflowed(frame, None)
+                return False
+
+        self.writer.write(frame)
+        return self._written(len(frame))
+
     def pong(self, message=b''):
         """Send pong message."""
         if isinstance(message, str):
@@ -482,6 +713,11 @@ class WebSocketWriter:
         """Close the websocket, sending the specified code and message."""
         if isinstance(message, str):
             message = message.encode('utf-8')
+        # close frame goes after all queued messages
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        self._write_backlog(limit=False)
         try:
             return self._send_frame(
                 PACK_CLOSE_CODE(code) + message, opcode=WSMsgType.CLOSE)
@@ -489,8 +725,128 @@ class WebSocketWriter:
             self._closing = True
 
 
+def write_buffer_limits(high, low, overflow):
+    """Check write buffer watermarks, return (high, low).
+
+    low defaults to quarter of high.
+    """
+    if overflow not in OVERFLOW_POLICIES:
+        raise ValueError('overflow should be one of {}, got {!r}'.format(
+            ', '.join(OVERFLOW_POLICIES), overflow))
+    if high is None:
+        if low is not None or overflow != 'wait':
+            raise ValueError('low watermark and {!r} overflow policy '
+                             'require high watermark'.format(overflow))
+        return None, None
+    if low is None:
+        low = high // 4
+    if not 0 <= low <= high:
+        raise ValueError(
+            'high watermark ({!r}) must be >= low ({!r}) >= 0'.format(
+                high, low))
+    return high, low
+
+
+_WS_EXT_PARAMS = frozenset(('server_no_context_takeover',
+                            'client_no_context_takeover',
+                            'server_max_window_bits',
+                            'client_max_window_bits'))
+
+
+def _ws_ext_params(extension):
+    """Parse parameters of permessage-deflate extension.
+
+    Returns None for other extensions, raises ValueError for invalid
+    parameters.
+    """
+    name, *params = extension.split(';')
+    if name.strip().lower() != 'permessage-deflate':
+        return None
+
+    result = {}
+    for param in params:
+        key, sep, value = param.partition('=')
+        key = key.strip().lower()
+        value = value.strip().strip('"') if sep else None
+        if key not in _WS_EXT_PARAMS or key in result:
+            raise ValueError('Invalid parameter: {!r}'.format(param))
+        if key.endswith('_max_window_bits'):
+            if value is None:
+                if key == 'server_max_window_bits':
+                    raise ValueError('Missing value: {!r}'.format(param))
+            elif not value.isdigit() or not 8 <= int(value) <= 15:
+                raise ValueError('Invalid window bits: {!r}'.format(param))
+            else:
+                value = int(value)
+        elif value is not None:
+            raise ValueError('Unexpected value: {!r}'.format(param))
+        result[key] = value
+    return result
+
+
+def ws_ext_parse(extstr, isserver=False):
+    """Parse Sec-WebSocket-Extensions header for permessage-deflate.
+
+    Returns (compress, notakeover): window bits of own compressor, 0 if
+    compression is not negotiated, and whether compressor context is
+    reset after every message.
+
+    Server takes the first acceptable offer of the client.  Client
+    checks server's response and raises ValueError if it is invalid.
+    """
+    if not extstr:
+        return 0, False
+
+    if isserver:
+        for extension in extstr.split(','):
+            try:
+                params = _ws_ext_params(extension)
+            except ValueError:
+                continue
+            if params is None:
+                continue
+            compress = params.get('server_max_window_bits', 15)
+            # zlib can't compress with 256 bytes window
+            if compress == 8:
+                continue
+            return compress, 'server_no_context_takeover' in params
+        return 0, False
+
+    extensions = extstr.split(',')
+    params = _ws_ext_params(extensions[0])
+    if params is None or len(extensions) > 1:
+        raise ValueError('Unsupported extensions: {!r}'.format(extstr))
+    compress = params.get('client_max_window_bits') or 15
+    if compress == 8:
+        raise ValueError('Unsupported window bits: {!r}'.format(extstr))
+    return compress, 'client_no_context_takeover' in params
+
+
+def ws_ext_gen(compress=15, isserver=False, notakeover=False):
+    """Generate Sec-WebSocket-Extensions header for permessage-deflate.
+
+    Server's response accepts compress window bits and context reset
+    asked by client, client's offer announces own ones.
+    """
+    params = ['permessage-deflate']
+    if isserver:
+        if notakeover:
+            params.append('server_no_context_takeover')
+        if compress < 15:
+            params.append('server_max_window_bits={}'.format(compress))
+    else:
+        if compress < 15:
+            params.append('client_max_window_bits={}'.format(compress))
+        else:
+            params.append('client_max_window_bits')
+        if notakeover:
+            params.append('client_no_context_takeover')
+    return '; '.join(params)
+
+
 def do_handshake(method, headers, stream,
-                 protocols=(), write_buffer_size=DEFAULT_LIMIT):
+                 protocols=(), write_buffer_size=DEFAULT_LIMIT,
+                 compress=False, compress_threshold=COMPRESS_THRESHOLD):
     """Prepare WebSocket handshake.
 
     It return HTTP response code, response headers, websocket parser,
@@ -501,6 +857,10 @@ def do_handshake(method, headers, stream,
     which the server also knows.
 
     `write_buffer_size` max size of write buffer before `drain()` get called.
+
+    `compress` enables permessage-deflate extension if client offers it,
+    writer's `compress` attribute is the negotiated window bits then.
+    Messages shorter than `compress_threshold` are not compressed.
     """
     # WebSocket accepts only GET
     if method.upper() != hdrs.METH_GET:
@@ -560,9 +920,20 @@ def do_handshake(method, headers, stream,
     if protocol:
         response_headers.append((hdrs.SEC_WEBSOCKET_PROTOCOL, protocol))
 
+    notakeover = False
+    if compress:
+        compress, notakeover = ws_ext_parse(
+            headers.get(hdrs.SEC_WEBSOCKET_EXTENSIONS), isserver=True)
+        if compress:
+            response_headers.append(
+                (hdrs.SEC_WEBSOCKET_EXTENSIONS,
+                 ws_ext_gen(compress, isserver=True, notakeover=notakeover)))
+
     # response code, headers, None, writer, protocol
     return (101,
             response_headers,
             None,
-            WebSocketWriter(stream, limit=write_buffer_size),
+            WebSocketWriter(stream, limit=write_buffer_size,
+                            compress=compress, notakeover=notakeover,
+                            compress_threshold=compress_threshold),
             protocol)
@@ -14,13 +14,15 @@ from yarl import URL
 import aiohttp
 
 from . import hdrs, helpers
-from ._ws_impl import WS_KEY, WebSocketReader, WebSocketWriter
+from ._ws_impl import (COMPRESS_THRESHOLD, MAX_MSG_SIZE, WS_KEY,
+                       WebSocketReader, WebSocketWriter, write_buffer_limits,
+                       ws_ext_gen, ws_ext_parse)
 from .client_reqrep import ClientRequest, ClientResponse
 from .client_ws import ClientWebSocketResponse
 from .cookiejar import CookieJar
 from .errors import WSServerHandshakeError
 from .helpers import TimeService
-from .streams import FlowControlDataQueue
+from .streams import FlowControlDataQueue, StreamReader
 
 __all__ = ('ClientSession', 'request')
 
@@ -30,6 +32,10 @@ PY_35 = sys.version_info >= (3, 5)
 # 5 Minute default read and connect timeout
 DEFAULT_TIMEOUT = 5 * 60
 
+# request headers which distinguish coalesced requests by default
+COALESCE_HEADERS = (hdrs.ACCEPT, hdrs.ACCEPT_ENCODING, hdrs.ACCEPT_LANGUAGE,
+                    hdrs.AUTHORIZATION, hdrs.COOKIE, hdrs.RANGE)
+
 
 class ClientSession:
     """First-class interface for making HTTP requests."""
@@ -43,7 +49,9 @@ class ClientSession:
                  response_class=ClientResponse,
                  ws_response_class=ClientWebSocketResponse,
                  version=aiohttp.HttpVersion11,
-                 cookie_jar=None, read_timeout=None, time_service=None):
+                 cookie_jar=None, read_timeout=None, time_service=None,
+                 coalesce=False, coalesce_max_size=2**20,
+                 coalesce_headers=COALESCE_HEADERS):
 
         implicit_loop = False
         if loop is None:
@@ -110,6 +118,14 @@ class ClientSession:
             self._time_service_owner = True
             self._time_service = TimeService(self._loop)
 
+        self._coalesce = coalesce
+        self._coalesce_max_size = coalesce_max_size
+        self._coalesce_headers = tuple(sorted({istr(h)
+                                               for h in coalesce_headers}))
+        self._flights = {}
+        self._coalesced_requests = 0
+        self._coalesce_misses = 0
+
     def __del__(self, _warnings=warnings):
         if not self.closed:
             self.close()
@@ -126,28 +142,177 @@ class ClientSession:
     def time_service(self):
         return self._time_service
 
+    @property
+    def coalesced_requests(self):
+        """Number of requests served by identical in-flight ones."""
+        return self._coalesced_requests
+
+    @property
+    def coalesce_misses(self):
+        """Number of requests sent on their own after waiting.
+
+        The identical in-flight request failed to share its response,
+        e.g. the response was larger than coalesce_max_size.
+        """
+        return self._coalesce_misses
+
     def request(self, method, url, **kwargs):
         """Perform HTTP request."""
         return _RequestContextManager(self._request(method, url, **kwargs))
 
     @asyncio.coroutine
-    def _request(self, method, url, *,
-                 params=None,
-                 data=None,
-                 headers=None,
-                 skip_auto_headers=None,
-                 auth=None,
-                 allow_redirects=True,
-                 max_redirects=10,
-                 encoding='utf-8',
-                 version=None,
-                 compress=None,
-                 chunked=None,
-                 expect100=False,
-                 read_until_eof=True,
-                 proxy=None,
-                 proxy_auth=None,
-                 timeout=DEFAULT_TIMEOUT):
+    def _request(self, method, url, **kwargs):
+        if self._coalesce:
+            key = self._coalesce_key(method, url, kwargs)
+            if key is not None:
+                return (yield from self._coalesced_request(
+                    key, method, url, kwargs))
+        return (yield from self._send_request(method, url, **kwargs))
+
+    def _coalesce_key(self, method, url, kwargs):
+        """Key of identical requests, None if request can't be shared."""
+        if method not in (hdrs.METH_GET, hdrs.METH_HEAD):
+            return None
+        if (kwargs.get('data') is not None or kwargs.get('expect100') or
+                kwargs.get('chunked') or kwargs.get('compress')):
+            return None
+
+        url = URL(url).with_fragment(None)
+        params = kwargs.get('params')
+        if params:
+            q = MultiDict(url.query)
+            q.extend(url.with_query(params).query)
+            url = url.with_query(q)
+        headers = self._prepare_headers(kwargs.get('headers'))
+        if hdrs.UPGRADE in headers:
+            return None
+        auth = kwargs.get('auth') or self._default_auth
+        options = tuple(sorted(
+            (name, value) for name, value in kwargs.items()
+            if name not in ('params', 'headers', 'auth')))
+        key = (method, url, auth, options,
+               tuple(tuple(headers.getall(name, ()))
+                     for name in self._coalesce_headers))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    @asyncio.coroutine
+    def _coalesced_request(self, key, method, url, kwargs):
+        flight = self._flights.get(key)
+        if flight is not None:
+            # waiting for identical request is limited by own timeout
+            timeout = self._request_timeout(
+                kwargs.get('timeout', DEFAULT_TIMEOUT))
+            with self._time_service.timeout(timeout):
+                shared = yield from asyncio.shield(flight, loop=self._loop)
+            if shared is not None:
+                self._coalesced_requests += 1
+                return self._copy_response(*shared)
+            self._coalesce_misses += 1
+            return (yield from self._send_request(method, url, **kwargs))
+
+        flight = self._flights[key] = helpers.create_future(self._loop)
+        shared = None
+        try:
+            resp = yield from self._send_request(method, url, **kwargs)
+            body = yield from self._read_shared(resp)
+            if body is not None:
+                shared = (resp, body)
+                # requester gets a copy as well, original content
+                # stream is consumed
+                resp = self._copy_response(*shared)
+            return resp
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            flight.set_exception(exc)
+            # do not log it if no one else waits
+            flight.exception()
+            raise
+        finally:
+            del self._flights[key]
+            if not flight.done():
+                flight.set_result(shared)
+
+    @asyncio.coroutine
+    def _read_shared(self, resp):
+        """Read body of response to share, None if it is too large.
+
+        Body without Content-Length (e.g. chunked) is read up to
+        coalesce_max_size, data read from larger body is put back to
+        response content.
+        """
+        if resp.method == hdrs.METH_HEAD or resp.status in (204, 304):
+            return (yield from resp.read())
+
+        limit = self._coalesce_max_size
+        try:
+            if int(resp.headers[hdrs.CONTENT_LENGTH]) > limit:
+                return None
+        except (KeyError, ValueError):
+            pass
+
+        chunks = []
+        size = 0
+        try:
+            while True:
+                chunk = yield from resp.content.readany()
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > limit:
+                    resp.content.unread_data(b''.join(chunks))
+                    return None
+        except Exception:
+            resp.close()
+            raise
+
+        resp._content = b''.join(chunks)
+        yield from resp.release()
+        return resp._content
+
+    def _copy_response(self, resp, body):
+        """Response holding own copy of shared response's body."""
+        copy = self._response_class(resp.method, resp.url_obj)
+        copy._post_init(self._loop)
+        copy.version = resp.version
+        copy.status = resp.status
+        copy.reason = resp.reason
+        copy.headers = resp.headers
+        copy.raw_headers = resp.raw_headers
+        copy.cookies.update(resp.cookies)
+        copy._history = resp.history
+        copy.content = StreamReader(loop=self._loop)
+        if body:
+            copy.content.feed_data(body)
+        copy.content.feed_eof()
+        copy._content = body
+        # no connection is held
+        copy._closed = True
+        return copy
+
+    @asyncio.coroutine
+    def _send_request(self, method, url, *,
+                      params=None,
+                      data=None,
+                      headers=None,
+                      skip_auto_headers=None,
+                      auth=None,
+                      allow_redirects=True,
+                      max_redirects=10,
+                      encoding='utf-8',
+                      version=None,
+                      compress=None,
+                      chunked=None,
+                      expect100=False,
+                      read_until_eof=True,
+                      proxy=None,
+                      proxy_auth=None,
+                      timeout=DEFAULT_TIMEOUT):
 
         # NOTE: timeout clamps existing connect and read timeouts.  We cannot
         # set the default to None because we need to detect if the user wants
@@ -189,17 +354,9 @@ class ClientSession:
         if proxy is not None:
             proxy = URL(proxy)
 
-        # request timeout
-        if timeout is None:
-            timeout = self._read_timeout
-        if timeout is None:
-            timeout = self._connector.conn_timeout
-        elif self._connector.conn_timeout is not None:
-            timeout = max(timeout, self._connector.conn_timeout)
-
         # timeout is cumulative for all request operations
         # (request, redirects, responses, data consuming)
-        timer = self._time_service.timeout(timeout)
+        timer = self._time_service.timeout(self._request_timeout(timeout))
 
         with timer:
             while True:
@@ -207,31 +364,45 @@ class ClientSession:
 
                 cookies = self._cookie_jar.filter_cookies(url)
 
-                req = self._request_class(
-                    method, url, params=params, headers=headers,
-                    skip_auto_headers=skip_headers, data=data,
-                    cookies=cookies, encoding=encoding,
-                    auth=auth, version=version, compress=compress,
-                    chunked=chunked, expect100=expect100,
-                    loop=self._loop, response_class=self._response_class,
-                    proxy=proxy, proxy_auth=proxy_auth, timer=timer)
-
-                conn = yield from self._connector.connect(req)
-                conn.writer.set_tcp_nodelay(True)
-                try:
-                    resp = req.send(conn)
+                conn = None
+                while True:
+                    req = self._request_class(
+                        method, url, params=params, headers=headers,
+                        skip_auto_headers=skip_headers, data=data,
+                        cookies=cookies, encoding=encoding,
+                        auth=auth, version=version, compress=compress,
+                        chunked=chunked, expect100=expect100,
+                        loop=self._loop,
+                        response_class=self._response_class,
+                        proxy=proxy, proxy_auth=proxy_auth, timer=timer)
+
+                    if conn is None:
+                        conn = yield from self._connector.connect(req)
+                    else:
+                        # pipelined connection was closed on a response
+                        # to an earlier request, use a connection of
+                        # its own
+                        conn = yield from self._connector.connect(
+                            req, pipeline=False)
+                    conn.writer.set_tcp_nodelay(True)
                     try:
-                        yield from resp.start(conn, read_until_eof)
-                    except:
-                        resp.close()
-                        conn.close()
-                        raise
-                except aiohttp.ServerDisconnectedError:
-                    raise
-                except aiohttp.HttpProcessingError as exc:
-                    raise aiohttp.ClientResponseError() from exc
-                except OSError as exc:
-                    raise aiohttp.ClientOSError(*exc.args) from exc
+                        resp = req.send(conn)
+                        try:
+                            yield from resp.start(conn, read_until_eof)
+                        except:
+                            resp.close()
+                            conn.close()
+                            raise
+                    except aiohttp.ServerDisconnectedError:
+                        if not conn.pipelined:
+                            raise
+                    except aiohttp.HttpProcessingError as exc:
+                        raise aiohttp.ClientResponseError() from exc
+                    except OSError as exc:
+                        if not conn.pipelined:
+                            raise aiohttp.ClientOSError(*exc.args) from exc
+                    else:
+                        break
 
                 self._cookie_jar.update_cookies(resp.cookies, resp.url_obj)
 
@@ -292,7 +463,13 @@ class ClientSession:
                    origin=None,
                    headers=None,
                    proxy=None,
-                   proxy_auth=None):
+                   proxy_auth=None,
+                   compress=0,
+                   compress_threshold=COMPRESS_THRESHOLD,
+                   high_water=None,
+                   low_water=None,
+                   overflow='wait',
+                   max_msg_size=MAX_MSG_SIZE):
         """Initiate websocket connection."""
         return _WSRequestContextManager(
             self._ws_connect(url,
@@ -306,7 +483,13 @@ class ClientSession:
                              origin=origin,
                              headers=headers,
                              proxy=proxy,
-                             proxy_auth=proxy_auth))
+                             proxy_auth=proxy_auth,
+                             compress=compress,
+                             compress_threshold=compress_threshold,
+                             high_water=high_water,
+                             low_water=low_water,
+                             overflow=overflow,
+                             max_msg_size=max_msg_size))
 
     @asyncio.coroutine
     def _ws_connect(self, url, *,
@@ -320,8 +503,18 @@ class ClientSession:
                     origin=None,
                     headers=None,
                     proxy=None,
-                    proxy_auth=None):
-
+                    proxy_auth=None,
+                    compress=0,
+                    compress_threshold=COMPRESS_THRESHOLD,
+                    high_water=None,
+                    low_water=None,
+                    overflow='wait',
+                    max_msg_size=MAX_MSG_SIZE):
+
+        high_water, low_water = write_buffer_limits(
+            high_water, low_water, overflow)
+        if compress is True:
+            compress = 15
         sec_key = base64.b64encode(os.urandom(16))
 
         if headers is None:
@@ -342,6 +535,8 @@ class ClientSession:
             headers[hdrs.SEC_WEBSOCKET_PROTOCOL] = ','.join(protocols)
         if origin is not None:
             headers[hdrs.ORIGIN] = origin
+        if compress:
+            headers[hdrs.SEC_WEBSOCKET_EXTENSIONS] = ws_ext_gen(compress)
 
         # send request
         resp = yield from self.get(url, headers=headers,
@@ -392,12 +587,38 @@ class ClientSession:
                         protocol = proto
                         break
 
+            # websocket compress
+            notakeover = False
+            extensions = resp.headers.get(hdrs.SEC_WEBSOCKET_EXTENSIONS)
+            if extensions:
+                if not compress:
+                    raise WSServerHandshakeError(
+                        message='Unexpected extensions: {}'.format(
+                            extensions),
+                        code=resp.status,
+                        headers=resp.headers)
+                try:
+                    bits, notakeover = ws_ext_parse(extensions)
+                except ValueError as exc:
+                    raise WSServerHandshakeError(
+                        message=exc.args[0],
+                        code=resp.status,
+                        headers=resp.headers) from exc
+                compress = min(compress, bits)
+            else:
+                compress = 0
+
             proto = resp.connection.protocol
             reader = FlowControlDataQueue(
                 proto, limit=2 ** 16, loop=self._loop)
-            proto.set_parser(WebSocketReader(reader), reader)
+            proto.set_parser(WebSocketReader(reader, compress=bool(compress),
+                                             max_msg_size=max_msg_size),
+                             reader)
             resp.connection.writer.set_tcp_nodelay(True)
-            writer = WebSocketWriter(resp.connection.writer, use_mask=True)
+            writer = WebSocketWriter(resp.connection.writer, use_mask=True,
+                                     compress=compress,
+                                     notakeover=notakeover,
+                                     compress_threshold=compress_threshold)
         except Exception:
             resp.close()
             raise
@@ -412,7 +633,20 @@ class ClientSession:
                                            self._loop,
                                            time_service=self.time_service,
                                            receive_timeout=receive_timeout,
-                                           heartbeat=heartbeat)
+                                           heartbeat=heartbeat,
+                                           high_water=high_water,
+                                           low_water=low_water,
+                                           overflow=overflow)
+
+    def _request_timeout(self, timeout):
+        """Timeout of request made with given timeout argument."""
+        if timeout is None:
+            timeout = self._read_timeout
+        if timeout is None:
+            timeout = self._connector.conn_timeout
+        elif self._connector.conn_timeout is not None:
+            timeout = max(timeout, self._connector.conn_timeout)
+        return timeout
 
     def _prepare_headers(self, headers):
         """ Add default headers and transform it to CIMultiDict
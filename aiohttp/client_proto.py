@@ -1,5 +1,6 @@
 import asyncio
 import asyncio.streams
+import collections
 
 from . import errors, hdrs
 from .errors import ServerDisconnectedError
@@ -26,8 +27,14 @@ class HttpClientProtocol(DataQueue, asyncio.streams.FlowControlMixin):
         self._payload_parser = None
         self._reading_paused = False
 
+        # responses are read in request order, see ClientResponse.start()
+        self.read_lock = asyncio.Lock(loop=loop)
+        # params of not yet received responses, in request order
+        self._response_params = collections.deque()
         self._timer = None
-        self._skip_status = ()
+        self._skip_payload = False
+        self._skip_status_codes = ()
+        self._read_until_eof = False
 
         self._lines = []
         self._tail = b''
@@ -81,10 +88,13 @@ class HttpClientProtocol(DataQueue, asyncio.streams.FlowControlMixin):
                             skip_payload=False,
                             skip_status_codes=(),
                             read_until_eof=False):
-        self._timer = timer
-        self._skip_payload = skip_payload
-        self._skip_status_codes = skip_status_codes
-        self._read_until_eof = read_until_eof
+        """Set params of the next expected response.
+
+        Params of pipelined requests are queued and applied to
+        responses in order.
+        """
+        self._response_params.append(
+            (timer, skip_payload, skip_status_codes, read_until_eof))
 
     def data_received(self, data,
                       EMPTY=b'',
@@ -102,7 +112,8 @@ class HttpClientProtocol(DataQueue, asyncio.streams.FlowControlMixin):
                     self._payload_parser = None
 
                     if tail:
-                        super().data_received(tail)
+                        # next pipelined response
+                        self.data_received(tail)
 
             return
 
@@ -148,6 +159,15 @@ class HttpClientProtocol(DataQueue, asyncio.streams.FlowControlMixin):
 
                     self._should_close = msg.should_close
 
+                    params = self._response_params
+                    if params:
+                        (self._timer, self._skip_payload,
+                         self._skip_status_codes,
+                         self._read_until_eof) = params[0]
+                        # informational responses precede the final one
+                        if not 100 <= msg.code < 200 or msg.code == 101:
+                            params.popleft()
+
                     # calculate payload
                     empty_payload = True
                     if (((length is not None and length > 0) or
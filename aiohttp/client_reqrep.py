@@ -3,6 +3,7 @@ import io
 import json
 import mimetypes
 import os
+import stat
 import sys
 import traceback
 import warnings
@@ -30,6 +31,8 @@ __all__ = ('ClientRequest', 'ClientResponse')
 
 PY_35 = sys.version_info >= (3, 5)
 
+FILE_CHUNK_SIZE = 256 * 1024
+
 
 class ClientRequest:
 
@@ -401,10 +404,7 @@ class ClientRequest:
                         break
 
             elif isinstance(self.body, io.IOBase):
-                chunk = self.body.read(self.chunked)
-                while chunk:
-                    request.write(chunk)
-                    chunk = self.body.read(self.chunked)
+                yield from self._write_file(request, conn)
             else:
                 if isinstance(self.body, (bytes, bytearray)):
                     self.body = (self.body,)
@@ -435,6 +435,102 @@ class ClientRequest:
 
         self._writer = None
 
+    @asyncio.coroutine
+    def _write_file(self, request, conn):
+        """Write file body without blocking the loop.
+
+        Regular files of known length go to plain sockets by
+        os.sendfile(), other files are read in executor.
+        """
+        fobj = self.body
+        count = request.length
+        if (count and not request.chunked and not self.compress and
+                hasattr(os, 'sendfile') and
+                not os.environ.get('AIOHTTP_NOSENDFILE')):
+            transport = conn.writer.transport
+            sock = transport.get_extra_info('socket')
+            if (sock is not None and
+                    not transport.get_extra_info('sslcontext')):
+                try:
+                    in_fd = fobj.fileno()
+                    regular = stat.S_ISREG(os.fstat(in_fd).st_mode)
+                except (AttributeError, OSError, ValueError):
+                    regular = False
+                if regular:
+                    yield from self._sendfile(request, conn, sock,
+                                              in_fd, count)
+                    return
+
+        if isinstance(fobj, io.BytesIO):
+            read = fobj.read
+        else:
+            def read(size):
+                return self.loop.run_in_executor(None, fobj.read, size)
+
+        chunk_size = self.chunked or FILE_CHUNK_SIZE
+        while count is None or count > 0:
+            chunk = read(chunk_size if count is None else
+                         min(chunk_size, count))
+            if not isinstance(chunk, bytes):
+                chunk = yield from chunk
+            if not chunk:
+                break
+            if count is not None:
+                count -= len(chunk)
+            request.write(chunk, drain=False)
+            yield from request.drain()
+
+    @asyncio.coroutine
+    def _sendfile(self, request, conn, sock, in_fd, count):
+        # headers and data written before have to reach the socket
+        # first, wait until transport's buffer is empty
+        yield from request.drain()
+        transport = conn.writer.transport
+        if transport.get_write_buffer_size():
+            low, high = transport.get_write_buffer_limits()
+            transport.set_write_buffer_limits(0)
+            try:
+                yield from conn.writer.drain()
+            finally:
+                transport.set_write_buffer_limits(high, low)
+
+        loop = self.loop
+        fobj = self.body
+        offset = fobj.tell()
+        # transport keeps own registration of socket's fd
+        out_sock = sock.dup()
+        out_sock.setblocking(False)
+        out_fd = out_sock.fileno()
+        sent = 0
+
+        def on_writable():
+            if not waiter.done():
+                waiter.set_result(None)
+
+        try:
+            while sent < count:
+                try:
+                    n = os.sendfile(out_fd, in_fd, offset + sent,
+                                    count - sent)
+                except (BlockingIOError, InterruptedError):
+                    # socket buffer is full
+                    waiter = helpers.create_future(loop)
+                    loop.add_writer(out_fd, on_writable)
+                    try:
+                        yield from waiter
+                    finally:
+                        loop.remove_writer(out_fd)
+                    continue
+                if n == 0:
+                    raise EOFError('file is shorter than Content-Length')
+                sent += n
+        finally:
+            out_sock.close()
+            fobj.seek(offset + sent)
+
+        request.length -= sent
+        request.output_length += sent
+
     def send(self, conn):
         # Specify request target:
         # - CONNECT request must send authority form URI
@@ -603,16 +699,19 @@ class ClientResponse(HeadersMixin):
             read_until_eof=read_until_eof)
 
         with self._timer:
-            while True:
-                # read response
-                (message, payload) = yield from self._protocol.read()
-                if (message.code < 100 or
-                        message.code > 199 or message.code == 101):
-                    break
-
-                if self._continue is not None and not self._continue.done():
-                    self._continue.set_result(True)
-                    self._continue = None
+            # responses to pipelined requests come in request order
+            with (yield from self._protocol.read_lock):
+                while True:
+                    # read response
+                    (message, payload) = yield from self._protocol.read()
+                    if (message.code < 100 or
+                            message.code > 199 or message.code == 101):
+                        break
+
+                    if (self._continue is not None and
+                            not self._continue.done()):
+                        self._continue.set_result(True)
+                        self._continue = None
 
         # response status
         self.version = message.version
@@ -4,21 +4,26 @@ import asyncio
 import json
 import sys
 
-from ._ws_impl import (CLOSED_MESSAGE, CLOSING_MESSAGE,
-                       WebSocketError, WSMessage, WSMsgType)
+from ._ws_impl import (CLOSED_MESSAGE, CLOSING_MESSAGE, WebSocketError,
+                       WSCloseCode, WSMessage, WSMsgType)
 from .errors import ServerDisconnectedError
 from .helpers import create_future
+from .streams import EofStream
 
 PY_35 = sys.version_info >= (3, 5)
 PY_352 = sys.version_info >= (3, 5, 2)
 
+if PY_35:
+    from .streams import AsyncStreamIterator
+
 
 class ClientWebSocketResponse:
 
     def __init__(self, reader, writer, protocol,
                  response, timeout, autoclose, autoping, loop, *,
                  time_service=None,
-                 receive_timeout=None, heartbeat=None):
+                 receive_timeout=None, heartbeat=None,
+                 high_water=None, low_water=None, overflow='wait'):
         self._response = response
         self._conn = response.connection
 
@@ -40,6 +45,11 @@ class ClientWebSocketResponse:
         self._waiting = None
         self._exception = None
 
+        if high_water is not None:
+            writer.set_write_buffer_limits(
+                high_water, low_water, overflow,
+                on_overflow=self._close_overflowed, loop=loop)
+
         self._reset_heartbeat()
 
     def _cancel_heartbeat(self):
@@ -73,6 +83,14 @@ class ClientWebSocketResponse:
         self._exception = asyncio.TimeoutError()
         self._response.close()
 
+    def _close_overflowed(self):
+        # server does not read messages fast enough
+        self._cancel_heartbeat()
+        self._closed = True
+        self._close_code = WSCloseCode.TRY_AGAIN_LATER
+        self._writer.close(WSCloseCode.TRY_AGAIN_LATER)
+        self._response.close()
+
     @property
     def closed(self):
         return self._closed
@@ -85,6 +103,10 @@ class ClientWebSocketResponse:
     def protocol(self):
         return self._protocol
 
+    @property
+    def dropped_frames(self):
+        return self._writer.dropped
+
     def exception(self):
         return self._exception
 
@@ -235,6 +257,45 @@ class ClientWebSocketResponse:
         data = yield from self.receive_str(timeout=timeout)
         return loads(data)
 
+    @asyncio.coroutine
+    def receive_many(self, max_messages=64, timeout=None):
+        """Receive up to max_messages messages.
+
+        Waits for the first message like receive(), messages already
+        received are taken from the queue at once.  Returns a list of
+        messages, closing or error message is the last one.
+        """
+        if max_messages < 1:
+            raise ValueError('max_messages should be positive, got {!r}'
+                             .format(max_messages))
+
+        msg = yield from self.receive(timeout)
+        batch = [msg]
+        if msg.type in (WSMsgType.CLOSE, WSMsgType.CLOSING,
+                        WSMsgType.CLOSED, WSMsgType.ERROR):
+            return batch
+
+        for msg in self._reader.read_nowait(max_messages - 1):
+            if msg.type == WSMsgType.CLOSE:
+                self._closing = True
+                self._close_code = msg.data
+                batch.append(msg)
+                if not self._closed and self._autoclose:
+                    yield from self.close()
+                break
+            elif msg.type == WSMsgType.CLOSING:
+                self._closing = True
+                batch.append(msg)
+                break
+            elif msg.type == WSMsgType.PING and self._autoping:
+                self.pong(msg.data)
+            elif msg.type == WSMsgType.PONG and self._autoping:
+                pass
+            else:
+                batch.append(msg)
+
+        return batch
+
     if PY_35:
         def __aiter__(self):
             return self
@@ -250,3 +311,22 @@ class ClientWebSocketResponse:
                             WSMsgType.CLOSED):
                 raise StopAsyncIteration  # NOQA
             return msg
+
+        @asyncio.coroutine
+        def _receive_batch(self, max_messages):
+            batch = yield from self.receive_many(max_messages)
+            if batch[-1].type in (WSMsgType.CLOSE,
+                                  WSMsgType.CLOSING,
+                                  WSMsgType.CLOSED):
+                batch.pop()
+            if not batch:
+                raise EofStream
+            return batch
+
+        def iter_batches(self, max_messages=64):
+            """Returns an asynchronous iterator over lists of messages.
+
+            See receive_many(), iteration stops when websocket is closing.
+            """
+            return AsyncStreamIterator(
+                lambda: self._receive_batch(max_messages))
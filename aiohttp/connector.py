@@ -1,18 +1,25 @@
 import asyncio
+import collections
 import functools
+import itertools
+import random
 import ssl
 import sys
 import traceback
 import warnings
+import weakref
 from hashlib import md5, sha1, sha256
 from types import MappingProxyType
 
+from yarl import URL
+
 from . import hdrs, helpers
 from .client import ClientRequest
 from .client_proto import HttpClientProtocol
 from .errors import (ClientOSError, ClientTimeoutError, FingerprintMismatch,
                      HttpProxyError, ProxyConnectionError)
 from .helpers import SimpleCookie, is_ip_address, sentinel
+from .protocol import HttpVersion11
 from .resolver import DefaultResolver
 
 __all__ = ('BaseConnector', 'TCPConnector', 'UnixConnector')
@@ -29,7 +36,8 @@ class Connection:
     _source_traceback = None
     _transport = None
 
-    def __init__(self, connector, key, request, transport, protocol, loop):
+    def __init__(self, connector, key, request, transport, protocol, loop,
+                 *, pipelined=False):
         self._key = key
         self._connector = connector
         self._request = request
@@ -38,6 +46,7 @@ class Connection:
         self._loop = loop
         self.protocol = protocol
         self.writer = protocol.writer
+        self._pipelined = pipelined
 
         if loop.get_debug():
             self._source_traceback = traceback.extract_stack(sys._getframe(1))
@@ -67,6 +76,15 @@ class Connection:
     def loop(self):
         return self._loop
 
+    @property
+    def pipelined(self):
+        """True if the request was sent after other ones being processed.
+
+        Such a request is lost if the connection is closed on an
+        earlier response.
+        """
+        return self._pipelined
+
     def close(self):
         if self._transport is not None:
             self._connector._release(
@@ -83,7 +101,7 @@ class Connection:
 
     def detach(self):
         if self._transport is not None:
-            self._connector._release_acquired(self._transport)
+            self._connector._release_acquired(self._key, self._transport)
         self._transport = None
 
     @property
@@ -98,6 +116,17 @@ class _TransportPlaceholder:
         pass
 
 
+class _Pipeline:
+    """Requests sharing one acquired connection."""
+
+    __slots__ = ('protocol', 'requests', 'closing')
+
+    def __init__(self, protocol):
+        self.protocol = protocol
+        self.requests = 1
+        self.closing = False
+
+
 class BaseConnector(object):
     """Base connector class.
 
@@ -106,6 +135,12 @@ class BaseConnector(object):
     force_close - Set to True to force close and do reconnect
         after each request (and between redirects).
     capacity - The total number of simultaneous connections.
+    limit_per_host - The number of simultaneous connections to one host.
+    min_idle_per_host - The number of idle connections to keep open to
+        every host connected to within keepalive_timeout.
+    pipeline_depth - The number of GET and HEAD requests sent over one
+        connection without waiting for responses when connection limits
+        are reached, 1 disables pipelining.
     disable_cleanup_closed - Disable clean-up closed ssl transports.
     loop - Optional event loop.
     """
@@ -116,8 +151,12 @@ class BaseConnector(object):
     # abort transport after 2 seconds (cleanup broken connections)
     _cleanup_closed_period = 2.0
 
+    # max number of expired connections closed per loop iteration
+    _cleanup_batch_size = 256
+
     def __init__(self, *, conn_timeout=None, keepalive_timeout=sentinel,
                  force_close=False, capacity=20, limit=sentinel,
+                 limit_per_host=0, min_idle_per_host=0, pipeline_depth=1,
                  time_service=None, disable_cleanup_closed=False, loop=None):
 
         if limit is not sentinel:
@@ -137,6 +176,17 @@ class BaseConnector(object):
             if keepalive_timeout is sentinel:
                 keepalive_timeout = 15.0
 
+        if min_idle_per_host and (force_close or keepalive_timeout is None):
+            raise ValueError('min_idle_per_host requires '
+                             'keep-alive connections')
+
+        if pipeline_depth < 1:
+            raise ValueError('pipeline_depth should be positive, '
+                             'got {!r}'.format(pipeline_depth))
+        if pipeline_depth > 1 and force_close:
+            raise ValueError('pipeline_depth requires '
+                             'keep-alive connections')
+
         if loop is None:
             loop = asyncio.get_event_loop()
 
@@ -144,13 +194,37 @@ class BaseConnector(object):
         if loop.get_debug():
             self._source_traceback = traceback.extract_stack(sys._getframe(1))
 
+        # key -> deque of idle (transport, protocol, release time),
+        # the most recently released last
         self._conns = {}
+        # (key, idle entry) in release order, entries taken from
+        # _conns are skipped on expiration
+        self._idle_expiry = collections.deque()
+        # number of _idle_expiry records already taken from _conns
+        self._idle_stale = 0
         self._capacity = capacity
+        self._limit_per_host = limit_per_host or 0
         self._acquired = set()
+        # key -> acquired transports
+        self._acquired_per_host = {}
         self._conn_timeout = conn_timeout
         self._keepalive_timeout = keepalive_timeout
         self._force_close = force_close
-        self._waiters = []
+        # key -> FIFO of waiters, keys are rotated for fairness
+        self._waiters = collections.OrderedDict()
+        self._min_idle_per_host = min_idle_per_host
+        # key -> url to open idle connections for
+        self._warm_urls = {}
+        # key -> time of the last request for endpoints added by
+        # connect(), they are forgotten after keepalive_timeout of
+        # no use, endpoints added by prewarm() are kept
+        self._warm_used = {}
+        # key -> task opening idle connections
+        self._warming = {}
+        self._pipeline_depth = pipeline_depth
+        # key -> {transport: _Pipeline} of acquired connections
+        # requests can be pipelined to
+        self._pipelines = {}
 
         if time_service is not None:
             self._time_service_owner = False
@@ -218,6 +292,28 @@ class BaseConnector(object):
         """
         return self._capacity
 
+    @property
+    def limit_per_host(self):
+        """The number of simultaneous connections to the same endpoint.
+
+        Endpoints are the same if they are have equal (host, port, is_ssl)
+        triple.  0 means no limit.
+        """
+        return self._limit_per_host
+
+    @property
+    def min_idle_per_host(self):
+        """The number of idle connections kept open to every host."""
+        return self._min_idle_per_host
+
+    @property
+    def pipeline_depth(self):
+        """The number of requests sent over one connection at once.
+
+        1 means no pipelining.
+        """
+        return self._pipeline_depth
+
     @property
     def limit(self):
         """The total number for simultaneous connections.
@@ -229,36 +325,133 @@ class BaseConnector(object):
         return self._capacity
 
     def _cleanup(self):
-        """Cleanup unused transports."""
+        """Close idle transports with expired keep-alive.
+
+        Release times only grow, so expired connections are at the
+        head of _idle_expiry.  At most _cleanup_batch_size of them are
+        closed per call, the rest on next loop iterations.
+        """
         if self._cleanup_handle:
             self._cleanup_handle.cancel()
 
-        now = self._time_service.loop_time()
+        expiry = self._idle_expiry
+        if expiry:
+            deadline = (self._time_service.loop_time() -
+                        self._keepalive_timeout)
+            batch = self._cleanup_batch_size
+            while expiry and expiry[0][1][2] - deadline < 0:
+                if not batch:
+                    self._cleanup_handle = self._loop.call_soon(
+                        self._cleanup)
+                    return
+                batch -= 1
+                key, entry = expiry.popleft()
+                conns = self._conns.get(key)
+                if not conns or conns[0] is not entry:
+                    # already taken by _get()
+                    self._idle_stale -= 1
+                    continue
+                conns.popleft()
+                if not conns:
+                    del self._conns[key]
+                transport, proto, use_time = entry
+                if transport is not None and proto.is_connected():
+                    transport.close()
+                    if key[-1] and not self._cleanup_closed_disabled:
+                        self._cleanup_closed_transports.append(transport)
 
-        if self._conns:
-            connections = {}
-            deadline = now - self._keepalive_timeout
-            for key, conns in self._conns.items():
-                alive = []
-                for transport, proto, use_time in conns:
-                    if transport is not None:
-                        if proto.is_connected():
-                            if use_time - deadline < 0:
-                                transport.close()
-                                if (key[-1] and
-                                        not self._cleanup_closed_disabled):
-                                    self._cleanup_closed_transports.append(
-                                        transport)
-                            else:
-                                alive.append((transport, proto, use_time))
-
-                if alive:
-                    connections[key] = alive
-
-            self._conns = connections
+        if self._min_idle_per_host:
+            self._top_up_idle()
 
+        delay = self._keepalive_timeout / 2.0
+        if expiry:
+            # wake up when the oldest idle connection expires
+            delay = min(delay, expiry[0][1][2] - deadline)
         self._cleanup_handle = self._time_service.call_later(
-            self._keepalive_timeout / 2.0, self._cleanup)
+            delay, self._cleanup)
+
+    def _top_up_idle(self):
+        """Open idle connections in background up to min_idle_per_host."""
+        now = self._time_service.loop_time()
+        for key, url in list(self._warm_urls.items()):
+            used = self._warm_used.get(key)
+            if used is not None and now - used > self._keepalive_timeout:
+                del self._warm_urls[key]
+                del self._warm_used[key]
+                continue
+            if key in self._warming:
+                continue
+            if len(self._conns.get(key, ())) >= self._min_idle_per_host:
+                continue
+            if self._available_connections(key) <= 0:
+                continue
+            req = ClientRequest('GET', url, loop=self._loop)
+            task = helpers.ensure_future(
+                self._prewarm(key, req, self._min_idle_per_host),
+                loop=self._loop)
+            self._warming[key] = task
+            task.add_done_callback(functools.partial(self._on_warmed, key))
+
+    def _on_warmed(self, key, task):
+        self._warming.pop(key, None)
+        if not task.cancelled():
+            # failures are not fatal, next _cleanup() retries
+            task.exception()
+
+    @asyncio.coroutine
+    def prewarm(self, url, count=1):
+        """Open connections to url until count of them are idle in pool.
+
+        New connections are not opened beyond capacity and
+        limit_per_host.  Return number of opened connections.
+        """
+        req = ClientRequest('GET', URL(url), loop=self._loop)
+        key = (req.host, req.port, req.ssl)
+        if self._min_idle_per_host:
+            self._warm_urls[key] = req.url
+            self._warm_used.pop(key, None)
+        return (yield from self._prewarm(key, req, count))
+
+    @asyncio.coroutine
+    def _prewarm(self, key, req, count):
+        placeholders = []
+        for _ in range(count - len(self._conns.get(key, ()))):
+            if self._available_connections(key) <= 0:
+                break
+            placeholder = _TransportPlaceholder()
+            self._acquire(key, placeholder)
+            placeholders.append(placeholder)
+        if not placeholders:
+            return 0
+
+        try:
+            results = yield from asyncio.gather(
+                *[self._new_connection(key, req) for _ in placeholders],
+                loop=self._loop, return_exceptions=True)
+        except BaseException:
+            for placeholder in placeholders:
+                self._release_acquired(key, placeholder)
+            raise
+
+        opened = 0
+        exc = None
+        for res in results:
+            if isinstance(res, BaseException):
+                if exc is None:
+                    exc = res
+            elif self._closed:
+                res[0].close()
+            else:
+                self._put_idle(key, res[0], res[1])
+                opened += 1
+
+        # connections are in pool, let waiters use them
+        for placeholder in placeholders:
+            self._release_acquired(key, placeholder)
+
+        if exc is not None:
+            raise exc
+        return opened
 
     def _cleanup_closed(self):
         """Double confirmation for transport close.
@@ -309,10 +502,20 @@ class BaseConnector(object):
             for transport in self._cleanup_closed_transports:
                 transport.abort()
 
+            for task in self._warming.values():
+                task.cancel()
+
         finally:
             self._conns.clear()
+            self._idle_expiry.clear()
+            self._idle_stale = 0
             self._acquired.clear()
+            self._acquired_per_host.clear()
             self._waiters.clear()
+            self._warm_urls.clear()
+            self._warm_used.clear()
+            self._warming.clear()
+            self._pipelines.clear()
             self._cleanup_handle = None
             self._cleanup_closed_transports.clear()
             self._cleanup_closed_handle = None
@@ -327,46 +530,146 @@ class BaseConnector(object):
         """
         return self._closed
 
-    @asyncio.coroutine
-    def connect(self, req):
-        """Get from pool or create new connection."""
+    def _available_connections(self, key):
+        """Number of connections that can be acquired for key.
+
+        Positive number if there are no limits.
+        """
+        available = 1
         if self._capacity:
-            # The capacity defines the maximum number of concurrent connections
-            available = (self._capacity -
-                         len(self._waiters) - len(self._acquired))
+            available = self._capacity - len(self._acquired)
+        if self._limit_per_host and available > 0:
+            acquired = self._acquired_per_host.get(key)
+            if acquired is not None:
+                available = self._limit_per_host - len(acquired)
+        return available
 
-            # Wait if there are not available connections.
-            if available <= 0:
-                fut = helpers.create_future(self._loop)
+    def _acquire(self, key, transport):
+        self._acquired.add(transport)
+        acquired = self._acquired_per_host.get(key)
+        if acquired is None:
+            acquired = self._acquired_per_host[key] = set()
+        acquired.add(transport)
+
+    def _replace_acquired(self, key, old, new):
+        self._acquired.discard(old)
+        acquired = self._acquired_per_host.get(key)
+        if acquired is not None:
+            acquired.discard(old)
+        self._acquire(key, new)
 
-                # This connection will now count towards the limit.
-                self._waiters.append(fut)
-                yield from fut
-                self._waiters.remove(fut)
+    @asyncio.coroutine
+    def connect(self, req, *, pipeline=True):
+        """Get from pool or create new connection.
 
+        If connection limits are reached and pipeline_depth allows,
+        GET and HEAD requests are pipelined to connections busy with
+        other requests, pipeline=False disables it for req.
+        """
         key = (req.host, req.port, req.ssl)
+        pipeline = (pipeline and self._pipeline_depth > 1 and
+                    self._can_pipeline(req))
+
+        if self._available_connections(key) <= 0:
+            if pipeline:
+                conn = self._join_pipeline(key, req)
+                if conn is not None:
+                    return conn
+
+            # Wait until _release_waiters() reserves a slot
+            # for this connection.
+            fut = helpers.create_future(self._loop)
+            waiters = self._waiters.get(key)
+            if waiters is None:
+                waiters = self._waiters[key] = collections.deque()
+            waiters.append(fut)
+            try:
+                placeholder = yield from fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    # reserved slot goes to the next waiter
+                    self._release_acquired(key, fut.result())
+                else:
+                    try:
+                        waiters.remove(fut)
+                    except ValueError:  # pragma: no cover
+                        pass
+                    if not waiters and self._waiters.get(key) is waiters:
+                        del self._waiters[key]
+                raise
+        else:
+            placeholder = _TransportPlaceholder()
+            self._acquire(key, placeholder)
+
+        if self._min_idle_per_host and not getattr(req, 'proxy', None):
+            if key not in self._warm_urls:
+                self._warm_urls[key] = req.url
+                self._warm_used[key] = self._time_service.loop_time()
+            elif key in self._warm_used:
+                self._warm_used[key] = self._time_service.loop_time()
+
         transport, proto = self._get(key)
         if transport is None:
-            placeholder = _TransportPlaceholder()
-            self._acquired.add(placeholder)
             try:
-                with self._time_service.timeout(self._conn_timeout):
-                    transport, proto = yield from self._create_connection(req)
-            except asyncio.TimeoutError as exc:
-                raise ClientTimeoutError(
-                    'Connection timeout to host {0[0]}:{0[1]} ssl:{0[2]}'
-                    .format(key)) from exc
-            except OSError as exc:
-                raise ClientOSError(
-                    exc.errno,
-                    'Cannot connect to host {0[0]}:{0[1]} ssl:{0[2]} [{1}]'
-                    .format(key, exc.strerror)) from exc
+                transport, proto = yield from self._new_connection(key, req)
             finally:
-                self._acquired.remove(placeholder)
-
-        self._acquired.add(transport)
+                if transport is None:
+                    self._release_acquired(key, placeholder)
+
+        self._replace_acquired(key, placeholder, transport)
+        if pipeline:
+            pipelines = self._pipelines.get(key)
+            if pipelines is None:
+                pipelines = self._pipelines[key] = {}
+            pipelines[transport] = _Pipeline(proto)
         return Connection(self, key, req, transport, proto, self._loop)
 
+    @staticmethod
+    def _can_pipeline(req):
+        """Can req be sent before responses to previous requests?"""
+        return (req.method in (hdrs.METH_GET, hdrs.METH_HEAD) and
+                not req.body and not req.proxy and
+                req._continue is None and
+                req.version >= HttpVersion11 and
+                hdrs.UPGRADE not in req.headers)
+
+    def _join_pipeline(self, key, req):
+        """Share the least loaded pipelined connection with req."""
+        pipelines = self._pipelines.get(key)
+        if not pipelines:
+            return None
+
+        best = None
+        for transport, pipeline in pipelines.items():
+            if (pipeline.closing or
+                    pipeline.requests >= self._pipeline_depth or
+                    not pipeline.protocol.is_connected()):
+                continue
+            if best is None or pipeline.requests < best[1].requests:
+                best = transport, pipeline
+        if best is None:
+            return None
+
+        transport, pipeline = best
+        pipeline.requests += 1
+        return Connection(self, key, req, transport, pipeline.protocol,
+                          self._loop, pipelined=True)
+
+    @asyncio.coroutine
+    def _new_connection(self, key, req):
+        try:
+            with self._time_service.timeout(self._conn_timeout):
+                return (yield from self._create_connection(req))
+        except asyncio.TimeoutError as exc:
+            raise ClientTimeoutError(
+                'Connection timeout to host {0[0]}:{0[1]} ssl:{0[2]}'
+                .format(key)) from exc
+        except OSError as exc:
+            raise ClientOSError(
+                exc.errno,
+                'Cannot connect to host {0[0]}:{0[1]} ssl:{0[2]} [{1}]'
+                .format(key, exc.strerror)) from exc
+
     def _get(self, key):
         try:
             conns = self._conns[key]
@@ -376,6 +679,7 @@ class BaseConnector(object):
         t1 = self._time_service.loop_time()
         while conns:
             transport, proto, t0 = conns.pop()
+            self._idle_stale += 1
             if transport is not None and proto.is_connected():
                 if t1 - t0 > self._keepalive_timeout:
                     transport.close()
@@ -392,14 +696,35 @@ class BaseConnector(object):
         return None, None
 
     def _release_waiters(self):
-        if self._capacity > 0:
-            available = self._capacity - len(self._acquired)
-            if available > 0:
-                for waiter in self._waiters[:available]:
-                    if not waiter.done():
-                        waiter.set_result(None)
+        """Pass a free connection slot to one waiter.
+
+        Waiters of the same key are woken in FIFO order, keys take
+        turns.  Keys at limit_per_host are skipped.
+        """
+        for key in list(self._waiters):
+            if self._available_connections(key) <= 0:
+                continue
+
+            waiters = self._waiters[key]
+            while waiters:
+                fut = waiters.popleft()
+                if not fut.done():
+                    placeholder = _TransportPlaceholder()
+                    self._acquire(key, placeholder)
+                    fut.set_result(placeholder)
+                    break
+            else:
+                # all waiters were cancelled
+                del self._waiters[key]
+                continue
+
+            if waiters:
+                self._waiters.move_to_end(key)
+            else:
+                del self._waiters[key]
+            return
 
-    def _release_acquired(self, transport):
+    def _release_acquired(self, key, transport):
         if self._closed:
             # acquired connection is already released on connector closing
             return
@@ -411,6 +736,11 @@ class BaseConnector(object):
             # finalization due garbage collection.
             pass
         else:
+            acquired = self._acquired_per_host.get(key)
+            if acquired is not None:
+                acquired.discard(transport)
+                if not acquired:
+                    del self._acquired_per_host[key]
             self._release_waiters()
 
     def _release(self, key, req, transport, protocol, *, should_close=False):
@@ -418,8 +748,6 @@ class BaseConnector(object):
             # acquired connection is already released on connector closing
             return
 
-        self._release_acquired(transport)
-
         resp = req.response
 
         if not should_close:
@@ -428,18 +756,58 @@ class BaseConnector(object):
             elif resp is not None:
                 should_close = resp._should_close
 
+        pipelines = self._pipelines.get(key)
+        if pipelines is not None and transport in pipelines:
+            pipeline = pipelines[transport]
+            pipeline.requests -= 1
+            if pipeline.closing:
+                # transport is closed already
+                should_close = False
+            elif should_close:
+                pipeline.closing = True
+            if pipeline.requests:
+                # responses to later requests can't come after closing
+                if should_close:
+                    transport.close()
+                    if key[-1] and not self._cleanup_closed_disabled:
+                        self._cleanup_closed_transports.append(transport)
+                return
+            del pipelines[transport]
+            if not pipelines:
+                del self._pipelines[key]
+            if pipeline.closing and not should_close:
+                self._release_acquired(key, transport)
+                return
+
+        self._release_acquired(key, transport)
+
         if should_close or protocol.should_close:
             transport.close()
 
             if key[-1] and not self._cleanup_closed_disabled:
                 self._cleanup_closed_transports.append(transport)
         else:
-            conns = self._conns.get(key)
-            if conns is None:
-                conns = self._conns[key] = []
-            conns.append((transport, protocol, self._time_service.loop_time()))
+            self._put_idle(key, transport, protocol)
             # reader.unset_parser()
 
+    def _put_idle(self, key, transport, protocol):
+        entry = (transport, protocol, self._time_service.loop_time())
+        conns = self._conns.get(key)
+        if conns is None:
+            conns = self._conns[key] = collections.deque()
+        conns.append(entry)
+        expiry = self._idle_expiry
+        expiry.append((key, entry))
+
+        # drop records of taken connections when they outnumber idle
+        # ones, keeps _idle_expiry proportional to the pool size
+        if self._idle_stale * 2 > len(expiry):
+            idle = {id(entry) for conns in self._conns.values()
+                    for entry in conns}
+            self._idle_expiry = collections.deque(
+                item for item in expiry if id(item[1]) in idle)
+            self._idle_stale = 0
+
     @asyncio.coroutine
     def _create_connection(self, req):
         raise NotImplementedError()
@@ -448,6 +816,44 @@ class BaseConnector(object):
 _SSL_OP_NO_COMPRESSION = getattr(ssl, "OP_NO_COMPRESSION", 0)
 
 
+ADDRESS_SELECTIONS = ('first', 'round_robin', 'random', 'least_connections')
+# max number of round robin counters if DNS cache size is not limited
+ROUND_ROBIN_COUNTERS_SIZE = 1024
+
+
+class _SessionContext:
+    """SSLContext passing a session to resume to new connections."""
+
+    def __init__(self, context, session):
+        self._context = context
+        self._session = session
+
+    def wrap_bio(self, incoming, outgoing, server_side=False,
+                 server_hostname=None, session=None):
+        return self._context.wrap_bio(
+            incoming, outgoing, server_side=server_side,
+            server_hostname=server_hostname, session=self._session)
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+
+def _interleave_families(hosts):
+    """Alternate address families of resolved hosts (RFC 8305).
+
+    Hosts of the same family keep their order, the family of the first
+    host goes first.
+    """
+    by_family = collections.OrderedDict()
+    for hinfo in hosts:
+        by_family.setdefault(hinfo['family'], []).append(hinfo)
+    if len(by_family) < 2:
+        return hosts
+    return [hinfo
+            for group in itertools.zip_longest(*by_family.values())
+            for hinfo in group if hinfo is not None]
+
+
 class TCPConnector(BaseConnector):
     """TCP connector.
 
@@ -461,6 +867,16 @@ class TCPConnector(BaseConnector):
     resolver - Enable DNS lookups and use this
         resolver
     use_dns_cache - Use memory cache for DNS lookups.
+    ttl_dns_cache - Max seconds having cached a DNS entry, None forever.
+    dns_cache_size - Max number of cached DNS entries, None for no limit.
+    happy_eyeballs_delay - Seconds to wait for a connection attempt
+        before starting the next one in parallel, None to try resolved
+        addresses one by one.
+    address_selection - Order to try resolved addresses of a host in:
+        'first' (as resolved), 'round_robin', 'random' or
+        'least_connections'.
+    ssl_session_cache_size - Max number of TLS sessions kept for
+        resumption, 0 to disable.
     family - socket address family
     local_addr - local tuple of (host, port) to bind socket to
 
@@ -469,19 +885,37 @@ class TCPConnector(BaseConnector):
     force_close - Set to True to force close and do reconnect
         after each request (and between redirects).
     capacity - The total number of simultaneous connections.
+    limit_per_host - The number of simultaneous connections to one host.
+    min_idle_per_host - The number of idle connections to keep open to
+        every host connected to within keepalive_timeout.
+    pipeline_depth - The number of GET and HEAD requests sent over one
+        connection without waiting for responses when connection limits
+        are reached, 1 disables pipelining.
     loop - Optional event loop.
     """
 
+    # start refreshing a DNS entry in background after this part of
+    # ttl_dns_cache
+    _dns_refresh_ratio = 0.75
+
     def __init__(self, *, verify_ssl=True, fingerprint=None,
                  resolve=sentinel, use_dns_cache=True,
+                 ttl_dns_cache=None, dns_cache_size=1024,
+                 happy_eyeballs_delay=None, address_selection='first',
+                 ssl_session_cache_size=256,
                  family=0, ssl_context=None, local_addr=None,
                  resolver=None, time_service=None,
                  conn_timeout=None, keepalive_timeout=sentinel,
-                 force_close=False, capacity=20, limit=sentinel, loop=None):
+                 force_close=False, capacity=20, limit=sentinel,
+                 limit_per_host=0, min_idle_per_host=0, pipeline_depth=1,
+                 loop=None):
         super().__init__(time_service=time_service, conn_timeout=conn_timeout,
                          keepalive_timeout=keepalive_timeout,
                          force_close=force_close,
-                         capacity=capacity, limit=limit, loop=loop)
+                         capacity=capacity, limit=limit,
+                         limit_per_host=limit_per_host,
+                         min_idle_per_host=min_idle_per_host,
+                         pipeline_depth=pipeline_depth, loop=loop)
 
         if not verify_ssl and ssl_context is not None:
             raise ValueError(
@@ -508,10 +942,40 @@ class TCPConnector(BaseConnector):
         self._resolver = resolver
 
         self._use_dns_cache = use_dns_cache
-        self._cached_hosts = {}
+        self._ttl_dns_cache = ttl_dns_cache
+        self._dns_cache_size = dns_cache_size
+        # (host, port) -> hosts in least recently used order
+        self._cached_hosts = collections.OrderedDict()
+        self._cached_hosts_timestamps = {}
+        # (host, port) -> task resolving it
+        self._resolving_hosts = {}
         self._ssl_context = ssl_context
         self._family = family
         self._local_addr = local_addr
+        self._happy_eyeballs_delay = happy_eyeballs_delay
+
+        if address_selection not in ADDRESS_SELECTIONS:
+            raise ValueError(
+                'address_selection should be one of {}, got {!r}'.format(
+                    ', '.join(ADDRESS_SELECTIONS), address_selection))
+        self._address_selection = address_selection
+        # (host, port) -> number of connections made, in least recently
+        # used order, evicted with DNS cache entries
+        self._round_robin_counters = collections.OrderedDict()
+        # transport -> address it is connected to
+        self._transport_addresses = weakref.WeakKeyDictionary()
+        # address -> number of connection attempts in progress
+        self._connecting_addresses = collections.Counter()
+
+        # (host, port) -> ssl.SSLSession in least recently used order,
+        # resumption requires Python 3.6+
+        if ssl_session_cache_size and hasattr(ssl, 'SSLSession'):
+            self._ssl_sessions = collections.OrderedDict()
+        else:
+            self._ssl_sessions = None
+        self._ssl_session_cache_size = ssl_session_cache_size
+        self._ssl_session_hits = 0
+        self._ssl_session_misses = 0
 
     @property
     def verify_ssl(self):
@@ -546,11 +1010,49 @@ class TCPConnector(BaseConnector):
         """Socket family like AF_INET."""
         return self._family
 
+    @property
+    def ssl_session_cache_size(self):
+        """Max number of TLS sessions kept for resumption."""
+        return self._ssl_session_cache_size
+
+    @property
+    def ssl_session_hits(self):
+        """Number of TLS connections established by resuming a session."""
+        return self._ssl_session_hits
+
+    @property
+    def ssl_session_misses(self):
+        """Number of TLS connections established by full handshake."""
+        return self._ssl_session_misses
+
+    @property
+    def happy_eyeballs_delay(self):
+        """Delay between parallel connection attempts.
+
+        None if addresses are tried one by one.
+        """
+        return self._happy_eyeballs_delay
+
+    @property
+    def address_selection(self):
+        """Policy of choosing an address among resolved ones."""
+        return self._address_selection
+
     @property
     def use_dns_cache(self):
         """True if local DNS caching is enabled."""
         return self._use_dns_cache
 
+    @property
+    def ttl_dns_cache(self):
+        """Seconds a DNS entry is cached for, None if forever."""
+        return self._ttl_dns_cache
+
+    @property
+    def dns_cache_size(self):
+        """Max number of cached DNS entries, None if not limited."""
+        return self._dns_cache_size
+
     @property
     def cached_hosts(self):
         """Read-only dict of cached DNS record."""
@@ -558,13 +1060,28 @@ class TCPConnector(BaseConnector):
 
     def clear_dns_cache(self, host=None, port=None):
         """Remove specified host/port or clear all dns local cache."""
+        # lookups in progress are detached, they don't store results
         if host is not None and port is not None:
             self._cached_hosts.pop((host, port), None)
+            self._cached_hosts_timestamps.pop((host, port), None)
+            self._round_robin_counters.pop((host, port), None)
+            self._resolving_hosts.pop((host, port), None)
         elif host is not None or port is not None:
             raise ValueError("either both host and port "
                              "or none of them are allowed")
         else:
             self._cached_hosts.clear()
+            self._cached_hosts_timestamps.clear()
+            self._round_robin_counters.clear()
+            self._resolving_hosts.clear()
+
+    def close(self):
+        """Close all opened transports and cancel pending DNS lookups."""
+        if not self._closed and not self._loop.is_closed():
+            for task in self._resolving_hosts.values():
+                task.cancel()
+        self._resolving_hosts.clear()
+        return super().close()
 
     @asyncio.coroutine
     def _resolve_host(self, host, port):
@@ -572,19 +1089,75 @@ class TCPConnector(BaseConnector):
             return [{'hostname': host, 'host': host, 'port': port,
                      'family': self._family, 'proto': 0, 'flags': 0}]
 
-        if self._use_dns_cache:
-            key = (host, port)
-
-            if key not in self._cached_hosts:
-                self._cached_hosts[key] = yield from \
-                    self._resolver.resolve(host, port, family=self._family)
-
-            return self._cached_hosts[key]
-        else:
+        if not self._use_dns_cache:
             res = yield from self._resolver.resolve(
                 host, port, family=self._family)
             return res
 
+        key = (host, port)
+        hosts = self._cached_hosts.get(key)
+        if hosts is not None:
+            ttl = self._ttl_dns_cache
+            if ttl is None:
+                self._cached_hosts.move_to_end(key)
+                return hosts
+            age = (self._time_service.loop_time() -
+                   self._cached_hosts_timestamps[key])
+            if age < ttl:
+                self._cached_hosts.move_to_end(key)
+                if (age >= ttl * self._dns_refresh_ratio and
+                        key not in self._resolving_hosts):
+                    # refresh in background, keep serving the cached entry
+                    task = self._start_resolving(key)
+                    task.add_done_callback(self._on_refreshed)
+                return hosts
+
+        task = self._resolving_hosts.get(key)
+        if task is None:
+            task = self._start_resolving(key)
+        # don't cancel the lookup shared with other requests
+        res = yield from asyncio.shield(task, loop=self._loop)
+        return res
+
+    def _start_resolving(self, key):
+        task = helpers.ensure_future(
+            self._resolve_and_cache(key), loop=self._loop)
+        self._resolving_hosts[key] = task
+        return task
+
+    @asyncio.coroutine
+    def _resolve_and_cache(self, key):
+        host, port = key
+        task = asyncio.Task.current_task(loop=self._loop)
+        try:
+            hosts = yield from self._resolver.resolve(
+                host, port, family=self._family)
+        finally:
+            detached = self._resolving_hosts.get(key) is not task
+            if not detached:
+                del self._resolving_hosts[key]
+        if detached:
+            # clear_dns_cache() was called during the lookup
+            return hosts
+
+        cache = self._cached_hosts
+        cache[key] = hosts
+        cache.move_to_end(key)
+        self._cached_hosts_timestamps[key] = self._time_service.loop_time()
+        if self._dns_cache_size is not None:
+            while len(cache) > self._dns_cache_size:
+                old_key, _ = cache.popitem(last=False)
+                self._cached_hosts_timestamps.pop(old_key, None)
+                self._round_robin_counters.pop(old_key, None)
+        return hosts
+
+    @staticmethod
+    def _on_refreshed(task):
+        # background refresh failures are not fatal, the entry is
+        # resolved again once it expires
+        if not task.cancelled():
+            task.exception()
+
     @asyncio.coroutine
     def _create_connection(self, req):
         """Create connection.
@@ -606,41 +1179,177 @@ class TCPConnector(BaseConnector):
             sslcontext = None
 
         hosts = yield from self._resolve_host(req.host, req.port)
-        exc = None
+        if len(hosts) > 1 and self._address_selection != 'first':
+            hosts = self._select_addresses(req, hosts)
+
+        try:
+            if self._happy_eyeballs_delay is None:
+                return (yield from self._connect_sequential(
+                    hosts, sslcontext))
+            else:
+                return (yield from self._connect_staggered(
+                    _interleave_families(hosts), sslcontext))
+        except OSError as exc:
+            raise ClientOSError(exc.errno,
+                                'Can not connect to %s:%s [%s]' %
+                                (req.host, req.port, exc.strerror)) from exc
 
+    def _store_ssl_session(self, key, ssl_object):
+        session = ssl_object.session
+        if session is None:
+            return
+        sessions = self._ssl_sessions
+        sessions[key] = session
+        sessions.move_to_end(key)
+        while len(sessions) > self._ssl_session_cache_size:
+            sessions.popitem(last=False)
+
+    def _release(self, key, req, transport, protocol, *, should_close=False):
+        if key[-1] and self._ssl_sessions is not None:
+            # TLS 1.3 session tickets arrive after the handshake
+            ssl_object = transport.get_extra_info('ssl_object')
+            if ssl_object is not None:
+                self._store_ssl_session(key[:2], ssl_object)
+        super()._release(key, req, transport, protocol,
+                         should_close=should_close)
+
+    def _select_addresses(self, req, hosts):
+        """Reorder resolved hosts according to address_selection."""
+        selection = self._address_selection
+        if selection == 'round_robin':
+            key = (req.host, req.port)
+            counters = self._round_robin_counters
+            counter = counters.pop(key, 0)
+            counters[key] = counter + 1
+            # not cached hosts have counters too, bound them
+            while len(counters) > (self._dns_cache_size or
+                                   ROUND_ROBIN_COUNTERS_SIZE):
+                counters.popitem(last=False)
+            offset = counter % len(hosts)
+            return hosts[offset:] + hosts[:offset]
+        elif selection == 'random':
+            hosts = list(hosts)
+            random.shuffle(hosts)
+            return hosts
+        else:
+            # least_connections: open connections of the pool plus
+            # connection attempts in progress
+            load = collections.Counter()
+            key = (req.host, req.port, req.ssl)
+            addresses = self._transport_addresses
+            for transport, proto, t0 in self._conns.get(key, ()):
+                load[addresses.get(transport)] += 1
+            for transport in self._acquired_per_host.get(key, ()):
+                load[addresses.get(transport)] += 1
+            connecting = self._connecting_addresses
+            return sorted(
+                hosts,
+                key=lambda hinfo: (load[(hinfo['host'], hinfo['port'])] +
+                                   connecting[(hinfo['host'],
+                                               hinfo['port'])]))
+
+    @asyncio.coroutine
+    def _connect_sequential(self, hosts, sslcontext):
+        exc = None
         for hinfo in hosts:
             try:
-                host = hinfo['host']
-                port = hinfo['port']
-                transp, proto = yield from self._loop.create_connection(
-                    self._factory, host, port,
-                    ssl=sslcontext, family=hinfo['family'],
-                    proto=hinfo['proto'], flags=hinfo['flags'],
-                    server_hostname=hinfo['hostname'] if sslcontext else None,
-                    local_addr=self._local_addr)
-                has_cert = transp.get_extra_info('sslcontext')
-                if has_cert and self._fingerprint:
-                    sock = transp.get_extra_info('socket')
-                    if not hasattr(sock, 'getpeercert'):
-                        # Workaround for asyncio 3.5.0
-                        # Starting from 3.5.1 version
-                        # there is 'ssl_object' extra info in transport
-                        sock = transp._ssl_protocol._sslpipe.ssl_object
-                    # gives DER-encoded cert as a sequence of bytes (or None)
-                    cert = sock.getpeercert(binary_form=True)
-                    assert cert
-                    got = self._hashfunc(cert).digest()
-                    expected = self._fingerprint
-                    if got != expected:
-                        transp.close()
-                        raise FingerprintMismatch(expected, got, host, port)
-                return transp, proto
+                return (yield from self._connect_host(hinfo, sslcontext))
             except OSError as e:
                 exc = e
-        else:
-            raise ClientOSError(exc.errno,
-                                'Can not connect to %s:%s [%s]' %
-                                (req.host, req.port, exc.strerror)) from exc
+        raise exc
+
+    @asyncio.coroutine
+    def _connect_staggered(self, hosts, sslcontext):
+        """Race connection attempts to hosts (RFC 8305).
+
+        Next attempt starts when the previous one fails or does not
+        succeed within happy_eyeballs_delay; the first established
+        connection wins, the rest are cancelled.
+        """
+        hosts = iter(hosts)
+        pending = set()
+        exc = None
+        try:
+            while True:
+                hinfo = next(hosts, None)
+                if hinfo is not None:
+                    pending.add(helpers.ensure_future(
+                        self._connect_host(hinfo, sslcontext),
+                        loop=self._loop))
+                elif not pending:
+                    raise exc
+                done, pending = yield from asyncio.wait(
+                    pending, loop=self._loop,
+                    timeout=(self._happy_eyeballs_delay
+                             if hinfo is not None else None),
+                    return_when=asyncio.FIRST_COMPLETED)
+
+                winner = None
+                for task in done:
+                    if task.exception() is None:
+                        if winner is None:
+                            winner = task.result()
+                        else:
+                            task.result()[0].close()
+                if winner is not None:
+                    return winner
+                for task in done:
+                    exc = task.exception()
+                    if not isinstance(exc, OSError):
+                        raise exc
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @asyncio.coroutine
+    def _connect_host(self, hinfo, sslcontext):
+        host = hinfo['host']
+        port = hinfo['port']
+        address = (host, port)
+        session_key = None
+        if sslcontext is not None and self._ssl_sessions is not None:
+            session_key = (hinfo['hostname'], port)
+            session = self._ssl_sessions.get(session_key)
+            if session is not None:
+                sslcontext = _SessionContext(sslcontext, session)
+        self._connecting_addresses[address] += 1
+        try:
+            transp, proto = yield from self._loop.create_connection(
+                self._factory, host, port,
+                ssl=sslcontext, family=hinfo['family'],
+                proto=hinfo['proto'], flags=hinfo['flags'],
+                server_hostname=hinfo['hostname'] if sslcontext else None,
+                local_addr=self._local_addr)
+        finally:
+            self._connecting_addresses[address] -= 1
+            if not self._connecting_addresses[address]:
+                del self._connecting_addresses[address]
+        self._transport_addresses[transp] = address
+        if session_key is not None:
+            ssl_object = transp.get_extra_info('ssl_object')
+            if ssl_object is not None:
+                if ssl_object.session_reused:
+                    self._ssl_session_hits += 1
+                else:
+                    self._ssl_session_misses += 1
+                self._store_ssl_session(session_key, ssl_object)
+        has_cert = transp.get_extra_info('sslcontext')
+        if has_cert and self._fingerprint:
+            sock = transp.get_extra_info('socket')
+            if not hasattr(sock, 'getpeercert'):
+                # Workaround for asyncio 3.5.0
+                # Starting from 3.5.1 version
+                # there is 'ssl_object' extra info in transport
+                sock = transp._ssl_protocol._sslpipe.ssl_object
+            # gives DER-encoded cert as a sequence of bytes (or None)
+            cert = sock.getpeercert(binary_form=True)
+            assert cert
+            got = self._hashfunc(cert).digest()
+            expected = self._fingerprint
+            if got != expected:
+                transp.close()
+                raise FingerprintMismatch(expected, got, host, port)
+        return transp, proto
 
     @asyncio.coroutine
     def _create_proxy_connection(self, req):
@@ -719,6 +1428,12 @@ class UnixConnector(BaseConnector):
     force_close - Set to True to force close and do reconnect
         after each request (and between redirects).
     capacity - The total number of simultaneous connections.
+    limit_per_host - The number of simultaneous connections to one host.
+    min_idle_per_host - The number of idle connections to keep open to
+        every host connected to within keepalive_timeout.
+    pipeline_depth - The number of GET and HEAD requests sent over one
+        connection without waiting for responses when connection limits
+        are reached, 1 disables pipelining.
     loop - Optional event loop.
 
     Usage:
@@ -732,12 +1447,16 @@ class UnixConnector(BaseConnector):
     def __init__(self, path, force_close=False,
                  time_service=None,
                  conn_timeout=None, keepalive_timeout=sentinel,
-                 capacity=20, limit=sentinel, loop=None):
+                 capacity=20, limit=sentinel, limit_per_host=0,
+                 min_idle_per_host=0, pipeline_depth=1, loop=None):
         super().__init__(force_close=force_close,
                          time_service=time_service,
                          conn_timeout=conn_timeout,
                          keepalive_timeout=keepalive_timeout,
-                         capacity=capacity, limit=limit, loop=loop)
+                         capacity=capacity, limit=limit,
+                         limit_per_host=limit_per_host,
+                         min_idle_per_host=min_idle_per_host,
+                         pipeline_depth=pipeline_depth, loop=loop)
         self._path = path
 
     @property
@@ -4,6 +4,7 @@ import os
 
 from . import hdrs
 from .helpers import create_future
+from .streams import StreamSlot
 from .web_exceptions import (HTTPNotModified, HTTPOk, HTTPPartialContent,
                              HTTPRequestRangeNotSatisfiable)
 from .web_reqrep import StreamResponse
@@ -56,11 +57,18 @@ class FileSender:
 
         transport = request.transport
 
-        if transport.get_extra_info("sslcontext"):
+        # the socket is written directly, previous pipelined responses
+        # have to be sent to it first
+        ready = True
+        if isinstance(request._writer, StreamSlot):
+            ready = yield from request._writer.wait_active()
+
+        if (not ready or transport.get_extra_info("sslcontext") or
+                transport.get_write_buffer_size()):
             yield from self._sendfile_fallback(request, resp, fobj, count)
             return
 
-        def _send_headers(version, headers, writer):
+        def _send_headers(version, headers, writer, default_headers=b''):
             # Durty hack required for
             # https://github.com/KeepSafe/aiohttp/issues/1093
             # don't send headers in sendfile mode
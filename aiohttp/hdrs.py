@@ -71,6 +71,7 @@ RANGE = istr('RANGE')
 REFERER = istr('REFERER')
 RETRY_AFTER = istr('RETRY-AFTER')
 SEC_WEBSOCKET_ACCEPT = istr('SEC-WEBSOCKET-ACCEPT')
+SEC_WEBSOCKET_EXTENSIONS = istr('SEC-WEBSOCKET-EXTENSIONS')
 SEC_WEBSOCKET_VERSION = istr('SEC-WEBSOCKET-VERSION')
 SEC_WEBSOCKET_PROTOCOL = istr('SEC-WEBSOCKET-PROTOCOL')
 SEC_WEBSOCKET_KEY = istr('SEC-WEBSOCKET-KEY')
@@ -598,6 +598,8 @@ class TimeService:
         self._loop_time = loop.time()
         self._count = 0
         self._strtime = None
+        self._date_header = None
+        self._default_headers = None
         self._cb = loop.call_at(self._loop_time + self._interval, self._on_cb)
         self._scheduled = []
 
@@ -638,6 +640,8 @@ class TimeService:
                 handle._run()
 
         self._strtime = None
+        self._date_header = None
+        self._default_headers = None
         self._cb = self._loop.call_at(
             self._loop_time + self._interval, self._on_cb)
 
@@ -664,6 +668,27 @@ class TimeService:
             self._strtime = s = self._format_date_time()
         return self._strtime
 
+    def date_header(self):
+        """Encoded Date header line, refreshed once per tick."""
+        h = self._date_header
+        if h is None:
+            self._date_header = h = (
+                hdrs.DATE + ': ' + self.strtime() + '\r\n').encode('ascii')
+        return h
+
+    def default_headers(self, server):
+        """Encoded block of Date and Server header lines.
+
+        The block is refreshed once per tick.
+        """
+        h = self._default_headers
+        if h is None or h[0] != server:
+            self._default_headers = h = (
+                server,
+                self.date_header() + (
+                    hdrs.SERVER + ': ' + server + '\r\n').encode('utf-8'))
+        return h[1]
+
     def loop_time(self):
         return self._loop_time
 
@@ -3,6 +3,7 @@
 import asyncio
 import collections
 import http.server
+import os
 import re
 import string
 import sys
@@ -18,6 +19,7 @@ import aiohttp
 from . import errors, hdrs
 from .helpers import create_future
 from .log import internal_logger
+from .streams import StreamSlot, StreamWriter
 
 __all__ = ('HttpMessage', 'Request', 'Response',
            'HttpVersion', 'HttpVersion10', 'HttpVersion11',
@@ -36,6 +38,18 @@ SERVER_SOFTWARE = 'Python/{0[0]}.{0[1]} aiohttp/{1}'.format(
 
 RESPONSES = http.server.BaseHTTPRequestHandler.responses
 
+# buffered data up to this size is sent by single transport.write()
+# even for vectored streams
+COALESCE_LIMIT = 16 * 1024
+
+# headers with few distinct values, encoded lines are cached
+CACHED_HEADERS = frozenset((hdrs.SERVER, hdrs.CONTENT_TYPE, hdrs.CONNECTION,
+                            hdrs.TRANSFER_ENCODING, hdrs.CONTENT_ENCODING))
+# encoded lines in least recently used order
+_ENCODED_LINES = collections.OrderedDict()
+_ENCODED_LINES_LIMIT = 1024
+_DATE_LINE = [None, b'']
+
 PARSE_NONE = 0
 PARSE_LENGTH = 1
 PARSE_CHUNKED = 2
@@ -132,7 +146,7 @@ class HttpParser:
                     # next line
                     lines_idx += 1
                     line = lines[lines_idx]
-                    continuation = line[0] in (32, 9)  # (' ', '\t')
+                    continuation = line and line[0] in (32, 9)
                 bvalue = b'\r\n'.join(bvalue)
             else:
                 if header_length > self.max_field_size:
@@ -450,7 +464,63 @@ class DeflateBuffer:
         self.out.feed_eof()
 
 
+def encode_headers(status_line, headers, default_headers=b'', *,
+                   _sep=': ', _end='\r\n',
+                   _lines=_ENCODED_LINES, _date_line=_DATE_LINE,
+                   _cached=CACHED_HEADERS, DATE=hdrs.DATE):
+    """Encodes status line and headers.
+
+    Encoded status lines and lines of common headers (see CACHED_HEADERS)
+    are kept in LRU cache, values with parameters (e.g. multipart
+    boundary) are not cached.  Date header line is re-encoded only when
+    it changes.  default_headers is a block of pre-encoded header lines
+    (see TimeService.default_headers()) appended after headers.
+    """
+    line = _lines.get(status_line)
+    if line is None:
+        line = status_line.encode('utf-8')
+        _lines[status_line] = line
+        if len(_lines) > _ENCODED_LINES_LIMIT:
+            _lines.popitem(last=False)
+    else:
+        _lines.move_to_end(status_line)
+    lines = [line]
+
+    for name, value in headers.items():
+        if name in _cached and ';' not in value:
+            key = (name, value, _sep, _end)
+            line = _lines.get(key)
+            if line is None:
+                line = (name + _sep + value + _end).encode('utf-8')
+                _lines[key] = line
+                if len(_lines) > _ENCODED_LINES_LIMIT:
+                    _lines.popitem(last=False)
+            else:
+                _lines.move_to_end(key)
+        elif name == DATE:
+            if value != _date_line[0]:
+                _date_line[:] = (
+                    value, (name + _sep + value + _end).encode('utf-8'))
+            line = _date_line[1]
+        else:
+            line = (name + _sep + value + _end).encode('utf-8')
+        lines.append(line)
+
+    lines.append(default_headers)
+    lines.append(b'\r\n')
+    return b''.join(lines)
+
+
 class PayloadWriter:
+    """Writes payload to a stream.
+
+    Writes to streams with vectored mode enabled (see
+    StreamWriter.vectored) pass buffered chunks and chunked
+    encoding framing to StreamWriter.writelines() as separate buffers
+    instead of concatenating them.  Buffered data up to COALESCE_LIMIT
+    bytes, e.g. headers and body of a small response, is always sent
+    by single transport.write().
+    """
 
     def __init__(self, stream, loop):
         if loop is None:
@@ -458,6 +528,8 @@ class PayloadWriter:
 
         self._stream = stream
         self._transport = None
+        self._vectored = (isinstance(stream, (StreamWriter, StreamSlot)) and
+                          stream.vectored)
 
         self.loop = loop
         self.length = None
@@ -478,13 +550,11 @@ class PayloadWriter:
     def set_transport(self, transport):
         self._transport = transport
 
-        chunk = b''.join(self._buffer)
-        if chunk:
-            transport.write(chunk)
-            self._buffer.clear()
+        if self._buffer:
+            self._flush()
 
         if self._drain_waiter is not None:
-            waiter, self._drain_maiter = self._drain_maiter, None
+            waiter, self._drain_waiter = self._drain_waiter, None
             if not waiter.done():
                 waiter.set_result(None)
 
@@ -517,6 +587,14 @@ class PayloadWriter:
             self.output_length += size
             self._buffer.append(chunk)
 
+    def _flush(self):
+        buffer, self._buffer = self._buffer, []
+        if self._vectored and sum(map(len, buffer)) > COALESCE_LIMIT:
+            # sent by sendmsg() if possible, see StreamWriter.writelines()
+            self._stream.writelines(buffer)
+        else:
+            self._transport.write(b''.join(buffer))
+
     def _write(self, chunk):
         size = len(chunk)
         self.buffer_size += size
@@ -525,13 +603,23 @@ class PayloadWriter:
         if self._transport is not None:
             if self._buffer:
                 self._buffer.append(chunk)
-                self._transport.write(b''.join(self._buffer))
-                self._buffer.clear()
+                self._flush()
             else:
                 self._transport.write(chunk)
         else:
             self._buffer.append(chunk)
 
+    def _write_chunk(self, chunk):
+        # chunked encoding framing, chunk data is not copied
+        # in vectored mode
+        chunk_len = ('%x\r\n' % len(chunk)).encode('ascii')
+        if self._vectored:
+            self.buffer_data(chunk_len)
+            self.buffer_data(chunk)
+            self._write(b'\r\n')
+        else:
+            self._write(chunk_len + chunk + b'\r\n')
+
     def write(self, chunk, *, drain=True):
         """Writes chunk of data to a stream.
 
@@ -554,12 +642,11 @@ class PayloadWriter:
                 if not chunk:
                     return ()
 
-        if self.chunked:
-            chunk_len = ('%x\r\n' % len(chunk)).encode('ascii')
-            chunk = chunk_len + chunk + b'\r\n'
-
         if chunk:
-            self._write(chunk)
+            if self.chunked:
+                self._write_chunk(chunk)
+            else:
+                self._write(chunk)
 
             if self.buffer_size > 64 * 1024 and drain:
                 self.buffer_size = 0
@@ -574,16 +661,18 @@ class PayloadWriter:
                 chunk = self._compress.compress(chunk)
 
             chunk = chunk + self._compress.flush()
-            if chunk and self.chunked:
-                chunk_len = ('%x\r\n' % len(chunk)).encode('ascii')
-                chunk = chunk_len + chunk + b'\r\n0\r\n\r\n'
-        else:
-            if chunk and self.chunked:
-                chunk_len = ('%x\r\n' % len(chunk)).encode('ascii')
-                chunk = chunk_len + chunk + b'\r\n0\r\n\r\n'
 
-            if self.chunked:
-                chunk = chunk + b'0\r\n\r\n'
+        if self.chunked:
+            if chunk:
+                chunk_len = ('%x\r\n' % len(chunk)).encode('ascii')
+                if self._vectored:
+                    self.buffer_data(chunk_len)
+                    self.buffer_data(chunk)
+                    chunk = b'\r\n0\r\n\r\n'
+                else:
+                    chunk = chunk_len + chunk + b'\r\n0\r\n\r\n'
+            else:
+                chunk = b'0\r\n\r\n'
 
         self.buffer_data(chunk)
 
@@ -596,8 +685,7 @@ class PayloadWriter:
     def drain(self):
         if self._transport is not None:
             if self._buffer:
-                self._transport.write(b''.join(self._buffer))
-                self._buffer.clear()
+                self._flush()
             yield from self._stream.drain()
         else:
             if self._buffer:
@@ -732,11 +820,8 @@ class HttpMessage(ABC, PayloadWriter):
         self._add_default_headers()
 
         # status + headers
-        headers = self.status_line + ''.join(
-            [k + _sep + v + _end for k, v in self.headers.items()])
-        headers = headers.encode('utf-8') + b'\r\n'
-
-        self.buffer_data(headers)
+        self.buffer_data(encode_headers(
+            self.status_line, self.headers, _sep=_sep, _end=_end))
 
     def _add_default_headers(self):
         # set the connection header
@@ -835,3 +920,18 @@ class Request(HttpMessage):
     def autochunked(self):
         return (self.length is None and
                 self._version >= HttpVersion11)
+
+
+HttpRequestParserPy = HttpRequestParser
+HttpResponseParserPy = HttpResponseParser
+HttpPayloadParserPy = HttpPayloadParser
+
+if not bool(os.environ.get('AIOHTTP_NO_EXTENSIONS')):
+    try:
+        from ._http_parser import (HttpRequestParserC, HttpResponseParserC,
+                                   HttpPayloadParserC)
+        HttpRequestParser = HttpRequestParserC  # noqa
+        HttpResponseParser = HttpResponseParserC  # noqa
+        HttpPayloadParser = HttpPayloadParserC  # noqa
+    except ImportError:  # pragma: no cover
+        pass
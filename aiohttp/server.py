@@ -81,6 +81,15 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
 
     :param int max_headers: Optional maximum header size
 
+    :param int max_concurrent_handlers: Maximum number of pipelined
+                                        requests handled concurrently
+
+    :param int pipeline_buffer_limit: Size of buffered responses of
+                                      pipelined requests, handlers
+                                      waiting for previous responses
+                                      are paused on drain() above it
+
+    Responses to pipelined requests are sent in the order of requests.
     """
     _request_count = 0
     _reading_request = False
@@ -101,6 +110,7 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
                  lingering_time=30.0,
                  lingering_timeout=5.0,
                  max_concurrent_handlers=2,
+                 pipeline_buffer_limit=2 ** 20,
                  **kwargs):
 
         # process deprecated params
@@ -134,6 +144,10 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
         self._reading_request = False
         self._request_handlers = []
         self._max_concurrent_handlers = max_concurrent_handlers
+        self._pipeline_buffer_limit = pipeline_buffer_limit
+        # output slot of the message passed to handle_request()
+        # or handle_error(), see start()
+        self._request_writer = None
 
         self._upgrade = False
         self._payload_parser = None
@@ -208,7 +222,9 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
         super().connection_made(transport)
 
         self.transport = transport
-        self.writer = StreamWriter(self, transport, self._loop)
+        self.writer = StreamWriter(
+            self, transport, self._loop,
+            buffer_limit=self._pipeline_buffer_limit)
 
         if self._tcp_keepalive:
             tcp_keepalive(self, transport)
@@ -306,7 +322,8 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
                             self._closing = True
                             self._request_handlers.append(
                                 ensure_future(
-                                    self.handle_error(
+                                    self._handle_error(
+                                        self.writer.reserve(),
                                         exc.code, msg,
                                         None, exc, exc.headers, exc.message),
                                     loop=self._loop))
@@ -315,7 +332,9 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
                             self._closing = True
                             self._request_handlers.append(
                                 ensure_future(
-                                    self.handle_error(500, msg, None, exc),
+                                    self._handle_error(
+                                        self.writer.reserve(),
+                                        500, msg, None, exc),
                                     loop=self._loop))
                             return
                         else:
@@ -348,16 +367,19 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
                         else:
                             payload = EMPTY_PAYLOAD
 
+                        # responses are written in order of requests
+                        writer = self.writer.reserve()
                         if self._waiters:
                             waiter = self._waiters.popleft()
-                            waiter.set_result((msg, payload))
+                            waiter.set_result((msg, payload, writer))
                         elif self._max_concurrent_handlers:
                             self._max_concurrent_handlers -= 1
                             handler = ensure_future(
-                                self.start(msg, payload), loop=self._loop)
+                                self.start(msg, payload, writer),
+                                loop=self._loop)
                             self._request_handlers.append(handler)
                         else:
-                            self._messages.append((msg, payload))
+                            self._messages.append((msg, payload, writer))
 
                         start_pos = start_pos+2
                         if start_pos < len(data):
@@ -421,8 +443,15 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
     def _request_handler(self):
         return self._request_handlers[-1]
 
+    def _get_request_writer(self):
+        writer, self._request_writer = self._request_writer, None
+        if writer is None:
+            # handle_request() or handle_error() called directly
+            writer = self.writer
+        return writer
+
     @asyncio.coroutine
-    def start(self, message, payload):
+    def start(self, message, payload, writer=None):
         """Start processing of incoming requests.
 
         It reads request line, request headers and request payload, then
@@ -434,9 +463,13 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
         loop = self._loop
         handler = self._request_handlers[-1]
         time_service = self.time_service
+        if writer is None:
+            writer = self.writer.reserve()
 
         while not self._closing:
             try:
+                # handle_request() takes the writer before first yield
+                self._request_writer = writer
                 yield from self.handle_request(message, payload)
 
                 if not payload.is_eof() and not self._closing:
@@ -468,36 +501,49 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
             except asyncio.TimeoutError:
                 self._closing = True
                 self.log_debug('Request handler timed out.')
-                yield from self.handle_error(504, message)
+                yield from self._handle_error(writer, 504, message)
             except errors.ClientDisconnectedError:
                 self._closing = True
                 self.log_debug('Ignored premature client disconnection #1.')
             except Exception as exc:
                 self._closing = True
-                yield from self.handle_error(500, message, None, exc)
+                yield from self._handle_error(writer, 500, message, None, exc)
             finally:
                 if self.transport is None:
                     self.log_debug(
                         'Ignored premature client disconnection #2.')
                     return
                 elif not self._closing:
-                    if self._messages:
-                        message, payload = self._messages.popleft()
+                    if not self._keepalive and not self._messages:
+                        # close after responses to previous requests
+                        self._closing = True
+                        writer.finish(close=True)
                     else:
-                        if not self._keepalive:
-                            self._closing = True
-                            self.transport.close()
+                        writer.finish()
+                        if self._messages:
+                            message, payload, writer = \
+                                self._messages.popleft()
                         else:
                             waiter = create_future(loop)
                             self._waiters.append(waiter)
-                            message, payload = yield from waiter
+                            message, payload, writer = yield from waiter
                 else:
+                    writer.finish()
                     self._request_handlers.remove(handler)
 
                     if (not self._request_handlers and
                             self.transport is not None):
                         self.transport.close()
 
+    @asyncio.coroutine
+    def _handle_error(self, writer, *args):
+        # handle_error() takes the writer before first yield
+        self._request_writer = writer
+        try:
+            yield from self.handle_error(*args)
+        finally:
+            writer.finish()
+
     @asyncio.coroutine
     def handle_error(self, status=500, message=None,
                      payload=None, exc=None, headers=None, reason=None):
@@ -536,7 +582,8 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
                 status=status, reason=reason, message=msg).encode('utf-8')
 
             response = aiohttp.Response(
-                self.writer, status, close=True, loop=self._loop)
+                self._get_request_writer(), status, close=True,
+                loop=self._loop)
             response.add_header(hdrs.CONTENT_TYPE, 'text/html; charset=utf-8')
             response.add_header(hdrs.CONTENT_LENGTH, str(len(html)))
             response.add_header(hdrs.DATE, self._time_service.strtime())
@@ -571,7 +618,7 @@ class ServerHttpProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
         if self.access_log:
             now = self._loop.time()
         response = aiohttp.Response(
-            self.writer, 404,
+            self._get_request_writer(), 404,
             http_version=message.version, close=True, loop=self._loop)
 
         body = b'Page Not Found!'
@@ -26,6 +26,9 @@ elif hasattr(socket, 'TCP_NOPUSH'):  # pragma: no cover
 else:  # pragma: no cover
     CORK = None
 
+# max buffers passed to single sendmsg() call
+IOV_MAX = 1024
+
 
 class EofStream(Exception):
     """eof stream indication."""
@@ -33,7 +36,8 @@ class EofStream(Exception):
 
 class StreamWriter:
 
-    def __init__(self, protocol, transport, loop):
+    def __init__(self, protocol, transport, loop, *,
+                 buffer_limit=DEFAULT_LIMIT * 16, vectored=None):
         self._protocol = protocol
         self._loop = loop
         self._tcp_nodelay = False
@@ -43,6 +47,25 @@ class StreamWriter:
         self.available = True
         self.transport = transport
 
+        # pass buffers list to writelines() instead of joining them,
+        # see PayloadWriter
+        if vectored is None:
+            vectored = isinstance(transport, asyncio.WriteTransport)
+        self.vectored = vectored
+        # writelines() sends directly by sendmsg() on plain sockets
+        if (vectored and isinstance(self._socket, socket.socket) and
+                hasattr(self._socket, 'sendmsg') and
+                transport.get_extra_info('sslcontext') is None):
+            self._sendmsg_socket = self._socket
+        else:
+            self._sendmsg_socket = None
+
+        # ordered slots, see reserve()
+        self._slots = collections.deque()
+        self._buffer_size = 0
+        self._buffer_limit = buffer_limit
+        self._buffer_waiters = []
+
     def acquire(self, cb):
         if self.available:
             self.available = False
@@ -54,10 +77,116 @@ class StreamWriter:
         if self._waiters:
             self.available = False
             cb = self._waiters.pop(0)
-            cb(self)
+            cb(self.transport)
         else:
             self.available = True
 
+    @property
+    def buffer_size(self):
+        """Size of data buffered by not active slots."""
+        return self._buffer_size
+
+    def reserve(self):
+        """Reserve next output slot.
+
+        Slots are written to the transport in reservation order:
+        the first not finished slot writes directly, data written to
+        following slots is buffered until all previous slots are
+        finished and is sent by single transport.write() call.
+        """
+        slot = StreamSlot(self)
+        self._slots.append(slot)
+        if len(self._slots) == 1:
+            slot._active = True
+        return slot
+
+    def _finish_slot(self, slot):
+        slots = self._slots
+        if not slots or slots[0] is not slot:
+            return
+
+        slots.popleft()
+        chunks = []
+        close = slot._close
+        while slots and not close:
+            slot = slots[0]
+            chunks.extend(slot._buffer)
+            slot._buffer.clear()
+            if slot._finished:
+                close = slot._close
+                slots.popleft()
+            else:
+                slot._active = True
+                break
+
+        if chunks:
+            self._buffer_size -= sum(map(len, chunks))
+        if close:
+            # following slots are discarded
+            for slot in slots:
+                self._buffer_size -= sum(map(len, slot._buffer))
+                slot._buffer.clear()
+                slot._finished = True
+            slots.clear()
+        if self._buffer_size < 0:  # pragma: no cover
+            self._buffer_size = 0
+
+        if self.transport is not None:
+            if chunks:
+                if self.vectored:
+                    self.writelines(chunks)
+                else:
+                    self.transport.write(b''.join(chunks))
+            if close:
+                self.transport.close()
+
+        # waiting slots re-check the limit or their activation
+        waiters, self._buffer_waiters = self._buffer_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def writelines(self, buffers):
+        """Write list of buffers to the transport without joining them.
+
+        If the transport has no data buffered, buffers are sent by
+        single socket.sendmsg() call, only the part not accepted by the
+        socket is joined and passed to transport.write().
+        """
+        transport = self.transport
+        if transport is None:
+            return
+
+        sock = self._sendmsg_socket
+        if sock is None or transport.get_write_buffer_size():
+            transport.write(b''.join(buffers))
+            return
+        try:
+            if transport.is_closing():
+                transport.write(b''.join(buffers))
+                return
+        except AttributeError:
+            pass
+
+        try:
+            sent = sock.sendmsg(buffers[:IOV_MAX])
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            # let transport handle the error
+            sent = 0
+
+        for idx, buf in enumerate(buffers):
+            size = len(buf)
+            if sent < size:
+                if sent:
+                    buf = memoryview(buf)[sent:]
+                rest = [buf]
+                rest.extend(buffers[idx + 1:])
+                transport.write(b''.join(rest))
+                return
+            sent -= size
+
     def is_connected(self):
         return self.transport is not None
 
@@ -135,6 +264,120 @@ class StreamWriter:
         yield from self._protocol._drain_helper()
 
 
+class StreamSlot:
+    """Ordered part of output stream, see StreamWriter.reserve().
+
+    Slot provides both stream and transport interfaces
+    for PayloadWriter.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._buffer = []
+        self._active = False
+        self._finished = False
+        self._close = False
+        self.available = True
+
+    @property
+    def transport(self):
+        return self
+
+    @property
+    def vectored(self):
+        return self._stream.vectored
+
+    def acquire(self, cb):
+        self.available = False
+        cb(self)
+
+    def release(self):
+        self.available = True
+
+    def write(self, data):
+        stream = self._stream
+        if self._active:
+            if stream.transport is not None:
+                stream.transport.write(data)
+        elif not self._finished:
+            self._buffer.append(data)
+            stream._buffer_size += len(data)
+
+    def writelines(self, chunks):
+        stream = self._stream
+        if self._active:
+            stream.writelines(chunks)
+        elif not self._finished:
+            self._buffer.extend(chunks)
+            stream._buffer_size += sum(map(len, chunks))
+
+    def is_closing(self):
+        transport = self._stream.transport
+        if transport is None:
+            return True
+        try:
+            return transport.is_closing()
+        except AttributeError:
+            return False
+
+    def finish(self, *, close=False):
+        """Mark slot as complete.
+
+        Buffered data is flushed as soon as all previous slots
+        are finished, transport is closed after that if close is True.
+        """
+        if self._finished:
+            return
+        self._finished = True
+        self._close = close
+        if self._active:
+            self._stream._finish_slot(self)
+
+    def is_connected(self):
+        return self._stream.is_connected()
+
+    @property
+    def tcp_nodelay(self):
+        return self._stream.tcp_nodelay
+
+    def set_tcp_nodelay(self, value):
+        self._stream.set_tcp_nodelay(value)
+
+    @property
+    def tcp_cork(self):
+        return self._stream.tcp_cork
+
+    def set_tcp_cork(self, value):
+        self._stream.set_tcp_cork(value)
+
+    @asyncio.coroutine
+    def wait_active(self):
+        """Wait until all previous slots are finished.
+
+        Data buffered by the slot is passed to the transport by then,
+        so the transport may be written directly.  Returns False if the
+        slot is finished without becoming active, e.g. discarded because
+        the connection is closing.
+        """
+        stream = self._stream
+        while not self._active and not self._finished:
+            waiter = helpers.create_future(stream._loop)
+            stream._buffer_waiters.append(waiter)
+            yield from waiter
+        return self._active
+
+    @asyncio.coroutine
+    def drain(self):
+        stream = self._stream
+        while (not self._active and
+               stream._buffer_size > stream._buffer_limit):
+            waiter = helpers.create_future(stream._loop)
+            stream._buffer_waiters.append(waiter)
+            yield from waiter
+        if self._active:
+            yield from stream.drain()
+
+
 if PY_35:
     class AsyncStreamIterator:
 
@@ -596,6 +839,21 @@ class DataQueue:
             else:
                 raise EofStream
 
+    def read_nowait(self, n=-1):
+        """Return list of up to n items available without waiting.
+
+        All available items are returned if n is negative.
+        """
+        buffer = self._buffer
+        if n < 0 or n > len(buffer):
+            n = len(buffer)
+        result = []
+        for _ in range(n):
+            data, size = buffer.popleft()
+            self._size -= size
+            result.append(data)
+        return result
+
     if PY_35:
         def __aiter__(self):
             return AsyncStreamIterator(self.read)
@@ -752,10 +1010,7 @@ class FlowControlDataQueue(DataQueue):
             else:
                 self._protocol._reading_paused = True
 
-    @asyncio.coroutine
-    def read(self):
-        result = yield from super().read()
-
+    def _check_buffer_size(self):
         if self._protocol._reading_paused:
             if self._size < self._limit:
                 try:
@@ -773,7 +1028,14 @@ class FlowControlDataQueue(DataQueue):
                 else:
                     self._protocol._reading_paused = True
 
-        return result
+    @maybe_resume
+    @asyncio.coroutine
+    def read(self):
+        return (yield from super().read())
+
+    @maybe_resume
+    def read_nowait(self, n=-1):
+        return super().read_nowait(n)
 
 
 class FlowControlChunksQueue(FlowControlDataQueue):
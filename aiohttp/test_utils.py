@@ -543,6 +543,14 @@ def make_mocked_request(method, path, headers=None, *,
     time_service = mock.Mock()
     time_service.time.return_value = 12345
     time_service.strtime.return_value = "Tue, 15 Nov 1994 08:12:31 GMT"
+    time_service.date_header.return_value = (
+        b"Date: Tue, 15 Nov 1994 08:12:31 GMT\r\n")
+
+    def default_headers(server):
+        return (time_service.date_header() +
+                b"Server: " + server.encode('utf-8') + b"\r\n")
+
+    time_service.default_headers.side_effect = default_headers
 
     @contextmanager
     def timeout(*args, **kw):
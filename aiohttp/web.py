@@ -1,8 +1,10 @@
 import asyncio
 import os
+import signal
 import socket
 import stat
 import sys
+import time
 import warnings
 from argparse import ArgumentParser
 from collections import Iterable, MutableMapping
@@ -22,7 +24,7 @@ from .web_middlewares import *  # noqa
 from .web_reqrep import *  # noqa
 from .web_server import Server
 from .web_urldispatcher import *  # noqa
-from .web_urldispatcher import PrefixedSubAppResource
+from .web_urldispatcher import PrefixedSubAppResource, ResourceRoute
 from .web_ws import *  # noqa
 
 __all__ = (web_reqrep.__all__ +
@@ -55,6 +57,8 @@ class Application(MutableMapping):
         self.logger = logger
 
         self._middlewares = FrozenList(middlewares)
+        # route -> (handler, dynamic middlewares), filled on frozen app
+        self._handlers = {}
         self._state = {}
         self._frozen = False
 
@@ -182,6 +186,15 @@ class Application(MutableMapping):
     def middlewares(self):
         return self._middlewares
 
+    def _set_loop(self, loop):
+        # run_app() worker processes run application in a new loop
+        self._loop = loop
+        resources = getattr(self._router, 'resources', None)
+        if resources is not None:
+            for resource in resources():
+                if isinstance(resource, PrefixedSubAppResource):
+                    resource._app._set_loop(loop)
+
     def make_handler(self, *, secure_proxy_ssl_header=None, **kwargs):
         debug = kwargs.pop('debug', sentinel)
         if debug is not sentinel:
@@ -238,7 +251,8 @@ class Application(MutableMapping):
             message, payload, protocol,
             protocol.time_service, protocol._request_handler,
             loop=self._loop,
-            secure_proxy_ssl_header=self._secure_proxy_ssl_header)
+            secure_proxy_ssl_header=self._secure_proxy_ssl_header,
+            writer=protocol._get_request_writer())
 
     @asyncio.coroutine
     def _handle(self, request):
@@ -255,20 +269,46 @@ class Application(MutableMapping):
                 yield from match_info.expect_handler(request))
 
         if resp is None:
-            handler = match_info.handler
-            for app in match_info.apps:
-                for factory in reversed(app.middlewares):
-                    handler = yield from factory(app, handler)
+            handler = yield from self._build_handler(match_info)
             resp = yield from handler(request)
 
         assert isinstance(resp, web_reqrep.StreamResponse), \
             ("Handler {!r} should return response instance, "
              "got {!r} [middlewares {!r}]").format(
                  match_info.handler, type(resp),
-                 [middleware for middleware in app.middlewares
-                  for app in match_info.apps])
+                 [middleware for app in match_info.apps
+                  for middleware in app.middlewares])
         return resp
 
+    @asyncio.coroutine
+    def _build_handler(self, match_info):
+        route = match_info.route
+        # routes registered in frozen routers are fixed, every route
+        # belongs to the same apps stack for all requests
+        cacheable = self._frozen and isinstance(route, ResourceRoute)
+
+        cached = self._handlers.get(route) if cacheable else None
+        if cached is not None:
+            handler, dynamic = cached
+        else:
+            handler = match_info.handler
+            dynamic = []
+            for app in match_info.apps:
+                for factory in reversed(app.middlewares):
+                    if dynamic or getattr(factory,
+                                          '__dynamic_middleware__', False):
+                        # everything above a dynamic middleware has to
+                        # wrap the fresh handler, don't cache it
+                        dynamic.append((app, factory))
+                    else:
+                        handler = yield from factory(app, handler)
+            if cacheable:
+                self._handlers[route] = (handler, dynamic)
+
+        for app, factory in dynamic:
+            handler = yield from factory(app, handler)
+        return handler
+
     def __call__(self):
         """gunicorn compatibility"""
         return self
@@ -277,24 +317,7 @@ class Application(MutableMapping):
         return "<Application 0x{:x}>".format(id(self))
 
 
-def run_app(app, *, host=None, port=None, path=None,
-            shutdown_timeout=60.0, ssl_context=None,
-            print=print, backlog=128, access_log_format=None,
-            access_log=access_logger):
-    """Run an app locally"""
-    loop = app.loop
-
-    make_handler_kwargs = dict()
-    if access_log_format is not None:
-        make_handler_kwargs['access_log_format'] = access_log_format
-    handler = app.make_handler(access_log=access_log,
-                               **make_handler_kwargs)
-
-    loop.run_until_complete(app.startup())
-
-    scheme = 'https' if ssl_context else 'http'
-    base_url = URL('{}://localhost'.format(scheme)).with_port(port)
-
+def _normalize_bindings(host, port, path, ssl_context):
     if path is None:
         paths = ()
     elif isinstance(path, (str, bytes, bytearray, memoryview))\
@@ -317,8 +340,235 @@ def run_app(app, *, host=None, port=None, path=None,
     if hosts and port is None:
         port = 8443 if ssl_context else 8080
 
-    server_creations = []
+    return hosts, port, paths
+
+
+def _remove_stale_unix_socket(path):
+    # Clean up prior socket path if stale and not abstract.
+    # CPython 3.5.3+'s event loop already does this. See
+    # https://github.com/python/asyncio/issues/425
+    if path[0] not in (0, '\x00'):  # pragma: no branch
+        try:
+            if stat.S_ISSOCK(os.stat(path).st_mode):
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _bind_socket(family, address, backlog):
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        if family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if family == socket.AF_INET6 and hasattr(socket, 'IPPROTO_IPV6'):
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+        sock.bind(address)
+        sock.listen(backlog)
+        sock.setblocking(False)
+    except:  # noqa
+        sock.close()
+        raise
+    return sock
+
+
+def _bind_sockets(hosts, port, paths, backlog):
+    socks = []
+    try:
+        addresses = set()
+        for host in hosts:
+            for family, _, _, _, address in socket.getaddrinfo(
+                    host, port, type=socket.SOCK_STREAM,
+                    flags=socket.AI_PASSIVE):
+                if (family, address) not in addresses:
+                    addresses.add((family, address))
+                    socks.append(_bind_socket(family, address, backlog))
+        for path in paths:
+            _remove_stale_unix_socket(path)
+            socks.append(_bind_socket(socket.AF_UNIX, path, backlog))
+    except:  # noqa
+        for sock in socks:
+            sock.close()
+        raise
+    return socks
+
+
+def _run_worker(app, socks, hosts, port, ssl_context, backlog,
+                shutdown_timeout, make_handler_kwargs):
+    # runs in forked worker process, inherited loop shares
+    # the selector with the parent process and can't be used
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    app._set_loop(loop)
+
+    handler = app.make_handler(**make_handler_kwargs)
+    loop.run_until_complete(app.startup())
+
+    server_creations = [
+        loop.create_server(handler, sock=sock, ssl=ssl_context)
+        if sock.family != getattr(socket, 'AF_UNIX', None) else
+        loop.create_unix_server(handler, sock=sock, ssl=ssl_context)
+        for sock in socks]
+    if hosts:
+        # bind own sockets with SO_REUSEPORT,
+        # the kernel balances connections between workers
+        host_binding = hosts[0] if len(hosts) == 1 else hosts
+        server_creations.append(
+            loop.create_server(handler, host_binding, port, ssl=ssl_context,
+                               backlog=backlog, reuse_port=True))
+    servers = loop.run_until_complete(
+        asyncio.gather(*server_creations, loop=loop))
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, loop.stop)
+
+    try:
+        loop.run_forever()
+    finally:
+        # graceful shutdown can't be interrupted
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, lambda: None)
+
+        server_closures = []
+        for srv in servers:
+            srv.close()
+            server_closures.append(srv.wait_closed())
+        loop.run_until_complete(asyncio.gather(*server_closures, loop=loop))
+        loop.run_until_complete(app.shutdown())
+        loop.run_until_complete(handler.shutdown(shutdown_timeout))
+        loop.run_until_complete(app.cleanup())
+    loop.close()
+
+
+def _run_workers(app, workers, hosts, port, paths, ssl_context, backlog,
+                 reuse_port, shutdown_timeout, make_handler_kwargs,
+                 uris, print, _boot_time=1.0):
+    if not hasattr(os, 'fork'):
+        raise RuntimeError("workers are not supported "
+                           "by your operating environment")
+
+    if reuse_port:
+        socks = _bind_sockets((), port, paths, backlog)
+        reuse_port_hosts = hosts
+    else:
+        socks = _bind_sockets(hosts, port, paths, backlog)
+        reuse_port_hosts = ()
+
+    # signals are received by sigwait() only,
+    # SIGCHLD gets a handler to be never discarded
+    handled = {signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGCHLD}
+    prev_sigchld = signal.signal(signal.SIGCHLD, lambda *args: None)
+    prev_mask = signal.pthread_sigmask(signal.SIG_BLOCK, handled)
+
+    def spawn():
+        pid = os.fork()
+        if pid:
+            return pid
+
+        # worker process
+        code = 0
+        try:
+            signal.signal(signal.SIGCHLD, prev_sigchld)
+            signal.pthread_sigmask(signal.SIG_SETMASK, prev_mask)
+            _run_worker(app, socks, reuse_port_hosts, port, ssl_context,
+                        backlog, shutdown_timeout, make_handler_kwargs)
+        except BaseException:
+            web_logger.exception("Worker %s failed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    # pid -> start time
+    running = {}
+    stopping = False
+    try:
+        for _ in range(workers):
+            running[spawn()] = time.monotonic()
+
+        print("======== Running on {} ({} workers) ========\n"
+              "(Press CTRL+C to quit)".format(', '.join(uris), workers))
+
+        while running:
+            signum = signal.sigwait(handled)
+
+            if signum in (signal.SIGINT, signal.SIGTERM) and not stopping:
+                stopping = True
+                for pid in running:
+                    os.kill(pid, signal.SIGTERM)
+
+            elif signum == signal.SIGHUP and not stopping:
+                # graceful restart, new workers accept connections
+                # while old ones finish requests in progress
+                web_logger.info("Restarting workers")
+                old = list(running)
+                for _ in range(workers):
+                    running[spawn()] = time.monotonic()
+                for pid in old:
+                    os.kill(pid, signal.SIGTERM)
+                    running[pid] = None
+
+            # reap finished workers
+            while running:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:  # pragma: no cover
+                    running.clear()
+                    break
+                if not pid:
+                    break
+                started = running.pop(pid, None)
+                if stopping or started is None:
+                    continue
+                if time.monotonic() - started < _boot_time:
+                    web_logger.error("Worker %s failed to boot", pid)
+                    stopping = True
+                    for pid in running:
+                        os.kill(pid, signal.SIGTERM)
+                else:
+                    web_logger.warning("Worker %s died, restarting", pid)
+                    running[spawn()] = time.monotonic()
+    finally:
+        signal.pthread_sigmask(signal.SIG_SETMASK, prev_mask)
+        signal.signal(signal.SIGCHLD, prev_sigchld)
+        for sock in socks:
+            sock.close()
+
+
+def run_app(app, *, host=None, port=None, path=None,
+            shutdown_timeout=60.0, ssl_context=None,
+            print=print, backlog=128, access_log_format=None,
+            access_log=access_logger, workers=1, reuse_port=False):
+    """Run an app locally"""
+    if workers < 1:
+        raise ValueError(
+            'workers should be positive, got {!r}'.format(workers))
+    loop = app.loop
+
+    make_handler_kwargs = dict(access_log=access_log)
+    if access_log_format is not None:
+        make_handler_kwargs['access_log_format'] = access_log_format
+
+    scheme = 'https' if ssl_context else 'http'
+    base_url = URL('{}://localhost'.format(scheme)).with_port(port)
+
+    hosts, port, paths = _normalize_bindings(host, port, path, ssl_context)
+
     uris = [str(base_url.with_host(host)) for host in hosts]
+    uris.extend('{}://unix:{}:'.format(scheme, path) for path in paths)
+
+    if workers > 1:
+        try:
+            _run_workers(app, workers, hosts, port, paths, ssl_context,
+                         backlog, reuse_port, shutdown_timeout,
+                         make_handler_kwargs, uris, print)
+        finally:
+            loop.close()
+        return
+
+    handler = app.make_handler(**make_handler_kwargs)
+
+    loop.run_until_complete(app.startup())
+
+    server_creations = []
     if hosts:
         # Multiple hosts bound to same server is available in most loop
         # implementations, but only send multiple if we have multiple.
@@ -336,17 +586,7 @@ def run_app(app, *, host=None, port=None, path=None,
                 handler, path, ssl=ssl_context, backlog=backlog
             )
         )
-        uris.append('{}://unix:{}:'.format(scheme, path))
-
-        # Clean up prior socket path if stale and not abstract.
-        # CPython 3.5.3+'s event loop already does this. See
-        # https://github.com/python/asyncio/issues/425
-        if path[0] not in (0, '\x00'):  # pragma: no branch
-            try:
-                if stat.S_ISSOCK(os.stat(path).st_mode):
-                    os.remove(path)
-            except FileNotFoundError:
-                pass
+        _remove_stale_unix_socket(path)
 
     servers = loop.run_until_complete(
         asyncio.gather(*server_creations, loop=loop)
@@ -398,6 +638,18 @@ def main(argv):
         help="Unix file system path to serve on. Specifying a path will cause "
              "hostname and port arguments to be ignored.",
     )
+    arg_parser.add_argument(
+        "-w", "--workers",
+        help="Number of worker processes (default: %(default)r)",
+        type=int,
+        default=1
+    )
+    arg_parser.add_argument(
+        "--reuse-port",
+        help="Bind TCP/IP socket in every worker process with SO_REUSEPORT "
+             "instead of sharing a socket bound before forking workers.",
+        action="store_true"
+    )
     args, extra_argv = arg_parser.parse_known_args(argv)
 
     # Import logic
@@ -421,9 +673,15 @@ def main(argv):
     if args.path is not None and not hasattr(socket, 'AF_UNIX'):
         arg_parser.error("file system paths not supported by your operating"
                          " environment")
+    if args.workers < 1:
+        arg_parser.error("workers should be positive")
+    if args.workers > 1 and not hasattr(os, 'fork'):
+        arg_parser.error("workers not supported by your operating"
+                         " environment")
 
     app = func(extra_argv)
-    run_app(app, host=args.hostname, port=args.port, path=args.path)
+    run_app(app, host=args.hostname, port=args.port, path=args.path,
+            workers=args.workers, reuse_port=args.reuse_port)
     arg_parser.exit(message="Stopped\n")
 
 
@@ -5,10 +5,22 @@ from aiohttp.web_exceptions import HTTPMovedPermanently
 from aiohttp.web_urldispatcher import SystemRoute
 
 __all__ = (
+    'dynamic_middleware',
     'normalize_path_middleware',
 )
 
 
+def dynamic_middleware(factory):
+    """Mark middleware factory as dynamic.
+
+    Handlers built by a frozen application's middleware chain are
+    cached per route.  Factories marked as dynamic are called
+    for every request instead.
+    """
+    factory.__dynamic_middleware__ = True
+    return factory
+
+
 @asyncio.coroutine
 def _check_request_resolves(request, path):
     alt_request = request.clone(rel_url=path)
@@ -19,7 +19,7 @@ from yarl import URL
 from . import hdrs, multipart
 from .helpers import HeadersMixin, SimpleCookie, reify, sentinel
 from .protocol import (SERVER_SOFTWARE, HttpVersion10, HttpVersion11,
-                       PayloadWriter, calc_reason)
+                       PayloadWriter, calc_reason, encode_headers)
 
 __all__ = (
     'ContentCoding', 'BaseRequest', 'Request', 'StreamResponse', 'Response',
@@ -50,11 +50,13 @@ class BaseRequest(collections.MutableMapping, HeadersMixin):
                     hdrs.METH_TRACE, hdrs.METH_DELETE}
 
     def __init__(self, message, payload, protocol, time_service, task, *,
-                 loop=None, secure_proxy_ssl_header=None):
+                 loop=None, secure_proxy_ssl_header=None, writer=None):
         self._loop = loop
         self._message = message
         self._protocol = protocol
         self._transport = protocol.transport
+        # output slot of pipelined request
+        self._writer = writer if writer is not None else protocol.writer
         self._post = None
         self._post_files_cache = None
 
@@ -102,7 +104,8 @@ class BaseRequest(collections.MutableMapping, HeadersMixin):
             self._time_service,
             self._task,
             loop=self._loop,
-            secure_proxy_ssl_header=self._secure_proxy_ssl_header)
+            secure_proxy_ssl_header=self._secure_proxy_ssl_header,
+            writer=self._writer)
 
     @property
     def task(self):
@@ -819,7 +822,7 @@ class StreamResponse(HeadersMixin):
         version = request.version
 
         writer = self._payload_writer = PayloadWriter(
-            request._protocol.writer, request._loop)
+            request._writer, request._loop)
 
         headers = self.headers
         for cookie in self._cookies.values():
@@ -843,8 +846,6 @@ class StreamResponse(HeadersMixin):
                 headers[TRANSFER_ENCODING] = 'chunked'
 
         headers.setdefault(CONTENT_TYPE, 'application/octet-stream')
-        headers.setdefault(DATE, request.time_service.strtime())
-        headers.setdefault(SERVER, SERVER_SOFTWARE)
         if CONNECTION not in headers:
             if keep_alive:
                 if version == HttpVersion10:
@@ -853,10 +854,22 @@ class StreamResponse(HeadersMixin):
                 if version == HttpVersion11:
                     headers[CONNECTION] = 'close'
 
-        self._send_headers(version, headers, writer)
+        time_service = request.time_service
+        if DATE in headers or SERVER in headers:
+            headers.setdefault(DATE, time_service.strtime())
+            headers.setdefault(SERVER, SERVER_SOFTWARE)
+            self._send_headers(version, headers, writer)
+        else:
+            # splice pre-encoded Date and Server headers,
+            # keep them in headers for introspection and access log
+            self._send_headers(version, headers, writer,
+                               time_service.default_headers(SERVER_SOFTWARE))
+            headers[DATE] = time_service.strtime()
+            headers[SERVER] = SERVER_SOFTWARE
         return writer
 
-    def _send_headers(self, version, headers, writer, _sep=': ', _end='\r\n'):
+    def _send_headers(self, version, headers, writer, default_headers=b'',
+                      _sep=': ', _end='\r\n'):
         # Durty hack required for
         # https://github.com/KeepSafe/aiohttp/issues/1093
         # File sender may override it
@@ -865,10 +878,8 @@ class StreamResponse(HeadersMixin):
             version[0], version[1], self._status, self._reason)
 
         # status + headers
-        headers = status_line + ''.join(
-            [k + _sep + v + _end for k, v in headers.items()])
-        headers = headers.encode('utf-8') + b'\r\n'
-        writer.buffer_data(headers)
+        writer.buffer_data(encode_headers(
+            status_line, headers, default_headers, _sep=_sep, _end=_end))
 
     def write(self, data):
         assert isinstance(data, (bytes, bytearray, memoryview)), \
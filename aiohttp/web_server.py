@@ -152,7 +152,8 @@ class Server:
     def _make_request(self, message, payload, protocol):
         return BaseRequest(
             message, payload, protocol,
-            protocol.time_service, protocol._request_handler, loop=self._loop)
+            protocol.time_service, protocol._request_handler, loop=self._loop,
+            writer=protocol._get_request_writer())
 
     @asyncio.coroutine
     def shutdown(self, timeout=None):
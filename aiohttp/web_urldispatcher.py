@@ -2,6 +2,7 @@ import abc
 import asyncio
 import collections
 import inspect
+import itertools
 import keyword
 import os
 import re
@@ -266,6 +267,10 @@ class Resource(AbstractResource):
 
     @asyncio.coroutine
     def resolve(self, request):
+        return self._resolve(request)
+        yield  # pragma: no cover
+
+    def _resolve(self, request):
         allowed_methods = set()
 
         match_dict = self._match(request.rel_url.raw_path)
@@ -281,8 +286,6 @@ class Resource(AbstractResource):
         else:
             return None, allowed_methods
 
-        yield  # pragma: no cover
-
     def __len__(self):
         return len(self._routes)
 
@@ -442,6 +445,10 @@ class StaticResource(PrefixResource):
 
     @asyncio.coroutine
     def resolve(self, request):
+        return self._resolve(request)
+        yield  # pragma: no cover
+
+    def _resolve(self, request):
         path = request.rel_url.raw_path
         method = request.method
         allowed_methods = set(self._routes)
@@ -454,7 +461,6 @@ class StaticResource(PrefixResource):
         match_dict = {'filename': unquote(path[len(self._prefix)+1:])}
         return (UrlMappingMatchInfo(match_dict, self._routes[method]),
                 allowed_methods)
-        yield  # pragma: no cover
 
     def __len__(self):
         return len(self._routes)
@@ -547,8 +553,13 @@ class PrefixedSubAppResource(PrefixResource):
 
     def add_prefix(self, prefix):
         super().add_prefix(prefix)
-        for resource in self._app.router.resources():
+        router = self._app.router
+        for resource in router.resources():
             resource.add_prefix(prefix)
+        if router.frozen:
+            # sub-application was frozen before it got the new prefix,
+            # let the router rebuild its lookup structures
+            router.freeze()
 
     def url_for(self, *args, **kwargs):
         raise RuntimeError(".url_for() is not supported "
@@ -568,6 +579,16 @@ class PrefixedSubAppResource(PrefixResource):
         if not request.url.raw_path.startswith(self._prefix):
             return None, set()
         match_info = yield from self._app.router.resolve(request)
+        return self._add_app(match_info)
+
+    def _resolve(self, request):
+        # used only if sub-application router resolves synchronously
+        if not request.url.raw_path.startswith(self._prefix):
+            return None, set()
+        match_info = self._app.router._resolve(request)
+        return self._add_app(match_info)
+
+    def _add_app(self, match_info):
         match_info.add_app(self._app)
         if isinstance(match_info.http_exception, HTTPMethodNotAllowed):
             methods = match_info.http_exception.allowed_methods
@@ -706,6 +727,87 @@ class RoutesView(Sized, Iterable, Container):
         return route in self._routes
 
 
+class _IndexNode:
+    __slots__ = ('children', 'resources')
+
+    def __init__(self):
+        self.children = {}
+        self.resources = []
+
+
+class _ResourceIndex:
+    """Lookup structure for resolving built-in resources.
+
+    Dynamic and prefix resources are stored in a trie keyed by the
+    path segments they require literally, e.g. '/api/users/{id}' is
+    stored under 'api' -> 'users'.  Resources of unknown types are kept
+    in the root node and are always tried.  Candidates for plain
+    resources are computed once and looked up by exact path.
+
+    candidates() returns every resource that may match a path in
+    registration order, so the first registered resource still wins.
+    """
+
+    def __init__(self, resources):
+        plain = {}
+        self._root = _IndexNode()
+
+        for order, resource in enumerate(resources):
+            item = (order, resource)
+            tp = type(resource)
+            if tp is PlainResource:
+                plain.setdefault(resource._path, []).append(item)
+                continue
+            elif tp is DynamicResource:
+                formatter = resource._formatter
+                pos = formatter.find('{')
+                literal = formatter[:pos] if pos >= 0 else ''
+            elif tp is StaticResource or tp is PrefixedSubAppResource:
+                literal = resource._prefix
+            else:
+                literal = ''
+
+            node = self._root
+            # only segments followed by a slash are required literally
+            for segment in literal.split('/')[1:-1]:
+                child = node.children.get(segment)
+                if child is None:
+                    child = node.children[segment] = _IndexNode()
+                node = child
+            node.resources.append(item)
+
+        self._plain = {path: self._lookup(path, items)
+                       for path, items in plain.items()}
+
+    def _lookup(self, path, plain):
+        found = [plain] if plain else []
+
+        node = self._root
+        if node.resources:
+            found.append(node.resources)
+        segments = path.split('/')
+        for segment in itertools.islice(segments, 1, len(segments) - 1):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.resources:
+                found.append(node.resources)
+
+        if not found:
+            return ()
+        elif len(found) == 1:
+            return [resource for _, resource in found[0]]
+        else:
+            return [resource for _, resource in
+                    sorted(itertools.chain.from_iterable(found))]
+
+    def candidates(self, path):
+        resources = self._plain.get(path)
+        if resources is None:
+            resources = self._lookup(path, None)
+        return resources
+
+
 class UrlDispatcher(AbstractRouter, collections.abc.Mapping):
 
     DYN = re.compile(r'\{(?P<var>[_a-zA-Z][_a-zA-Z0-9]*)\}')
@@ -719,13 +821,23 @@ class UrlDispatcher(AbstractRouter, collections.abc.Mapping):
         super().__init__()
         self._resources = []
         self._named_resources = {}
+        self._index = None
+        self._sync = False
 
     @asyncio.coroutine
     def resolve(self, request):
+        if self._sync:
+            return self._resolve(request)
+
         method = request.method
         allowed_methods = set()
 
-        for resource in self._resources:
+        if self._index is not None:
+            resources = self._index.candidates(request.rel_url.raw_path)
+        else:
+            resources = self._resources
+
+        for resource in resources:
             match_dict, allowed = yield from resource.resolve(request)
             if match_dict is not None:
                 return match_dict
@@ -738,6 +850,25 @@ class UrlDispatcher(AbstractRouter, collections.abc.Mapping):
             else:
                 return MatchInfoError(HTTPNotFound())
 
+    def _resolve(self, request):
+        # same as resolve() for frozen routers with built-in resources only,
+        # doesn't drive a coroutine per tried resource
+        method = request.method
+        allowed_methods = set()
+
+        for resource in self._index.candidates(request.rel_url.raw_path):
+            match_dict, allowed = resource._resolve(request)
+            if match_dict is not None:
+                return match_dict
+            else:
+                allowed_methods |= allowed
+        else:
+            if allowed_methods:
+                return MatchInfoError(HTTPMethodNotAllowed(method,
+                                                           allowed_methods))
+            else:
+                return MatchInfoError(HTTPNotFound())
+
     def __iter__(self):
         return iter(self._named_resources)
 
@@ -893,3 +1024,19 @@ class UrlDispatcher(AbstractRouter, collections.abc.Mapping):
         super().freeze()
         for resource in self._resources:
             resource.freeze()
+        self._index = _ResourceIndex(self._resources)
+        self._sync = all(_has_sync_resolve(resource)
+                         for resource in self._resources)
+
+
+def _has_sync_resolve(resource):
+    # built-in resources implement resolve() on top of synchronous
+    # _resolve(), subclasses overriding resolve() must be awaited
+    resolve = type(resource).resolve
+    if resolve is Resource.resolve or resolve is StaticResource.resolve:
+        return True
+    elif resolve is PrefixedSubAppResource.resolve:
+        router = resource._app.router
+        return isinstance(router, UrlDispatcher) and router._sync
+    else:
+        return False
@@ -4,21 +4,26 @@ import sys
 from collections import namedtuple
 
 from . import hdrs
-from ._ws_impl import (CLOSED_MESSAGE, CLOSING_MESSAGE,
-                       WebSocketError, WebSocketReader,
-                       WSMessage, WSMsgType, do_handshake)
+from ._ws_impl import (CLOSED_MESSAGE, CLOSING_MESSAGE, COMPRESS_THRESHOLD,
+                       MAX_MSG_SIZE, WebSocketError, WebSocketReader,
+                       WSCloseCode, WSMessage, WSMsgType, build_frame,
+                       do_handshake, write_buffer_limits)
 from .errors import ClientDisconnectedError, HttpProcessingError
 from .helpers import create_future
-from .streams import FlowControlDataQueue
+from .streams import EofStream, FlowControlDataQueue, StreamSlot
 from .web_exceptions import (HTTPBadRequest, HTTPInternalServerError,
                              HTTPMethodNotAllowed)
 from .web_reqrep import StreamResponse
 
-__all__ = ('WebSocketResponse', 'WebSocketReady', 'MsgType', 'WSMsgType',)
+__all__ = ('WebSocketResponse', 'WebSocketReady', 'MsgType', 'WSMsgType',
+           'BroadcastResult', 'broadcast')
 
 PY_35 = sys.version_info >= (3, 5)
 PY_352 = sys.version_info >= (3, 5, 2)
 
+if PY_35:
+    from .streams import AsyncStreamIterator
+
 THRESHOLD_CONNLOST_ACCESS = 5
 
 
@@ -36,9 +41,18 @@ class WebSocketResponse(StreamResponse):
     def __init__(self, *,
                  timeout=10.0, receive_timeout=None,
                  autoclose=True, autoping=True, heartbeat=None,
-                 protocols=()):
+                 protocols=(), compress=False,
+                 compress_threshold=COMPRESS_THRESHOLD,
+                 high_water=None, low_water=None, overflow='wait',
+                 max_msg_size=MAX_MSG_SIZE):
         super().__init__(status=101)
+        self._high_water, self._low_water = write_buffer_limits(
+            high_water, low_water, overflow)
+        self._overflow = overflow
         self._protocols = protocols
+        self._compress = compress
+        self._compress_threshold = compress_threshold
+        self._max_msg_size = max_msg_size
         self._ws_protocol = None
         self._writer = None
         self._reader = None
@@ -91,6 +105,16 @@ class WebSocketResponse(StreamResponse):
         if self._req is not None:
             self._req.transport.close()
 
+    def _close_overflowed(self):
+        # client does not read messages fast enough
+        self._cancel_heartbeat()
+        self._closed = True
+        self._close_code = WSCloseCode.TRY_AGAIN_LATER
+        self._writer.close(WSCloseCode.TRY_AGAIN_LATER)
+
+        if self._req is not None:
+            self._req.transport.close()
+
     @asyncio.coroutine
     def prepare(self, request):
         # make pre-check to don't hide it by do_handshake() exceptions
@@ -100,15 +124,20 @@ class WebSocketResponse(StreamResponse):
 
         protocol, writer = self._pre_start(request)
         payload_writer = yield from super().prepare(request)
-        self._post_start(request, protocol, writer)
         yield from payload_writer.drain()
+        # frames are written to the transport directly, previous
+        # pipelined responses and the handshake have to be sent first
+        if isinstance(request._writer, StreamSlot):
+            yield from request._writer.wait_active()
+        self._post_start(request, protocol, writer)
         return payload_writer
 
     def _pre_start(self, request):
         try:
             status, headers, _, writer, protocol = do_handshake(
                 request.method, request.headers, request._protocol.writer,
-                self._protocols)
+                self._protocols, compress=self._compress,
+                compress_threshold=self._compress_threshold)
         except HttpProcessingError as err:
             if err.code == 405:
                 raise HTTPMethodNotAllowed(
@@ -119,7 +148,6 @@ class WebSocketResponse(StreamResponse):
                 raise HTTPInternalServerError() from err
 
         self._time_service = request.time_service
-        self._reset_heartbeat()
 
         if self.status != status:
             self.set_status(status)
@@ -132,9 +160,16 @@ class WebSocketResponse(StreamResponse):
         self._ws_protocol = protocol
         self._loop = request.app.loop
         self._writer = writer
+        self._reset_heartbeat()
+        if self._high_water is not None:
+            writer.set_write_buffer_limits(
+                self._high_water, self._low_water, self._overflow,
+                on_overflow=self._close_overflowed, loop=self._loop)
         self._reader = FlowControlDataQueue(
             request._protocol, limit=2 ** 16, loop=self._loop)
-        request.protocol.set_parser(WebSocketReader(self._reader))
+        request.protocol.set_parser(WebSocketReader(
+            self._reader, compress=bool(writer.compress),
+            max_msg_size=self._max_msg_size))
 
     def can_prepare(self, request):
         if self._writer is not None:
@@ -160,6 +195,12 @@ class WebSocketResponse(StreamResponse):
     def ws_protocol(self):
         return self._ws_protocol
 
+    @property
+    def dropped_frames(self):
+        if self._writer is None:
+            return 0
+        return self._writer.dropped
+
     def exception(self):
         return self._exception
 
@@ -335,6 +376,47 @@ class WebSocketResponse(StreamResponse):
         data = yield from self.receive_str(timeout=timeout)
         return loads(data)
 
+    @asyncio.coroutine
+    def receive_many(self, max_messages=64, timeout=None):
+        """Receive up to max_messages messages.
+
+        Waits for the first message like receive(), messages already
+        received are taken from the queue at once.  Returns a list of
+        messages, closing or error message is the last one.
+        """
+        if self._reader is None:
+            raise RuntimeError('Call .prepare() first')
+        if max_messages < 1:
+            raise ValueError('max_messages should be positive, got {!r}'
+                             .format(max_messages))
+
+        msg = yield from self.receive(timeout)
+        batch = [msg]
+        if msg.type in (WSMsgType.CLOSE, WSMsgType.CLOSING,
+                        WSMsgType.CLOSED, WSMsgType.ERROR):
+            return batch
+
+        for msg in self._reader.read_nowait(max_messages - 1):
+            if msg.type == WSMsgType.CLOSE:
+                self._closing = True
+                self._close_code = msg.data
+                batch.append(msg)
+                if not self._closed and self._autoclose:
+                    yield from self.close()
+                break
+            elif msg.type == WSMsgType.CLOSING:
+                self._closing = True
+                batch.append(msg)
+                break
+            elif msg.type == WSMsgType.PING and self._autoping:
+                self.pong(msg.data)
+            elif msg.type == WSMsgType.PONG and self._autoping:
+                pass
+            else:
+                batch.append(msg)
+
+        return batch
+
     def write(self, data):
         raise RuntimeError("Cannot call .write() for websocket")
 
@@ -353,3 +435,101 @@ class WebSocketResponse(StreamResponse):
                             WSMsgType.CLOSED):
                 raise StopAsyncIteration  # NOQA
             return msg
+
+        @asyncio.coroutine
+        def _receive_batch(self, max_messages):
+            batch = yield from self.receive_many(max_messages)
+            if batch[-1].type in (WSMsgType.CLOSE,
+                                  WSMsgType.CLOSING,
+                                  WSMsgType.CLOSED):
+                batch.pop()
+            if not batch:
+                raise EofStream
+            return batch
+
+        def iter_batches(self, max_messages=64):
+            """Returns an asynchronous iterator over lists of messages.
+
+            See receive_many(), iteration stops when websocket is closing.
+            """
+            return AsyncStreamIterator(
+                lambda: self._receive_batch(max_messages))
+
+
+class BroadcastResult(namedtuple('BroadcastResult', 'skipped pending')):
+    """Result of broadcast().
+
+    skipped is a list of websockets the message was not sent to,
+    pending is a list of websockets whose write buffer limit was
+    exceeded by the message, await their drain() to wait for flushing.
+    """
+
+
+def _is_closing(transport):
+    try:
+        return transport.is_closing()
+    except AttributeError:  # pragma: no cover
+        # transports don't support is_closing() before Python 3.5.1
+        return False
+
+
+def broadcast(websockets, data):
+    """Send data to many websockets.
+
+    str is sent as text message, bytes-like object as binary message.
+    The message is encoded and framed once and the same bytes object is
+    written to every websocket without compression.  For websockets
+    with negotiated compression the message is compressed and framed
+    separately, compressor state is per connection.
+
+    Websockets which are not prepared, closed or closing are skipped.
+    So are websockets with 'wait' overflow policy and more data than
+    high watermark or write buffer limit not sent yet, for other
+    policies the message is handled according to the policy.
+
+    Returns BroadcastResult with skipped websockets and websockets which
+    have to be drained.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+        opcode = WSMsgType.TEXT
+    elif isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data)
+        opcode = WSMsgType.BINARY
+    else:
+        raise TypeError('data argument must be str or byte-ish (%r)' %
+                        type(data))
+
+    frame = None
+    skipped = []
+    pending = []
+    for ws in websockets:
+        writer = ws._writer
+        if writer is None or ws._closed or ws._closing:
+            skipped.append(ws)
+            continue
+        transport = writer.writer
+        if _is_closing(transport):
+            skipped.append(ws)
+            continue
+        limit = None
+        if writer._overflow == 'wait':
+            limit = writer._high_water
+            if limit is None:
+                limit = writer._limit
+            if transport.get_write_buffer_size() > limit:
+                skipped.append(ws)
+                continue
+
+        # drain() is not called here, caller drains pending websockets
+        if writer.compress:
+            writer._put_message(data, opcode)
+        else:
+            if frame is None:
+                frame = build_frame(data, opcode)
+            writer._put_frame(frame)
+
+        if limit is not None and transport.get_write_buffer_size() > limit:
+            pending.append(ws)
+
+    return BroadcastResult(skipped, pending)
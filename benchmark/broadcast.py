@@ -0,0 +1,146 @@
+"""Websocket broadcast benchmark.
+
+Opens many websocket connections to a local server from a separate
+process and sends the same text message to all of them by calling
+WebSocketResponse.send_str() for each websocket and by web.broadcast().
+Measures time spent by the server in the send call and time until all
+messages are flushed to the sockets.
+
+Run with python3 benchmark/broadcast.py [-c CONNECTIONS] [-n ROUNDS]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import resource
+import time
+
+from aiohttp import web
+
+
+HANDSHAKE = (b'GET / HTTP/1.1\r\n'
+             b'Host: localhost\r\n'
+             b'Upgrade: websocket\r\n'
+             b'Connection: Upgrade\r\n'
+             b'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n'
+             b'Sec-WebSocket-Version: 13\r\n\r\n')
+
+
+def raise_nofile_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+class Client(asyncio.Protocol):
+    """Websocket client discarding everything it receives."""
+
+    def connection_made(self, transport):
+        transport.write(HANDSHAKE)
+
+    def data_received(self, data):
+        pass
+
+
+def clients(port, connections, done):
+    raise_nofile_limit()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(None)
+
+    @asyncio.coroutine
+    def connect():
+        # small batches do not overflow listen backlog
+        for i in range(0, connections, 100):
+            yield from asyncio.gather(
+                *[loop.create_connection(Client, '127.0.0.1', port)
+                  for _ in range(min(100, connections - i))], loop=loop)
+        yield from loop.run_in_executor(None, done.wait)
+
+    loop.run_until_complete(connect())
+    loop.close()
+
+
+def send_str(sockets, message):
+    for ws in sockets:
+        ws.send_str(message)
+
+
+def broadcast(sockets, message):
+    web.broadcast(sockets, message)
+
+
+@asyncio.coroutine
+def flushed(loop, sockets):
+    transports = [ws._writer.writer for ws in sockets]
+    while any(t.get_write_buffer_size() for t in transports):
+        yield from asyncio.sleep(0.001, loop=loop)
+
+
+def bench(loop, sockets, send, message, rounds):
+    send_time = total_time = 0.0
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        send(sockets, message)
+        t1 = time.perf_counter()
+        loop.run_until_complete(flushed(loop, sockets))
+        t2 = time.perf_counter()
+        send_time += t1 - t0
+        total_time += t2 - t0
+    return send_time / rounds, total_time / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-c', '--connections', type=int, default=10000,
+                        help='number of websocket connections')
+    parser.add_argument('-n', '--rounds', type=int, default=20,
+                        help='messages sent to every connection')
+    parser.add_argument('-s', '--size', type=int, default=100,
+                        help='message size')
+    args = parser.parse_args()
+
+    raise_nofile_limit()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(None)
+    sockets = []
+
+    @asyncio.coroutine
+    def handler(request):
+        ws = web.WebSocketResponse(autoping=False)
+        yield from ws.prepare(request)
+        sockets.append(ws)
+        yield from ws.receive()
+        return ws
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/', handler)
+    handler = app.make_handler(access_log=None)
+    server = loop.run_until_complete(
+        loop.create_server(handler, '127.0.0.1', 0, backlog=1024))
+    port = server.sockets[0].getsockname()[1]
+
+    done = multiprocessing.Event()
+    proc = multiprocessing.Process(target=clients,
+                                   args=(port, args.connections, done))
+    proc.start()
+    while len(sockets) < args.connections:
+        loop.run_until_complete(asyncio.sleep(0.1, loop=loop))
+
+    message = 'x' * args.size
+    for name, send in (('send_str', send_str), ('broadcast', broadcast)):
+        send_time, total_time = bench(loop, sockets, send, message,
+                                      args.rounds)
+        print('{:10} send {:8.2f} ms  flushed {:8.2f} ms  '
+              '{:10.0f} msg/s'.format(name, send_time * 1000,
+                                      total_time * 1000,
+                                      args.connections / total_time))
+
+    done.set()
+    proc.join()
+    server.close()
+    loop.run_until_complete(server.wait_closed())
+    loop.run_until_complete(handler.shutdown(1.0))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
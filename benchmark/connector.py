@@ -0,0 +1,90 @@
+"""Connection pool stress benchmark.
+
+Starts thousands of concurrent BaseConnector.connect() calls spread
+over many hosts against a small pool, so that most of them wait for a
+free slot, and measures how fast connections are handed over.
+Connections are fake: establishing one takes a single loop iteration.
+
+Run with python3 benchmark/connector.py [-n REQUESTS] [--hosts HOSTS]
+"""
+
+import argparse
+import asyncio
+import time
+from unittest import mock
+
+from yarl import URL
+
+import aiohttp
+from aiohttp.client_reqrep import ClientRequest
+
+
+class FakeTransport:
+
+    def close(self):
+        pass
+
+
+class FakeProtocol:
+
+    should_close = False
+    writer = None
+
+    def is_connected(self):
+        return True
+
+
+class FakeConnector(aiohttp.BaseConnector):
+
+    @asyncio.coroutine
+    def _create_connection(self, req):
+        yield
+        return FakeTransport(), FakeProtocol()
+
+
+def bench(loop, requests, hosts, capacity, limit_per_host):
+    connector = FakeConnector(loop=loop, capacity=capacity,
+                              limit_per_host=limit_per_host)
+    response_class = mock.Mock(_should_close=False)
+    reqs = [ClientRequest('GET', URL('http://host{}:80/'.format(i)),
+                          response_class=response_class, loop=loop)
+            for i in range(hosts)]
+
+    @asyncio.coroutine
+    def request(req):
+        conn = yield from connector.connect(req)
+        yield
+        conn.release()
+
+    t0 = time.perf_counter()
+    loop.run_until_complete(asyncio.gather(
+        *[request(reqs[i % hosts]) for i in range(requests)], loop=loop))
+    elapsed = time.perf_counter() - t0
+    connector.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--requests', type=int, default=20000,
+                        help='number of concurrent connect() calls')
+    parser.add_argument('--hosts', type=int, default=100,
+                        help='number of distinct hosts')
+    parser.add_argument('--capacity', type=int, default=100,
+                        help='total connection limit')
+    parser.add_argument('--limit-per-host', type=int, default=2,
+                        help='per host connection limit, 0 for none')
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(None)
+    for limit_per_host in sorted({0, args.limit_per_host}):
+        elapsed = bench(loop, args.requests, args.hosts, args.capacity,
+                        limit_per_host)
+        print('limit_per_host={:<3} {:8.3f} s  {:10.0f} connect/s'.format(
+            limit_per_host, elapsed, args.requests / elapsed))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Idle connection pool benchmark.
+
+Fills BaseConnector's pool with keep-alive connections released evenly
+over keepalive_timeout seconds, five per host, then advances a fake
+clock second by second and measures how long single keep-alive
+cleanup callbacks block the event loop.
+
+Run with python3 benchmark/pool.py [-s SIZE [SIZE ...]]
+"""
+
+import argparse
+import asyncio
+import time
+from unittest import mock
+
+import aiohttp
+
+
+KEEPALIVE_TIMEOUT = 15
+
+
+class FakeTransport:
+
+    def close(self):
+        pass
+
+
+class FakeProtocol:
+
+    should_close = False
+
+    def is_connected(self):
+        return True
+
+
+class FakeTimeService:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def loop_time(self):
+        return self.now
+
+    def call_later(self, delay, callback, *args):
+        return mock.Mock()
+
+
+def bench(loop, size, per_host=5):
+    time_service = FakeTimeService()
+    connector = aiohttp.BaseConnector(loop=loop, time_service=time_service,
+                                      keepalive_timeout=KEEPALIVE_TIMEOUT)
+    stalls = []
+    cleanup = connector._cleanup
+
+    def timed_cleanup():
+        t0 = time.perf_counter()
+        cleanup()
+        stalls.append(time.perf_counter() - t0)
+
+    connector._cleanup = timed_cleanup
+    req = mock.Mock(response=None)
+
+    def release(i):
+        key = ('host{}'.format(i // per_host), 80, False)
+        connector._release(key, req, FakeTransport(), FakeProtocol())
+
+    # spread releases over keepalive_timeout
+    for i in range(size):
+        time_service.now = KEEPALIVE_TIMEOUT * i / size
+        release(i)
+
+    # every second a part of pool expires and the same number of
+    # connections is released again
+    released = size
+    for tick in range(1, 2 * KEEPALIVE_TIMEOUT + 1):
+        time_service.now = KEEPALIVE_TIMEOUT + tick
+        connector._cleanup()
+        # let batched cleanup continue
+        for _ in range(1000):
+            if not isinstance(connector._cleanup_handle, asyncio.Handle):
+                break
+            loop.run_until_complete(asyncio.sleep(0, loop=loop))
+        for _ in range(size // KEEPALIVE_TIMEOUT):
+            release(released)
+            released += 1
+
+    connector.close()
+    return max(stalls), sum(stalls) / (2 * KEEPALIVE_TIMEOUT)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', '--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000],
+                        help='numbers of idle connections')
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(None)
+    print('{:>8} {:>14} {:>18}'.format(
+        'pool', 'max stall, ms', 'cleanup ms/second'))
+    for size in args.sizes:
+        stall, per_second = bench(loop, size)
+        print('{:8} {:14.3f} {:18.3f}'.format(
+            size, stall * 1000, per_second * 1000))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
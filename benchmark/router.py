@@ -0,0 +1,101 @@
+"""Route resolution benchmark.
+
+Compares linear lookup (not frozen router), indexed lookup
+driving a coroutine per tried resource and indexed synchronous lookup
+(frozen router) for growing number of registered routes.
+
+Routes of 'api' layout are dynamic or plain routes under distinct
+literal prefixes ('/api/v1/res1/{id}'), 'root' layout dynamic routes
+start with a variable part ('/{id}/res1') and can't be indexed.
+
+Run with python3 benchmark/router.py [-n REPEAT]
+"""
+
+import argparse
+import asyncio
+import timeit
+
+from aiohttp import web
+from aiohttp.test_utils import make_mocked_request
+
+LAYOUTS = {
+    'api': ('/api/v1/res{}', '/api/v1/res{}/{{id}}', '/api/v1/res{}/1'),
+    'root': ('/api/v1/res{}', '/{{id}}/res{}', '/1/res{}'),
+}
+
+
+@asyncio.coroutine
+def handler(request):
+    return web.Response()  # pragma: no cover
+
+
+def make_router(count, layout):
+    plain, dynamic, _ = LAYOUTS[layout]
+    router = web.UrlDispatcher()
+    for i in range(count):
+        if i % 2:
+            router.add_route('GET', dynamic.format(i), handler)
+        else:
+            router.add_route('GET', plain.format(i), handler)
+    return router
+
+
+def resolve(router, request):
+    # resolve() never suspends for built-in resources,
+    # drive it without event loop overhead
+    coro = router.resolve(request)
+    try:
+        coro.send(None)
+    except StopIteration as exc:
+        return exc.value
+    else:  # pragma: no cover
+        raise RuntimeError('resolve() was suspended')
+
+
+def bench(router, path, number):
+    request = make_mocked_request('GET', path)
+    return min(timeit.repeat(lambda: resolve(router, request),
+                             number=number, repeat=3)) / number * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Router benchmark')
+    parser.add_argument('-n', '--number', type=int, default=2000,
+                        help='resolves per measurement')
+    parser.add_argument('-r', '--routes', type=int, nargs='+',
+                        default=[10, 100, 600, 1000],
+                        help='number of routes to register')
+    parser.add_argument('-l', '--layout', choices=sorted(LAYOUTS),
+                        nargs='+', default=sorted(LAYOUTS),
+                        help='routes layout')
+    args = parser.parse_args(argv)
+
+    print('{:>6} {:>7} {:>6} {:>12} {:>12} {:>12} {:>8}'.format(
+        'layout', 'routes', 'case', 'linear, us', 'indexed, us', 'sync, us',
+        'speedup'))
+    for layout in args.layout:
+        plain, _, dynamic = LAYOUTS[layout]
+        for count in args.routes:
+            last = count - 1
+            cases = [
+                ('first', plain.format(0)),
+                ('last', (dynamic if last % 2 else plain).format(last)),
+                ('404', '/api/v2/unknown'),
+            ]
+            linear = make_router(count, layout)
+            indexed = make_router(count, layout)
+            indexed.freeze()
+            indexed._sync = False
+            sync = make_router(count, layout)
+            sync.freeze()
+            for name, path in cases:
+                t1 = bench(linear, path, args.number)
+                t2 = bench(indexed, path, args.number)
+                t3 = bench(sync, path, args.number)
+                print('{:>6} {:>7} {:>6} {:>12.2f} {:>12.2f} {:>12.2f} '
+                      '{:>7.1f}x'.format(layout, count, name,
+                                         t1, t2, t3, t1 / t3))
+
+
+if __name__ == '__main__':
+    main()
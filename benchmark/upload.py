@@ -0,0 +1,113 @@
+"""File upload benchmark.
+
+Uploads a large temporary file to a local server by ClientSession with
+os.sendfile() and with reads in executor (AIOHTTP_NOSENDFILE set) and
+measures throughput and the longest event loop stall seen by a ticker
+task running next to the upload.
+
+Run with python3 benchmark/upload.py [-s MEGABYTES] [-n REQUESTS]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import aiohttp
+
+
+class Sink(asyncio.Protocol):
+    """Minimal HTTP server discarding request bodies."""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.buf = b''
+        self.length = None
+
+    def data_received(self, data):
+        if self.length is None:
+            self.buf += data
+            head, sep, data = self.buf.partition(b'\r\n\r\n')
+            if not sep:
+                return
+            self.buf = b''
+            for line in head.split(b'\r\n')[1:]:
+                name, _, value = line.partition(b':')
+                if name.strip().lower() == b'content-length':
+                    self.length = int(value)
+        self.length -= len(data)
+        if self.length <= 0:
+            self.length = None
+            self.transport.write(b'HTTP/1.1 200 OK\r\n'
+                                 b'Content-Length: 0\r\n\r\n')
+
+
+def bench(loop, port, fname, requests, sendfile):
+    if sendfile:
+        os.environ.pop('AIOHTTP_NOSENDFILE', None)
+    else:
+        os.environ['AIOHTTP_NOSENDFILE'] = '1'
+    url = 'http://127.0.0.1:{}/'.format(port)
+    stall = 0.0
+    done = False
+
+    @asyncio.coroutine
+    def ticker():
+        nonlocal stall
+        while not done:
+            t0 = loop.time()
+            yield from asyncio.sleep(0.001, loop=loop)
+            stall = max(stall, loop.time() - t0 - 0.001)
+
+    @asyncio.coroutine
+    def upload(session):
+        nonlocal done
+        for _ in range(requests):
+            with open(fname, 'rb') as f:
+                resp = yield from session.post(url, data=f)
+                yield from resp.read()
+        done = True
+
+    with aiohttp.ClientSession(loop=loop) as session:
+        t0 = time.perf_counter()
+        loop.run_until_complete(asyncio.gather(
+            ticker(), upload(session), loop=loop))
+        elapsed = time.perf_counter() - t0
+    return elapsed, stall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', '--size', type=int, default=64,
+                        help='file size in megabytes')
+    parser.add_argument('-n', '--requests', type=int, default=10,
+                        help='number of uploads')
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(None)
+    server = loop.run_until_complete(
+        loop.create_server(Sink, '127.0.0.1', 0))
+    port = server.sockets[0].getsockname()[1]
+
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(os.urandom(1024 * 1024) * args.size)
+        f.flush()
+        modes = [False]
+        if hasattr(os, 'sendfile'):
+            modes.append(True)
+        for sendfile in modes:
+            elapsed, stall = bench(loop, port, f.name, args.requests,
+                                   sendfile)
+            print('{:9} {:8.1f} MB/s  max loop stall {:8.3f} ms'.format(
+                'sendfile' if sendfile else 'executor',
+                args.size * args.requests / elapsed, stall * 1000))
+
+    server.close()
+    loop.run_until_complete(server.wait_closed())
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Websocket frame parser benchmark.
+
+Feeds a stream of masked frames to the pure python and the compiled
+WebSocketReader in reads of the given size and measures messages per
+second for small and large frames.
+
+Run with python3 benchmark/websocket.py [-n MESSAGES] [-r READ_SIZE]
+"""
+
+import argparse
+import time
+
+from aiohttp import _ws_impl
+from aiohttp._ws_impl import WebSocketWriter
+
+
+class FakeTransport:
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def write(self, data):
+        self.buf.extend(data)
+
+
+class FakeStream:
+
+    def __init__(self):
+        self.transport = FakeTransport()
+
+    def drain(self):
+        pass
+
+
+class FakeQueue:
+
+    def __init__(self):
+        self.count = 0
+
+    def feed_data(self, data, size):
+        self.count += 1
+
+
+def build_stream(size, messages):
+    stream = FakeStream()
+    writer = WebSocketWriter(stream, use_mask=True)
+    message = b'x' * size
+    for _ in range(messages):
+        writer.send(message, binary=True)
+    return bytes(stream.transport.buf)
+
+
+def bench(reader_cls, data, read_size, messages):
+    queue = FakeQueue()
+    reader = reader_cls(queue)
+    chunks = [data[i:i + read_size] for i in range(0, len(data), read_size)]
+    t0 = time.perf_counter()
+    for chunk in chunks:
+        reader.feed_data(chunk)
+    elapsed = time.perf_counter() - t0
+    assert queue.count == messages
+    return messages / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--messages', type=int, default=100000,
+                        help='number of small messages')
+    parser.add_argument('-r', '--read-size', type=int, default=65536,
+                        help='bytes passed to feed_data() at once')
+    args = parser.parse_args()
+
+    readers = [('python', _ws_impl.WebSocketReaderPy)]
+    if hasattr(_ws_impl, 'WebSocketReaderC'):
+        readers.append(('cython', _ws_impl.WebSocketReaderC))
+    else:
+        print('compiled reader is not available')
+
+    for size, messages in ((100, args.messages),
+                           (64 * 1024, args.messages // 100 or 1)):
+        data = build_stream(size, messages)
+        for name, reader_cls in readers:
+            rate = bench(reader_cls, data, args.read_size, messages)
+            print('{:6} {:>7} byte frames {:12.0f} msg/s'.format(
+                name, size, rate))
+
+
+if __name__ == '__main__':
+    main()
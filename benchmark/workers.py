@@ -0,0 +1,138 @@
+"""Multi-process server benchmark.
+
+Serves a hello-world application by run_app() with growing number of
+worker processes and measures requests per second made by a pool of
+client processes over keep-alive connections.
+
+Run with python3 benchmark/workers.py [-w 1 2 4] [-c CLIENTS] [-t SECONDS]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+import aiohttp
+from aiohttp import web
+
+
+def find_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(('127.0.0.1', 0))
+    host, port = s.getsockname()
+    s.close()
+    return port
+
+
+def serve(port, workers, reuse_port):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    @asyncio.coroutine
+    def hello(request):
+        return web.Response(text='Hello, world')
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/', hello)
+    web.run_app(app, host='127.0.0.1', port=port, workers=workers,
+                reuse_port=reuse_port, access_log=None,
+                print=lambda *args: None)
+
+
+def attack(port, duration, concurrency, counts):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    url = 'http://127.0.0.1:{}/'.format(port)
+    count = 0
+
+    @asyncio.coroutine
+    def bomb(session, end):
+        nonlocal count
+        while loop.time() < end:
+            resp = yield from session.get(url)
+            yield from resp.read()
+            count += 1
+
+    @asyncio.coroutine
+    def run():
+        connector = aiohttp.TCPConnector(loop=loop, limit=concurrency)
+        with aiohttp.ClientSession(connector=connector, loop=loop) as session:
+            end = loop.time() + duration
+            yield from asyncio.gather(
+                *[bomb(session, end) for _ in range(concurrency)], loop=loop)
+
+    loop.run_until_complete(run())
+    loop.close()
+    counts.put(count)
+
+
+def wait_server(port, timeout=10):
+    end = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return
+        except OSError:
+            if time.monotonic() > end:
+                raise
+            time.sleep(0.1)
+
+
+def bench(workers, clients, duration, concurrency, reuse_port):
+    port = find_port()
+    server = multiprocessing.Process(target=serve,
+                                     args=(port, workers, reuse_port))
+    server.start()
+    try:
+        wait_server(port)
+        # let all workers start
+        time.sleep(0.5)
+
+        counts = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=attack,
+                                         args=(port, duration,
+                                               concurrency, counts))
+                 for _ in range(clients)]
+        for proc in procs:
+            proc.start()
+        total = sum(counts.get() for _ in procs)
+        for proc in procs:
+            proc.join()
+    finally:
+        os.kill(server.pid, signal.SIGTERM)
+        server.join()
+    return total / duration
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-w', '--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, cpus // 2 or 1}),
+                        help='numbers of worker processes to try')
+    parser.add_argument('-c', '--clients', type=int, default=cpus // 2 or 1,
+                        help='number of client processes')
+    parser.add_argument('-n', '--concurrency', type=int, default=32,
+                        help='concurrent requests per client process')
+    parser.add_argument('-t', '--duration', type=float, default=5.0,
+                        help='seconds per measurement')
+    parser.add_argument('--reuse-port', action='store_true',
+                        help='bind socket in every worker with SO_REUSEPORT')
+    args = parser.parse_args()
+
+    print('{} CPUs, {} client processes'.format(cpus, args.clients))
+    base = None
+    for workers in args.workers:
+        rps = bench(workers, args.clients, args.duration,
+                    args.concurrency, args.reuse_port)
+        if base is None:
+            base = rps
+        print('{:3} workers: {:10.0f} req/s  x{:.2f}'.format(
+            workers, rps, rps / base))
+
+
+if __name__ == '__main__':
+    main()
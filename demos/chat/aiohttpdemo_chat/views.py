@@ -21,28 +21,26 @@ async def index(request):
     log.info('%s joined.', name)
     resp.send_str(json.dumps({'action': 'connect',
                               'name': name}))
-    for ws in request.app['sockets'].values():
-        ws.send_str(json.dumps({'action': 'join',
-                                'name': name}))
+    web.broadcast(request.app['sockets'].values(),
+                  json.dumps({'action': 'join', 'name': name}))
     request.app['sockets'][name] = resp
 
     while True:
         msg = await resp.receive()
 
         if msg.type == web.MsgType.text:
-            for ws in request.app['sockets'].values():
-                if ws is not resp:
-                    ws.send_str(json.dumps({'action': 'sent',
-                                            'name': name,
-                                            'text': msg.data}))
+            web.broadcast([ws for ws in request.app['sockets'].values()
+                           if ws is not resp],
+                          json.dumps({'action': 'sent',
+                                      'name': name,
+                                      'text': msg.data}))
         else:
             break
 
     del request.app['sockets'][name]
     log.info('%s disconnected.', name)
-    for ws in request.app['sockets'].values():
-        ws.send_str(json.dumps({'action': 'disconnect',
-                                'name': name}))
+    web.broadcast(request.app['sockets'].values(),
+                  json.dumps({'action': 'disconnect', 'name': name}))
     return resp
 
 
@@ -17,7 +17,9 @@ except ImportError:
 
 ext = '.pyx' if USE_CYTHON else '.c'
 
-extensions = [Extension('aiohttp._websocket', ['aiohttp/_websocket' + ext])]
+extensions = [Extension('aiohttp._websocket', ['aiohttp/_websocket' + ext]),
+              Extension('aiohttp._http_parser',
+                        ['aiohttp/_http_parser' + ext])]
 
 
 if USE_CYTHON:
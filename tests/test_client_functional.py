@@ -4,6 +4,7 @@ import asyncio
 import http.cookies
 import io
 import json
+import os
 import pathlib
 import ssl
 from unittest import mock
@@ -14,7 +15,7 @@ from multidict import MultiDict
 import aiohttp
 from aiohttp import hdrs, web
 from aiohttp.errors import FingerprintMismatch
-from aiohttp.helpers import create_future
+from aiohttp.helpers import create_future, ensure_future
 from aiohttp.multipart import MultipartWriter
 
 
@@ -105,6 +106,76 @@ def test_keepalive_server_force_close_connection(loop, test_client):
     assert 0 == len(client._session.connector._conns)
 
 
+@asyncio.coroutine
+def test_pipelining(loop, raw_test_server):
+    peers = set()
+
+    @asyncio.coroutine
+    def handler(request):
+        peers.add(request.transport.get_extra_info('peername'))
+        return web.Response(text=request.path)
+
+    server = yield from raw_test_server(handler)
+    connector = aiohttp.TCPConnector(loop=loop, capacity=1, pipeline_depth=4)
+    with aiohttp.ClientSession(connector=connector, loop=loop) as session:
+        resp = yield from session.get(server.make_url('/'))
+        yield from resp.release()
+
+        @asyncio.coroutine
+        def fetch(path):
+            resp = yield from session.get(server.make_url(path))
+            pipelined = resp.connection.pipelined
+            return pipelined, (yield from resp.text())
+
+        paths = ['/{}'.format(i) for i in range(4)]
+        results = yield from asyncio.gather(*[fetch(path) for path in paths],
+                                            loop=loop)
+
+    assert paths == [text for pipelined, text in results]
+    # the first request started is sent alone, others are pipelined to it
+    assert [False, True, True, True] == sorted(
+        pipelined for pipelined, text in results)
+    assert 1 == len(peers)
+
+
+@asyncio.coroutine
+def test_pipelining_connection_closed(loop, raw_test_server):
+    peers = set()
+    pipelined = []
+
+    @asyncio.coroutine
+    def handler(request):
+        peers.add(request.transport.get_extra_info('peername'))
+        response = web.Response(text=request.path)
+        if len(peers) == 1 and request.path != '/':
+            pipelined.append(request.path)
+            if len(pipelined) == 1:
+                response.force_close()
+            else:
+                # client closes connection before these responses
+                yield from asyncio.sleep(0.1, loop=loop)
+        return response
+
+    server = yield from raw_test_server(handler)
+    connector = aiohttp.TCPConnector(loop=loop, capacity=1, pipeline_depth=3)
+    with aiohttp.ClientSession(connector=connector, loop=loop) as session:
+        resp = yield from session.get(server.make_url('/'))
+        yield from resp.release()
+
+        @asyncio.coroutine
+        def fetch(path):
+            resp = yield from session.get(server.make_url(path))
+            return (yield from resp.text())
+
+        paths = ['/{}'.format(i) for i in range(3)]
+        texts = yield from asyncio.gather(*[fetch(path) for path in paths],
+                                          loop=loop)
+
+    # requests pipelined after the closing response are sent again
+    assert paths == texts
+    assert 2 == len(peers)
+
+
 @asyncio.coroutine
 def test_HTTP_304(loop, test_client):
     @asyncio.coroutine
@@ -260,6 +331,33 @@ def test_client_ssl(loop, ssl_ctx, test_server, test_client):
     assert txt == 'Test message'
 
 
+@pytest.mark.skipif(not hasattr(ssl, 'SSLSession'),
+                    reason="TLS session resumption requires Python 3.6+")
+@asyncio.coroutine
+def test_client_ssl_session_resumption(loop, ssl_ctx, test_server,
+                                       test_client):
+    connector = aiohttp.TCPConnector(verify_ssl=False, force_close=True,
+                                     ssl_session_cache_size=1, loop=loop)
+
+    @asyncio.coroutine
+    def handler(request):
+        return web.HTTPOk(text='Test message')
+
+    app = web.Application(loop=loop)
+    app.router.add_route('GET', '/', handler)
+    server = yield from test_server(app, ssl=ssl_ctx)
+    client = yield from test_client(server, connector=connector)
+
+    for _ in range(3):
+        resp = yield from client.get('/')
+        assert 200 == resp.status
+        yield from resp.text()
+
+    assert 1 == connector.ssl_session_misses
+    assert 2 == connector.ssl_session_hits
+    assert [('127.0.0.1', server.port)] == list(connector._ssl_sessions)
+
+
 @pytest.mark.parametrize('fingerprint', [
     b'\xa2\x06G\xad\xaa\xf5\xd8\\J\x99^by;\x06=',
     b's\x93\xfd:\xed\x08\x1do\xa9\xaeq9\x1a\xe3\xc5\x7f\x89\xe7l\xf9',
@@ -993,6 +1091,189 @@ def test_POST_DATA(loop, test_client):
     resp.close()
 
 
+@asyncio.coroutine
+def test_coalesce_requests(loop, test_client):
+    calls = 0
+
+    @asyncio.coroutine
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        yield from asyncio.sleep(0.1, loop=loop)
+        return web.Response(text='config', headers={'X-Call': str(calls)})
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/', handler)
+    client = yield from test_client(app, coalesce=True)
+
+    resps = yield from asyncio.gather(
+        *[client.get('/') for _ in range(5)], loop=loop)
+    assert 1 == calls
+    assert 4 == client.session.coalesced_requests
+    assert 5 == len(set(map(id, resps)))
+    for resp in resps:
+        assert 200 == resp.status
+        assert '1' == resp.headers['X-Call']
+        assert b'config' == (yield from resp.content.read())
+        assert 'config' == (yield from resp.text())
+        yield from resp.release()
+
+    # finished requests are not shared
+    resp = yield from client.get('/')
+    assert '2' == resp.headers['X-Call']
+    yield from resp.release()
+
+
+@asyncio.coroutine
+def test_coalesce_requests_too_large(loop, test_client):
+    calls = 0
+
+    @asyncio.coroutine
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        yield from asyncio.sleep(0.1, loop=loop)
+        return web.Response(body=b'x' * 1025)
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/', handler)
+    client = yield from test_client(app, coalesce=True,
+                                    coalesce_max_size=1024)
+
+    resps = yield from asyncio.gather(
+        *[client.get('/') for _ in range(3)], loop=loop)
+    assert 3 == calls
+    assert 0 == client.session.coalesced_requests
+    assert 2 == client.session.coalesce_misses
+    for resp in resps:
+        assert b'x' * 1025 == (yield from resp.read())
+
+
+@asyncio.coroutine
+def test_coalesce_requests_distinct(loop, test_client):
+    calls = 0
+
+    @asyncio.coroutine
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        yield from asyncio.sleep(0.1, loop=loop)
+        return web.Response(text=request.headers['Accept'])
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/', handler)
+    client = yield from test_client(app, coalesce=True)
+
+    resps = yield from asyncio.gather(
+        client.get('/', headers={'Accept': 'text/plain'}),
+        client.get('/', headers={'Accept': 'text/plain'}),
+        client.get('/', headers={'Accept': 'application/json'}),
+        loop=loop)
+    assert 2 == calls
+    assert 1 == client.session.coalesced_requests
+    assert 'text/plain' == (yield from resps[0].text())
+    assert 'text/plain' == (yield from resps[1].text())
+    assert 'application/json' == (yield from resps[2].text())
+
+
+@asyncio.coroutine
+def test_coalesce_requests_error(loop, test_client):
+
+    @asyncio.coroutine
+    def handler(request):
+        yield from asyncio.sleep(0.1, loop=loop)
+        request.transport.close()
+        return web.Response()
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/', handler)
+    client = yield from test_client(app, coalesce=True)
+
+    results = yield from asyncio.gather(
+        *[client.get('/') for _ in range(3)],
+        loop=loop, return_exceptions=True)
+    assert all(isinstance(exc, aiohttp.ServerDisconnectedError)
+               for exc in results)
+    assert results[0] is results[1] is results[2]
+
+
+def chunked_handler(loop, body, counter):
+
+    @asyncio.coroutine
+    def handler(request):
+        counter.append(request)
+        yield from asyncio.sleep(0.1, loop=loop)
+        resp = web.StreamResponse()
+        resp.enable_chunked_encoding()
+        yield from resp.prepare(request)
+        for i in range(0, len(body), 100):
+            resp.write(body[i:i + 100])
+            yield from resp.drain()
+        yield from resp.write_eof()
+        return resp
+
+    return handler
+
+
+@asyncio.coroutine
+def test_coalesce_requests_chunked(loop, test_client):
+    calls = []
+    body = b'x' * 1000
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/', chunked_handler(loop, body, calls))
+    client = yield from test_client(app, coalesce=True,
+                                    coalesce_max_size=1000)
+
+    resps = yield from asyncio.gather(
+        *[client.get('/') for _ in range(3)], loop=loop)
+    assert 1 == len(calls)
+    assert 2 == client.session.coalesced_requests
+    for resp in resps:
+        assert 'chunked' == resp.headers['Transfer-Encoding']
+        assert body == (yield from resp.read())
+
+
+@asyncio.coroutine
+def test_coalesce_requests_chunked_too_large(loop, test_client):
+    calls = []
+    body = bytes(range(250)) * 4
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/', chunked_handler(loop, body, calls))
+    client = yield from test_client(app, coalesce=True,
+                                    coalesce_max_size=999)
+
+    resps = yield from asyncio.gather(
+        *[client.get('/') for _ in range(3)], loop=loop)
+    assert 3 == len(calls)
+    assert 0 == client.session.coalesced_requests
+    assert 2 == client.session.coalesce_misses
+    for resp in resps:
+        assert body == (yield from resp.read())
+
+
+@asyncio.coroutine
+def test_coalesce_requests_follower_timeout(loop, test_client):
+
+    @asyncio.coroutine
+    def handler(request):
+        yield from asyncio.sleep(0.5, loop=loop)
+        return web.Response(text='slow')
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/', handler)
+    client = yield from test_client(app, coalesce=True)
+
+    leader = ensure_future(client.get('/'), loop=loop)
+    yield from asyncio.sleep(0.1, loop=loop)
+    with pytest.raises(asyncio.TimeoutError):
+        yield from client.get('/', timeout=0.1)
+    assert not leader.done()
+    resp = yield from leader
+    assert 'slow' == (yield from resp.text())
+
+
 @asyncio.coroutine
 def test_POST_DATA_with_explicit_formdata(loop, test_client):
     @asyncio.coroutine
@@ -1266,6 +1547,82 @@ def test_POST_FILES_SINGLE_BINARY(loop, test_client, fname):
         resp.close()
 
 
+@pytest.fixture
+def big_file(tmpdir):
+    fname = tmpdir.join('big.bin')
+    fname.write_binary(bytes(range(256)) * 16 * 1024)
+    return fname
+
+
+@pytest.mark.skipif(not hasattr(os, 'sendfile'),
+                    reason="requires os.sendfile()")
+@asyncio.coroutine
+def test_POST_FILE_sendfile(loop, test_client, big_file):
+    @asyncio.coroutine
+    def handler(request):
+        data = yield from request.read()
+        assert big_file.read_binary()[100:] == data
+        return web.HTTPOk()
+
+    app = web.Application(loop=loop)
+    app.router.add_post('/', handler)
+    client = yield from test_client(app)
+
+    with big_file.open('rb') as f:
+        f.seek(100)
+        with mock.patch('aiohttp.client_reqrep.os.sendfile',
+                        wraps=os.sendfile) as m_sendfile:
+            resp = yield from client.post('/', data=f)
+        assert 200 == resp.status
+        assert m_sendfile.called
+        assert f.tell() == big_file.size()
+        resp.close()
+
+
+@asyncio.coroutine
+def test_POST_FILE_no_sendfile(loop, test_client, big_file, monkeypatch):
+    monkeypatch.setenv('AIOHTTP_NOSENDFILE', '1')
+
+    @asyncio.coroutine
+    def handler(request):
+        data = yield from request.read()
+        assert big_file.read_binary() == data
+        return web.HTTPOk()
+
+    app = web.Application(loop=loop)
+    app.router.add_post('/', handler)
+    client = yield from test_client(app)
+
+    with big_file.open('rb') as f:
+        with mock.patch.object(loop, 'run_in_executor',
+                               wraps=loop.run_in_executor) as m_executor:
+            resp = yield from client.post('/', data=f)
+        assert 200 == resp.status
+        assert m_executor.called
+        resp.close()
+
+
+@asyncio.coroutine
+def test_POST_FILE_ssl(loop, ssl_ctx, test_server, test_client, big_file):
+    connector = aiohttp.TCPConnector(verify_ssl=False, loop=loop)
+
+    @asyncio.coroutine
+    def handler(request):
+        data = yield from request.read()
+        assert big_file.read_binary() == data
+        return web.HTTPOk()
+
+    app = web.Application(loop=loop)
+    app.router.add_post('/', handler)
+    server = yield from test_server(app, ssl=ssl_ctx)
+    client = yield from test_client(server, connector=connector)
+
+    with big_file.open('rb') as f:
+        resp = yield from client.post('/', data=f)
+        assert 200 == resp.status
+        resp.close()
+
+
 @asyncio.coroutine
 def test_POST_FILES_IO(loop, test_client):
     @asyncio.coroutine
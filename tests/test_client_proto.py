@@ -0,0 +1,41 @@
+import asyncio
+from unittest import mock
+
+from aiohttp.client_proto import EMPTY_PAYLOAD, HttpClientProtocol
+
+
+@asyncio.coroutine
+def test_pipelined_response_params(loop):
+    proto = HttpClientProtocol(loop=loop)
+    proto.connection_made(mock.Mock())
+    proto.set_response_params(skip_payload=True)
+    proto.set_response_params()
+
+    proto.data_received(b'HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\n'
+                        b'HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\ndata')
+
+    msg, payload = yield from proto.read()
+    assert 200 == msg.code
+    assert payload is EMPTY_PAYLOAD
+    msg, payload = yield from proto.read()
+    assert 200 == msg.code
+    assert b'data' == (yield from payload.read())
+    assert not proto._response_params
+
+
+@asyncio.coroutine
+def test_informational_response_keeps_params(loop):
+    proto = HttpClientProtocol(loop=loop)
+    proto.connection_made(mock.Mock())
+    proto.set_response_params(skip_payload=True)
+    proto.set_response_params()
+
+    proto.data_received(b'HTTP/1.1 103 Early Hints\r\n\r\n')
+    assert 2 == len(proto._response_params)
+    proto.data_received(b'HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\n')
+    assert 1 == len(proto._response_params)
+
+    msg, payload = yield from proto.read()
+    assert 103 == msg.code
+    msg, payload = yield from proto.read()
+    assert payload is EMPTY_PAYLOAD
@@ -827,6 +827,46 @@ def test_data_file(loop, transport):
     yield from req.close()
 
 
+@asyncio.coroutine
+def test_data_file_chunk_size(loop, transport):
+    req = ClientRequest(
+        'POST', URL('http://python.org/'),
+        data=io.BufferedReader(io.BytesIO(b'*' * 10000)),
+        loop=loop)
+    transport, buf = transport
+
+    with mock.patch.object(loop, 'run_in_executor',
+                           wraps=loop.run_in_executor) as m_executor:
+        resp = req.send(transport)
+        yield from resp.wait_for_close()
+    assert m_executor.called
+    assert buf.split(b'\r\n\r\n', 1)[1] == \
+        b'2000\r\n' + b'*' * 8192 + b'\r\n' + \
+        b'710\r\n' + b'*' * 1808 + b'\r\n0\r\n\r\n'
+    yield from req.close()
+
+
+@asyncio.coroutine
+def test_data_file_ssl(loop, transport, tmpdir):
+    fname = tmpdir.join('data.bin')
+    fname.write_binary(b'*' * 300000)
+    transport, buf = transport
+    transport.writer.transport.get_extra_info.side_effect = {
+        'socket': mock.Mock(), 'sslcontext': mock.Mock()}.get
+
+    with fname.open('rb') as f:
+        req = ClientRequest('POST', URL('https://python.org/'),
+                            data=f, loop=loop)
+        assert not req.chunked
+        with mock.patch('aiohttp.client_reqrep.os.sendfile',
+                        create=True) as m_sendfile:
+            resp = req.send(transport)
+            yield from resp.wait_for_close()
+        assert not m_sendfile.called
+        assert buf.split(b'\r\n\r\n', 1)[1] == b'*' * 300000
+        yield from req.close()
+
+
 @asyncio.coroutine
 def test_data_stream_exc(loop):
     fut = helpers.create_future(loop)
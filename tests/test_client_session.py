@@ -450,3 +450,49 @@ def test_client_session_implicit_loop_warn():
 
     asyncio.set_event_loop(None)
     loop.close()
+
+
+def test_coalesce_key(create_session):
+    session = create_session(coalesce=True)
+    key = session._coalesce_key('GET', 'http://example.com/?a=1',
+                                dict(params={'b': '2'},
+                                     allow_redirects=True))
+    assert key == session._coalesce_key(
+        'GET', 'http://example.com/?a=1&b=2#frag',
+        dict(allow_redirects=True))
+    assert key != session._coalesce_key(
+        'GET', 'http://example.com/?b=2', dict(allow_redirects=True))
+    assert key != session._coalesce_key(
+        'GET', 'http://example.com/?a=1&b=2', dict(allow_redirects=False))
+    assert key != session._coalesce_key(
+        'GET', 'http://example.com/?a=1&b=2',
+        dict(allow_redirects=True, headers={'Accept': 'text/plain'}))
+    assert key == session._coalesce_key(
+        'GET', 'http://example.com/?a=1&b=2',
+        dict(allow_redirects=True, headers={'X-Request-Id': '1'}))
+
+
+def test_coalesce_key_custom_headers(create_session):
+    session = create_session(coalesce=True,
+                             coalesce_headers=['x-tenant'])
+    key = session._coalesce_key('GET', 'http://example.com/',
+                                dict(headers={'X-Tenant': 'a'}))
+    assert key != session._coalesce_key('GET', 'http://example.com/',
+                                        dict(headers={'X-Tenant': 'b'}))
+    assert key == session._coalesce_key(
+        'GET', 'http://example.com/',
+        dict(headers={'X-Tenant': 'a', 'Accept': 'text/plain'}))
+
+
+@pytest.mark.parametrize('method,kwargs', [
+    ('POST', {}),
+    ('DELETE', {}),
+    ('GET', dict(data=b'data')),
+    ('GET', dict(expect100=True)),
+    ('GET', dict(headers={'Upgrade': 'websocket'})),
+    ('GET', dict(skip_auto_headers=['User-Agent'])),
+])
+def test_coalesce_key_not_shared(create_session, method, kwargs):
+    session = create_session(coalesce=True)
+    assert session._coalesce_key(method, 'http://example.com/',
+                                 kwargs) is None
@@ -2,6 +2,7 @@ import asyncio
 import base64
 import hashlib
 import os
+import zlib
 from unittest import mock
 
 import pytest
@@ -190,6 +191,59 @@ def test_ws_connect_err_challenge(loop, ws_key, key_data):
     assert ctx.value.message == 'Invalid challenge response'
 
 
+@asyncio.coroutine
+def test_ws_connect_compress(loop, ws_key, key_data):
+    resp = mock.Mock()
+    resp.status = 101
+    resp.headers = {
+        hdrs.UPGRADE: hdrs.WEBSOCKET,
+        hdrs.CONNECTION: hdrs.UPGRADE,
+        hdrs.SEC_WEBSOCKET_ACCEPT: ws_key,
+        hdrs.SEC_WEBSOCKET_EXTENSIONS:
+            'permessage-deflate; client_max_window_bits=10; '
+            'client_no_context_takeover',
+    }
+    with mock.patch('aiohttp.client.os') as m_os:
+        with mock.patch('aiohttp.client.ClientSession.get') as m_req:
+            m_os.urandom.return_value = key_data
+            m_req.return_value = helpers.create_future(loop)
+            m_req.return_value.set_result(resp)
+
+            res = yield from aiohttp.ClientSession(loop=loop).ws_connect(
+                'http://test.org', compress=15)
+
+    assert (m_req.call_args[1]["headers"][hdrs.SEC_WEBSOCKET_EXTENSIONS] ==
+            'permessage-deflate; client_max_window_bits')
+    assert res._writer.compress == 10
+    assert res._writer._compress_flush == zlib.Z_FULL_FLUSH
+
+
+@pytest.mark.parametrize('compress,extensions', [
+    (15, 'permessage-deflate; unknown'),
+    (0, 'permessage-deflate'),
+])
+@asyncio.coroutine
+def test_ws_connect_err_compress(loop, ws_key, key_data,
+                                 compress, extensions):
+    resp = mock.Mock()
+    resp.status = 101
+    resp.headers = {
+        hdrs.UPGRADE: hdrs.WEBSOCKET,
+        hdrs.CONNECTION: hdrs.UPGRADE,
+        hdrs.SEC_WEBSOCKET_ACCEPT: ws_key,
+        hdrs.SEC_WEBSOCKET_EXTENSIONS: extensions,
+    }
+    with mock.patch('aiohttp.client.os') as m_os:
+        with mock.patch('aiohttp.client.ClientSession.get') as m_req:
+            m_os.urandom.return_value = key_data
+            m_req.return_value = helpers.create_future(loop)
+            m_req.return_value.set_result(resp)
+
+            with pytest.raises(errors.WSServerHandshakeError):
+                yield from aiohttp.ClientSession(loop=loop).ws_connect(
+                    'http://test.org', compress=compress)
+
+
 @asyncio.coroutine
 def test_close(loop, ws_key, key_data):
     resp = mock.Mock()
@@ -460,3 +514,88 @@ def test_ws_connect_non_overlapped_protocols_2(ws_key, loop, key_data):
                 protocols=('t1', 't2', 'chat'))
 
     assert res.protocol is None
+
+
+@asyncio.coroutine
+def test_ws_connect_write_buffer_limits_invalid(loop):
+    session = aiohttp.ClientSession(loop=loop)
+    with pytest.raises(ValueError):
+        yield from session.ws_connect('http://test.org', overflow='unknown')
+    session.close()
+
+
+@asyncio.coroutine
+def test_ws_connect_overflow(ws_key, loop, key_data):
+    resp = mock.Mock()
+    resp.status = 101
+    resp.headers = {
+        hdrs.UPGRADE: hdrs.WEBSOCKET,
+        hdrs.CONNECTION: hdrs.UPGRADE,
+        hdrs.SEC_WEBSOCKET_ACCEPT: ws_key,
+    }
+    transport = resp.connection.writer.transport
+    with mock.patch('aiohttp.client.os') as m_os:
+        with mock.patch('aiohttp.client.ClientSession.get') as m_req:
+            m_os.urandom.return_value = key_data
+            m_req.return_value = helpers.create_future(loop)
+            m_req.return_value.set_result(resp)
+
+            res = yield from aiohttp.ClientSession(loop=loop).ws_connect(
+                'http://test.org', high_water=100, low_water=10,
+                overflow='close')
+
+    transport.set_write_buffer_limits.assert_called_with(high=100, low=10)
+    transport.get_write_buffer_size.return_value = 100
+    res.send_str('text')
+    assert 0 == res.dropped_frames
+
+    transport.get_write_buffer_size.return_value = 101
+    res.send_bytes(b'bytes')
+    assert 1 == res.dropped_frames
+    assert res.closed
+    assert 1013 == res.close_code
+    assert resp.close.called
+    # close frame is masked
+    assert transport.write.call_args[0][0].startswith(b'\x88\x82')
+
+
+@asyncio.coroutine
+def test_receive_many(loop, ws_key, key_data):
+    resp = mock.Mock()
+    resp.status = 101
+    resp.headers = {
+        hdrs.UPGRADE: hdrs.WEBSOCKET,
+        hdrs.CONNECTION: hdrs.UPGRADE,
+        hdrs.SEC_WEBSOCKET_ACCEPT: ws_key,
+    }
+    with mock.patch('aiohttp.client.WebSocketWriter') as WebSocketWriter:
+        with mock.patch('aiohttp.client.os') as m_os:
+            with mock.patch('aiohttp.client.ClientSession.get') as m_req:
+                m_os.urandom.return_value = key_data
+                m_req.return_value = helpers.create_future(loop)
+                m_req.return_value.set_result(resp)
+                writer = WebSocketWriter.return_value = mock.Mock()
+
+                session = aiohttp.ClientSession(loop=loop)
+                ws = yield from session.ws_connect('http://test.org')
+
+    messages = [aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, 'text', ''),
+                aiohttp.WSMessage(aiohttp.WSMsgType.PING, b'ping', ''),
+                aiohttp.WSMessage(aiohttp.WSMsgType.PONG, b'pong', ''),
+                aiohttp.WSMessage(aiohttp.WSMsgType.BINARY, b'data', ''),
+                aiohttp.WSMessage(aiohttp.WSMsgType.CLOSE, 1000, '')]
+    for msg in messages:
+        ws._reader.feed_data(msg, 0)
+
+    with pytest.raises(ValueError):
+        yield from ws.receive_many(0)
+    assert messages[:1] == (yield from ws.receive_many(2))
+    writer.pong.assert_called_with(b'ping')
+
+    assert messages[3:] == (yield from ws.receive_many())
+    writer.close.assert_called_with(1000, b'')
+    assert ws.closed
+    assert 1000 == ws.close_code
+    assert resp.close.called
+    batch = yield from ws.receive_many()
+    assert [aiohttp.WSMsgType.CLOSED] == [msg.type for msg in batch]
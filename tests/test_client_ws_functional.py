@@ -30,6 +30,60 @@ def test_send_recv_text(loop, test_client):
     yield from resp.close()
 
 
+@asyncio.coroutine
+def test_send_recv_compressed(loop, test_client):
+    text = '{"value": 1, "values": [1, 2, 3]}' * 100
+
+    @asyncio.coroutine
+    def handler(request):
+        ws = web.WebSocketResponse(compress=True)
+        yield from ws.prepare(request)
+        assert 'permessage-deflate' == ws.headers['Sec-WebSocket-Extensions']
+
+        msg = yield from ws.receive_str()
+        ws.send_str(msg)
+        msg = yield from ws.receive_bytes()
+        ws.send_bytes(msg)
+        yield from ws.close()
+        return ws
+
+    app = web.Application(loop=loop)
+    app.router.add_route('GET', '/', handler)
+    client = yield from test_client(app)
+    resp = yield from client.ws_connect('/', compress=15)
+    resp.send_str(text)
+    data = yield from resp.receive_str()
+    assert data == text
+    resp.send_bytes(b'short')
+    data = yield from resp.receive_bytes()
+    assert data == b'short'
+    yield from resp.close()
+
+
+@asyncio.coroutine
+def test_compress_not_accepted(loop, test_client):
+
+    @asyncio.coroutine
+    def handler(request):
+        ws = web.WebSocketResponse()
+        yield from ws.prepare(request)
+        assert 'Sec-WebSocket-Extensions' not in ws.headers
+
+        msg = yield from ws.receive_str()
+        ws.send_str(msg + '/answer')
+        yield from ws.close()
+        return ws
+
+    app = web.Application(loop=loop)
+    app.router.add_route('GET', '/', handler)
+    client = yield from test_client(app)
+    resp = yield from client.ws_connect('/', compress=15)
+    resp.send_str('ask' * 100)
+    data = yield from resp.receive_str()
+    assert data == 'ask' * 100 + '/answer'
+    yield from resp.close()
+
+
 @asyncio.coroutine
 def test_send_recv_bytes_bad_type(loop, test_client):
 
@@ -1,6 +1,7 @@
 """Tests of http client with custom Connector"""
 
 import asyncio
+import collections
 import gc
 import os.path
 import platform
@@ -15,9 +16,10 @@ import pytest
 from yarl import URL
 
 import aiohttp
+from aiohttp import connector as connector_module
 from aiohttp import client, helpers, web
 from aiohttp.client import ClientRequest
-from aiohttp.connector import Connection
+from aiohttp.connector import Connection, _TransportPlaceholder
 from aiohttp.test_utils import unused_port
 
 
@@ -199,11 +201,11 @@ def test_release_acquired(loop):
 
     tr = unittest.mock.Mock()
     conn._acquired.add(tr)
-    conn._release_acquired(tr)
+    conn._release_acquired(1, tr)
     assert 0 == len(conn._acquired)
     assert conn._release_waiters.called
 
-    conn._release_acquired(tr)
+    conn._release_acquired(1, tr)
     assert 0 == len(conn._acquired)
 
     conn.close()
@@ -216,7 +218,7 @@ def test_release_acquired_closed(loop):
     tr = unittest.mock.Mock()
     conn._acquired.add(tr)
     conn._closed = True
-    conn._release_acquired(tr)
+    conn._release_acquired(1, tr)
     assert 1 == len(conn._acquired)
     assert not conn._release_waiters.called
     conn.close()
@@ -276,48 +278,69 @@ def test_release_already_closed(loop):
     assert not conn._release_acquired.called
 
 
+def make_waiters(conn, key, count, done=False):
+    waiters = collections.deque()
+    for _ in range(count):
+        waiter = unittest.mock.Mock()
+        waiter.done.return_value = done
+        waiters.append(waiter)
+    conn._waiters[key] = waiters
+    return list(waiters)
+
+
 def test_release_waiters(loop):
-    # limit is None
+    # limit is None, first waiter gets a slot
     conn = aiohttp.BaseConnector(capacity=None, loop=loop)
-    conn._waiters.append(unittest.mock.Mock())
+    w1, w2 = make_waiters(conn, 1, 2)
     conn._release_waiters()
-    assert len(conn._waiters) == 1
-    conn.close()
-
-    # release all
-    conn = aiohttp.BaseConnector(loop=loop)
-    w1, w2 = unittest.mock.Mock(), unittest.mock.Mock()
-    w1.done.return_value = False
-    w2.done.return_value = False
-    conn._waiters = [w1, w2]
-    conn._release_waiters()
-    assert len(conn._waiters) == 2
     assert w1.set_result.called
-    assert w2.set_result.called
+    assert not w2.set_result.called
+    assert [w2] == list(conn._waiters[1])
+    assert 1 == len(conn._acquired)
     conn.close()
 
-    # limited available
+    # nothing available
     conn = aiohttp.BaseConnector(loop=loop, capacity=1)
-    w1, w2 = unittest.mock.Mock(), unittest.mock.Mock()
-    w1.done.return_value = False
-    w2.done.return_value = False
-    conn._waiters = [w1, w2]
+    conn._acquired.add(unittest.mock.Mock())
+    w1, = make_waiters(conn, 1, 1)
     conn._release_waiters()
-    assert len(conn._waiters) == 2
-    assert w1.set_result.called
-    assert not w2.set_result.called
+    assert not w1.set_result.called
     conn.close()
 
-    # limited available
+    # done waiters are skipped
     conn = aiohttp.BaseConnector(loop=loop, capacity=1)
-    w1, w2 = unittest.mock.Mock(), unittest.mock.Mock()
-    w1.done.return_value = True
-    w2.done.return_value = False
-    conn._waiters = [w1, w2]
+    w1, = make_waiters(conn, 1, 1, done=True)
+    w2, = make_waiters(conn, 2, 1)
     conn._release_waiters()
-    assert len(conn._waiters) == 2
     assert not w1.set_result.called
-    assert not w2.set_result.called
+    assert w2.set_result.called
+    assert not conn._waiters
+    conn.close()
+
+
+def test_release_waiters_keys_take_turns(loop):
+    conn = aiohttp.BaseConnector(loop=loop, capacity=2)
+    a1, a2 = make_waiters(conn, 'a', 2)
+    b1, = make_waiters(conn, 'b', 1)
+    conn._release_waiters()
+    conn._release_waiters()
+    assert a1.set_result.called
+    assert b1.set_result.called
+    assert not a2.set_result.called
+    assert ['a'] == list(conn._waiters)
+    conn.close()
+
+
+def test_release_waiters_limit_per_host(loop):
+    conn = aiohttp.BaseConnector(loop=loop, capacity=10, limit_per_host=1)
+    conn._acquire('a', unittest.mock.Mock())
+    a1, = make_waiters(conn, 'a', 1)
+    b1, = make_waiters(conn, 'b', 1)
+    conn._release_waiters()
+    # 'a' is at its limit
+    assert not a1.set_result.called
+    assert b1.set_result.called
+    assert 1 == len(conn._acquired_per_host['b'])
     conn.close()
 
 
@@ -366,6 +389,197 @@ def test_tcp_connector_resolve_host_twice_use_dns_cache(loop):
     assert res is res2
 
 
+class FakeResolver:
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.calls = 0
+        self.exc = None
+        self.fut = None
+
+    @asyncio.coroutine
+    def resolve(self, host, port=0, family=socket.AF_INET):
+        self.calls += 1
+        call = self.calls
+        if self.fut is not None:
+            yield from self.fut
+        else:
+            yield from asyncio.sleep(0, loop=self.loop)
+        if self.exc is not None:
+            raise self.exc
+        return [{'hostname': host, 'host': '127.0.0.{}'.format(call),
+                 'port': port, 'family': family, 'proto': 0, 'flags': 0}]
+
+
+def make_dns_connector(loop, **kwargs):
+    resolver = FakeResolver(loop)
+    conn = aiohttp.TCPConnector(loop=loop, resolver=resolver, **kwargs)
+    conn._time_service = unittest.mock.Mock()
+    conn._time_service.loop_time.return_value = 100.0
+    return conn, resolver
+
+
+@asyncio.coroutine
+def test_tcp_connector_resolve_host_concurrent_lookups(loop):
+    conn, resolver = make_dns_connector(loop)
+
+    res = yield from asyncio.gather(
+        *[conn._resolve_host('example.com', 80) for _ in range(5)],
+        loop=loop)
+
+    assert 1 == resolver.calls
+    assert all(r is res[0] for r in res)
+    assert not conn._resolving_hosts
+
+
+@asyncio.coroutine
+def test_tcp_connector_resolve_host_cancelled_lookup_shared(loop):
+    conn, resolver = make_dns_connector(loop)
+    resolver.fut = helpers.create_future(loop)
+
+    task1 = helpers.ensure_future(
+        conn._resolve_host('example.com', 80), loop=loop)
+    task2 = helpers.ensure_future(
+        conn._resolve_host('example.com', 80), loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    task1.cancel()
+    resolver.fut.set_result(None)
+
+    res = yield from task2
+    assert res[0]['host'] == '127.0.0.1'
+    assert task1.cancelled()
+    assert 1 == resolver.calls
+
+
+@asyncio.coroutine
+def test_tcp_connector_clear_dns_cache_during_lookup(loop):
+    conn, resolver = make_dns_connector(loop)
+    resolver.fut = helpers.create_future(loop)
+
+    task = helpers.ensure_future(
+        conn._resolve_host('example.com', 80), loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    conn.clear_dns_cache('example.com', 80)
+    assert not conn._resolving_hosts
+    resolver.fut.set_result(None)
+
+    res = yield from task
+    assert res[0]['host'] == '127.0.0.1'
+    assert conn.cached_hosts == {}
+
+
+@asyncio.coroutine
+def test_tcp_connector_clear_all_dns_cache_during_lookup(loop):
+    conn, resolver = make_dns_connector(loop)
+    resolver.fut = helpers.create_future(loop)
+
+    task = helpers.ensure_future(
+        conn._resolve_host('example.com', 80), loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    conn.clear_dns_cache()
+    resolver.fut.set_result(None)
+    yield from task
+    assert conn.cached_hosts == {}
+
+    resolver.fut = None
+    res = yield from conn._resolve_host('example.com', 80)
+    assert res[0]['host'] == '127.0.0.2'
+    assert conn.cached_hosts == {('example.com', 80): res}
+
+
+@asyncio.coroutine
+def test_tcp_connector_resolve_host_ttl_expired(loop):
+    conn, resolver = make_dns_connector(loop, ttl_dns_cache=10)
+    assert 10 == conn.ttl_dns_cache
+
+    res = yield from conn._resolve_host('example.com', 80)
+    assert res[0]['host'] == '127.0.0.1'
+
+    conn._time_service.loop_time.return_value = 105.0
+    res = yield from conn._resolve_host('example.com', 80)
+    assert res[0]['host'] == '127.0.0.1'
+    assert 1 == resolver.calls
+
+    conn._time_service.loop_time.return_value = 110.0
+    res = yield from conn._resolve_host('example.com', 80)
+    assert res[0]['host'] == '127.0.0.2'
+    assert 2 == resolver.calls
+
+
+@asyncio.coroutine
+def test_tcp_connector_resolve_host_refresh_in_background(loop):
+    conn, resolver = make_dns_connector(loop, ttl_dns_cache=10)
+
+    yield from conn._resolve_host('example.com', 80)
+    conn._time_service.loop_time.return_value = 108.0
+    resolver.fut = helpers.create_future(loop)
+
+    res = yield from conn._resolve_host('example.com', 80)
+    assert res[0]['host'] == '127.0.0.1'
+    res = yield from conn._resolve_host('example.com', 80)
+    assert res[0]['host'] == '127.0.0.1'
+    assert ('example.com', 80) in conn._resolving_hosts
+
+    resolver.fut.set_result(None)
+    yield from asyncio.sleep(0, loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    assert 2 == resolver.calls
+    assert not conn._resolving_hosts
+    res = yield from conn._resolve_host('example.com', 80)
+    assert res[0]['host'] == '127.0.0.2'
+    assert 108.0 == conn._cached_hosts_timestamps[('example.com', 80)]
+
+
+@asyncio.coroutine
+def test_tcp_connector_resolve_host_refresh_failed(loop):
+    conn, resolver = make_dns_connector(loop, ttl_dns_cache=10)
+
+    yield from conn._resolve_host('example.com', 80)
+    conn._time_service.loop_time.return_value = 108.0
+    resolver.exc = OSError()
+
+    res = yield from conn._resolve_host('example.com', 80)
+    assert res[0]['host'] == '127.0.0.1'
+    yield from asyncio.sleep(0, loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    assert not conn._resolving_hosts
+    assert ('example.com', 80) in conn.cached_hosts
+
+    conn._time_service.loop_time.return_value = 111.0
+    with pytest.raises(OSError):
+        yield from conn._resolve_host('example.com', 80)
+
+
+@asyncio.coroutine
+def test_tcp_connector_dns_cache_size(loop):
+    conn, resolver = make_dns_connector(loop, dns_cache_size=2)
+    assert 2 == conn.dns_cache_size
+
+    yield from conn._resolve_host('a.com', 80)
+    yield from conn._resolve_host('b.com', 80)
+    yield from conn._resolve_host('a.com', 80)
+    yield from conn._resolve_host('c.com', 80)
+
+    assert [('a.com', 80), ('c.com', 80)] == list(conn.cached_hosts)
+    assert conn._cached_hosts_timestamps.keys() == conn.cached_hosts.keys()
+    assert 3 == resolver.calls
+
+
+@asyncio.coroutine
+def test_tcp_connector_close_cancels_lookups(loop):
+    conn, resolver = make_dns_connector(loop)
+    resolver.fut = helpers.create_future(loop)
+
+    task = helpers.ensure_future(
+        conn._resolve_host('example.com', 80), loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    conn.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        yield from task
+    assert not conn._resolving_hosts
+
+
 def test_get_pop_empty_conns(loop):
     # see issue #473
     conn = aiohttp.BaseConnector(loop=loop)
@@ -423,7 +637,8 @@ def test_release_not_started(loop):
     key = 1
     conn._acquired.add(tr)
     conn._release(key, req, tr, proto)
-    assert conn._conns == {1: [(tr, proto, 10)]}
+    assert list(conn._conns[1]) == [(tr, proto, 10)]
+    assert [(1, (tr, proto, 10))] == list(conn._idle_expiry)
     assert not tr.close.called
     conn.close()
 
@@ -501,39 +716,48 @@ def test_ctor_cleanup():
     assert conn._cleanup_handle is not None
 
 
+def make_idle_pool(conn, time_service, entries):
+    """Release (key, protocol, use time) entries to pool of conn."""
+    released = []
+    for key, proto, use_time in entries:
+        time_service.loop_time.return_value = use_time
+        tr = unittest.mock.Mock()
+        proto = proto or unittest.mock.Mock()
+        conn._put_idle(key, tr, proto)
+        released.append((tr, proto, use_time))
+    return released
+
+
 def test_cleanup():
     key = ('localhost', 80, False)
-    testset = {
-        key: [(unittest.mock.Mock(), unittest.mock.Mock(), 10),
-              (unittest.mock.Mock(), unittest.mock.Mock(), 300),
-              (None, unittest.mock.Mock(), 300)],
-    }
-    testset[key][0][1].is_connected.return_value = True
-    testset[key][1][1].is_connected.return_value = False
-
     loop = unittest.mock.Mock()
     time_service = unittest.mock.Mock()
-    time_service.loop_time.return_value = 300
     conn = aiohttp.BaseConnector(loop=loop, time_service=time_service)
-    conn._conns = testset
+    proto1, proto2 = unittest.mock.Mock(), unittest.mock.Mock()
+    proto1.is_connected.return_value = True
+    proto2.is_connected.return_value = False
+    released = make_idle_pool(conn, time_service, [(key, proto1, 10),
+                                                   (key, proto2, 100)])
+    conn._put_idle(key, None, unittest.mock.Mock())
+    time_service.loop_time.return_value = 300
     existing_handle = conn._cleanup_handle = unittest.mock.Mock()
 
     conn._cleanup()
     assert existing_handle.cancel.called
     assert conn._conns == {}
+    assert not conn._idle_expiry
+    assert released[0][0].close.called
+    assert not released[1][0].close.called
     assert conn._cleanup_handle is not None
 
 
 def test_cleanup_close_ssl_transport():
-    tr = unittest.mock.Mock()
     key = ('localhost', 80, True)
-    testset = {key: [(tr, unittest.mock.Mock(), 10)]}
-
     loop = unittest.mock.Mock()
     time_service = unittest.mock.Mock()
-    time_service.loop_time.return_value = 300
     conn = aiohttp.BaseConnector(loop=loop, time_service=time_service)
-    conn._conns = testset
+    [(tr, proto, t)] = make_idle_pool(conn, time_service, [(key, None, 10)])
+    time_service.loop_time.return_value = 300
     existing_handle = conn._cleanup_handle = unittest.mock.Mock()
 
     conn._cleanup()
@@ -543,18 +767,14 @@ def test_cleanup_close_ssl_transport():
 
 
 def test_cleanup2():
-    testset = {1: [(unittest.mock.Mock(), unittest.mock.Mock(), 300)]}
-    testset[1][0][1].is_connected.return_value = True
-
     loop = unittest.mock.Mock()
     time_service = unittest.mock.Mock()
-    time_service.loop_time.return_value = 300
 
     conn = aiohttp.BaseConnector(
         loop=loop, keepalive_timeout=10, time_service=time_service)
-    conn._conns = testset
+    released = make_idle_pool(conn, time_service, [(1, None, 300)])
     conn._cleanup()
-    assert conn._conns == testset
+    assert list(conn._conns[1]) == released
 
     assert conn._cleanup_handle is not None
     time_service.call_later.assert_called_with(5, conn._cleanup)
@@ -563,26 +783,110 @@ def test_cleanup2():
 
 def test_cleanup3():
     key = ('localhost', 80, False)
-    testset = {key: [(unittest.mock.Mock(), unittest.mock.Mock(), 290.1),
-                     (unittest.mock.Mock(), unittest.mock.Mock(), 305.1)]}
-    testset[key][0][1].is_connected.return_value = True
-
     loop = unittest.mock.Mock()
     time_service = unittest.mock.Mock()
-    time_service.loop_time.return_value = 308.5
 
     conn = aiohttp.BaseConnector(
         loop=loop, keepalive_timeout=10, time_service=time_service)
-    conn._conns = testset
+    released = make_idle_pool(conn, time_service, [(key, None, 290.1),
+                                                   (key, None, 305.1)])
+    time_service.loop_time.return_value = 308.5
 
     conn._cleanup()
-    assert conn._conns == {key: [testset[key][1]]}
+    assert list(conn._conns[key]) == [released[1]]
 
     assert conn._cleanup_handle is not None
     time_service.call_later.assert_called_with(5, conn._cleanup)
     conn.close()
 
 
+def test_cleanup_wakes_up_on_expiration():
+    loop = unittest.mock.Mock()
+    time_service = unittest.mock.Mock()
+
+    conn = aiohttp.BaseConnector(
+        loop=loop, keepalive_timeout=10, time_service=time_service)
+    make_idle_pool(conn, time_service, [(1, None, 300)])
+    time_service.loop_time.return_value = 308
+
+    conn._cleanup()
+    time_service.call_later.assert_called_with(2, conn._cleanup)
+    conn.close()
+
+
+def test_cleanup_skips_taken_connections():
+    loop = unittest.mock.Mock()
+    time_service = unittest.mock.Mock()
+
+    conn = aiohttp.BaseConnector(
+        loop=loop, keepalive_timeout=10, time_service=time_service)
+    key1, key2 = ('a', 80, False), ('b', 80, False)
+    released = make_idle_pool(conn, time_service, [(key1, None, 100),
+                                                   (key1, None, 101),
+                                                   (key2, None, 102)])
+    assert (released[1][0], released[1][1]) == conn._get(key1)
+    time_service.loop_time.return_value = 105
+    conn._put_idle(key1, released[1][0], released[1][1])
+    time_service.loop_time.return_value = 114
+
+    conn._cleanup()
+    assert released[0][0].close.called
+    assert not released[1][0].close.called
+    assert released[2][0].close.called
+    assert [(key1, (released[1][0], released[1][1], 105))] == list(
+        conn._idle_expiry)
+    assert [key1] == list(conn._conns)
+    conn.close()
+
+
+def test_idle_expiry_bounded_on_reuse():
+    loop = unittest.mock.Mock()
+    time_service = unittest.mock.Mock()
+
+    conn = aiohttp.BaseConnector(
+        loop=loop, keepalive_timeout=10, time_service=time_service)
+    key = ('localhost', 80, False)
+    released = make_idle_pool(conn, time_service, [(key, None, 100),
+                                                   (key, None, 100)])
+    for i in range(1000):
+        tr, proto = conn._get(key)
+        conn._put_idle(key, tr, proto)
+        assert len(conn._idle_expiry) <= 4
+
+    conn._cleanup()
+    assert 2 == len(conn._conns[key])
+    assert not released[0][0].close.called
+    conn.close()
+
+
+def test_cleanup_in_batches():
+    loop = unittest.mock.Mock()
+    time_service = unittest.mock.Mock()
+
+    conn = aiohttp.BaseConnector(
+        loop=loop, keepalive_timeout=10, time_service=time_service)
+    conn._cleanup_batch_size = 2
+    keys = [('a', 80, False), ('b', 80, False)]
+    released = make_idle_pool(conn, time_service,
+                              [(keys[i % 2], None, 100 + i)
+                               for i in range(5)])
+    time_service.loop_time.return_value = 200
+    time_service.call_later.reset_mock()
+
+    conn._cleanup()
+    assert 2 == sum(tr.close.called for tr, proto, t in released)
+    loop.call_soon.assert_called_with(conn._cleanup)
+    assert conn._cleanup_handle is loop.call_soon.return_value
+    assert not time_service.call_later.called
+
+    conn._cleanup()
+    conn._cleanup()
+    assert all(tr.close.called for tr, proto, t in released)
+    assert not conn._conns
+    time_service.call_later.assert_called_with(5, conn._cleanup)
+    conn.close()
+
+
 def test_cleanup_closed(loop):
     ts = unittest.mock.Mock()
     conn = aiohttp.BaseConnector(loop=loop, time_service=ts)
@@ -622,6 +926,338 @@ def test_tcp_connector_ctor(loop):
     assert conn.cached_hosts == {}
 
 
+def make_hinfo(host, port, family=socket.AF_INET):
+    return {'hostname': 'example.com', 'host': host, 'port': port,
+            'family': family, 'proto': 0, 'flags': socket.AI_NUMERICHOST}
+
+
+@pytest.yield_fixture
+def listening(loop):
+    srv = loop.run_until_complete(
+        loop.create_server(asyncio.Protocol, '127.0.0.1', 0))
+    yield srv.sockets[0].getsockname()[1]
+    srv.close()
+    loop.run_until_complete(srv.wait_closed())
+
+
+def blackhole_connector(loop, hosts, **kwargs):
+    """TCPConnector to hosts where 192.0.2.1 (TEST-NET) never answers."""
+    conn = aiohttp.TCPConnector(loop=loop, **kwargs)
+    resolved = helpers.create_future(loop)
+    resolved.set_result(hosts)
+    conn._resolve_host = unittest.mock.Mock(return_value=resolved)
+    conn.attempts = attempts = []
+    create_connection = loop.create_connection
+
+    @asyncio.coroutine
+    def connect(factory, host, port, **kwargs):
+        attempts.append(host)
+        if host == '192.0.2.1':
+            yield from helpers.create_future(loop)
+        if host == '192.0.2.2':
+            raise OSError(111, 'Connection refused')
+        return (yield from create_connection(factory, host, port, **kwargs))
+
+    loop.create_connection = connect
+    return conn
+
+
+def test_tcp_connector_ctor_happy_eyeballs(loop):
+    conn = aiohttp.TCPConnector(loop=loop)
+    assert conn.happy_eyeballs_delay is None
+    conn = aiohttp.TCPConnector(loop=loop, happy_eyeballs_delay=0.25)
+    assert 0.25 == conn.happy_eyeballs_delay
+
+
+def test_interleave_families():
+    v4 = [make_hinfo('1.1.1.{}'.format(i), 80) for i in range(3)]
+    v6 = [make_hinfo('::{}'.format(i), 80, socket.AF_INET6)
+          for i in range(2)]
+    hosts = v6 + v4
+    assert ([v6[0], v4[0], v6[1], v4[1], v4[2]] ==
+            connector_module._interleave_families(hosts))
+    assert v4 == connector_module._interleave_families(v4)
+
+
+@asyncio.coroutine
+def test_tcp_connector_happy_eyeballs_blackhole(loop, listening):
+    conn = blackhole_connector(
+        loop, [make_hinfo('192.0.2.1', listening),
+               make_hinfo('127.0.0.1', listening)],
+        happy_eyeballs_delay=0.05)
+    req = ClientRequest('GET', URL('http://example.com:80'), loop=loop)
+
+    t0 = loop.time()
+    transport, proto = yield from conn._create_connection(req)
+    assert loop.time() - t0 < 1
+    assert transport.get_extra_info('peername')[0] == '127.0.0.1'
+    assert ['192.0.2.1', '127.0.0.1'] == conn.attempts
+    transport.close()
+    conn.close()
+
+
+@asyncio.coroutine
+def test_tcp_connector_sequential_blackhole(loop, listening):
+    conn = blackhole_connector(
+        loop, [make_hinfo('192.0.2.1', listening),
+               make_hinfo('127.0.0.1', listening)])
+    req = ClientRequest('GET', URL('http://example.com:80'), loop=loop)
+
+    with pytest.raises(asyncio.TimeoutError):
+        yield from asyncio.wait_for(conn._create_connection(req), 0.1,
+                                    loop=loop)
+    assert ['192.0.2.1'] == conn.attempts
+    conn.close()
+
+
+@asyncio.coroutine
+def test_tcp_connector_happy_eyeballs_failure_starts_next(loop, listening):
+    conn = blackhole_connector(
+        loop, [make_hinfo('192.0.2.2', listening),
+               make_hinfo('127.0.0.1', listening)],
+        happy_eyeballs_delay=10)
+    req = ClientRequest('GET', URL('http://example.com:80'), loop=loop)
+
+    transport, proto = yield from asyncio.wait_for(
+        conn._create_connection(req), 1, loop=loop)
+    assert ['192.0.2.2', '127.0.0.1'] == conn.attempts
+    transport.close()
+    conn.close()
+
+
+@asyncio.coroutine
+def test_tcp_connector_happy_eyeballs_all_failed(loop, listening):
+    conn = blackhole_connector(
+        loop, [make_hinfo('192.0.2.2', listening),
+               make_hinfo('192.0.2.2', listening)],
+        happy_eyeballs_delay=0.05)
+    req = ClientRequest('GET', URL('http://example.com:80'), loop=loop)
+
+    with pytest.raises(aiohttp.ClientOSError) as ctx:
+        yield from conn._create_connection(req)
+    assert 111 == ctx.value.errno
+    assert 2 == len(conn.attempts)
+    conn.close()
+
+
+@asyncio.coroutine
+def test_tcp_connector_happy_eyeballs_cancelled(loop, listening):
+    conn = blackhole_connector(
+        loop, [make_hinfo('192.0.2.1', listening),
+               make_hinfo('192.0.2.1', listening)],
+        happy_eyeballs_delay=0.01)
+    req = ClientRequest('GET', URL('http://example.com:80'), loop=loop)
+
+    tasks = []
+    orig_ensure_future = helpers.ensure_future
+
+    def ensure_future(coro, *, loop):
+        task = orig_ensure_future(coro, loop=loop)
+        tasks.append(task)
+        return task
+
+    with unittest.mock.patch('aiohttp.helpers.ensure_future',
+                             ensure_future):
+        with pytest.raises(asyncio.TimeoutError):
+            yield from asyncio.wait_for(conn._create_connection(req), 0.1,
+                                        loop=loop)
+    assert 2 == len(tasks)
+    yield from asyncio.wait(tasks, timeout=1, loop=loop)
+    assert all(task.cancelled() for task in tasks)
+    conn.close()
+
+
+def test_tcp_connector_ctor_address_selection(loop):
+    conn = aiohttp.TCPConnector(loop=loop)
+    assert 'first' == conn.address_selection
+    conn = aiohttp.TCPConnector(loop=loop, address_selection='random')
+    assert 'random' == conn.address_selection
+    with pytest.raises(ValueError):
+        aiohttp.TCPConnector(loop=loop, address_selection='fastest')
+
+
+def test_select_addresses_round_robin(loop):
+    conn = aiohttp.TCPConnector(loop=loop, address_selection='round_robin')
+    req = ClientRequest('GET', URL('http://example.com:80'), loop=loop)
+    hosts = [make_hinfo('10.0.0.{}'.format(i), 80) for i in range(3)]
+
+    selected = [conn._select_addresses(req, hosts)[0]['host']
+                for _ in range(4)]
+    assert ['10.0.0.0', '10.0.0.1', '10.0.0.2', '10.0.0.0'] == selected
+    assert [hosts[1], hosts[2], hosts[0]] == conn._select_addresses(
+        req, hosts)
+
+
+def test_select_addresses_round_robin_counters_bounded(loop):
+    conn = aiohttp.TCPConnector(loop=loop, address_selection='round_robin',
+                                dns_cache_size=2)
+    hosts = [make_hinfo('10.0.0.{}'.format(i), 80) for i in range(3)]
+
+    for name in ('a.com', 'b.com', 'a.com', 'c.com'):
+        req = ClientRequest('GET', URL('http://{}:80'.format(name)),
+                            loop=loop)
+        conn._select_addresses(req, hosts)
+    assert [('a.com', 80), ('c.com', 80)] == list(conn._round_robin_counters)
+
+
+def test_select_addresses_round_robin_counters_default_bound(loop):
+    conn = aiohttp.TCPConnector(loop=loop, address_selection='round_robin',
+                                dns_cache_size=None)
+    hosts = [make_hinfo('10.0.0.1', 80)]
+
+    with unittest.mock.patch('aiohttp.connector.ROUND_ROBIN_COUNTERS_SIZE',
+                             2):
+        for i in range(3):
+            req = ClientRequest('GET', URL('http://h{}.com:80'.format(i)),
+                                loop=loop)
+            conn._select_addresses(req, hosts)
+    assert 2 == len(conn._round_robin_counters)
+
+
+def test_clear_dns_cache_resets_round_robin_counter(loop):
+    conn = aiohttp.TCPConnector(loop=loop, address_selection='round_robin')
+    req = ClientRequest('GET', URL('http://example.com:80'), loop=loop)
+    hosts = [make_hinfo('10.0.0.{}'.format(i), 80) for i in range(3)]
+
+    conn._select_addresses(req, hosts)
+    conn.clear_dns_cache('example.com', 80)
+    assert not conn._round_robin_counters
+    assert '10.0.0.0' == conn._select_addresses(req, hosts)[0]['host']
+
+
+def test_select_addresses_random(loop):
+    conn = aiohttp.TCPConnector(loop=loop, address_selection='random')
+    req = ClientRequest('GET', URL('http://example.com:80'), loop=loop)
+    hosts = [make_hinfo('10.0.0.{}'.format(i), 80) for i in range(3)]
+    orig = list(hosts)
+
+    with unittest.mock.patch('aiohttp.connector.random.shuffle') as m:
+        res = conn._select_addresses(req, hosts)
+    m.assert_called_with(res)
+    assert res is not hosts
+    assert orig == hosts
+
+
+def test_select_addresses_least_connections(loop):
+    conn = aiohttp.TCPConnector(loop=loop,
+                                address_selection='least_connections')
+    req = ClientRequest('GET', URL('http://example.com:80'), loop=loop)
+    key = ('example.com', 80, False)
+    hosts = [make_hinfo('10.0.0.{}'.format(i), 80) for i in range(4)]
+
+    def transport(address):
+        tr = unittest.mock.Mock()
+        conn._transport_addresses[tr] = (address, 80)
+        return tr
+
+    conn._conns[key] = [(transport('10.0.0.0'), None, 0),
+                        (transport('10.0.0.1'), None, 0)]
+    conn._acquired_per_host[key] = {transport('10.0.0.0'),
+                                    _TransportPlaceholder()}
+    conn._connecting_addresses[('10.0.0.2', 80)] += 1
+
+    res = conn._select_addresses(req, hosts)
+    assert (['10.0.0.3', '10.0.0.1', '10.0.0.2', '10.0.0.0'] ==
+            [hinfo['host'] for hinfo in res])
+
+
+@pytest.yield_fixture
+def two_listening(loop):
+    servers = [loop.run_until_complete(
+        loop.create_server(asyncio.Protocol, '127.0.0.1', 0))
+        for _ in range(2)]
+    yield [srv.sockets[0].getsockname()[1] for srv in servers]
+    for srv in servers:
+        srv.close()
+        loop.run_until_complete(srv.wait_closed())
+
+
+@asyncio.coroutine
+def test_tcp_connector_least_connections(loop, two_listening):
+    conn = aiohttp.TCPConnector(loop=loop,
+                                address_selection='least_connections')
+    hosts = [make_hinfo('127.0.0.1', port) for port in two_listening]
+    resolved = helpers.create_future(loop)
+    resolved.set_result(hosts)
+    conn._resolve_host = unittest.mock.Mock(return_value=resolved)
+    req = ClientRequest('GET', URL('http://example.com:80'), loop=loop,
+                        response_class=unittest.mock.Mock())
+
+    connections = yield from asyncio.gather(
+        *[conn.connect(req) for _ in range(4)], loop=loop)
+    ports = [c._transport.get_extra_info('peername')[1]
+             for c in connections]
+    assert sorted(two_listening * 2) == sorted(ports)
+
+    # new connections go to the address left without connections,
+    # idle pooled ones are counted too
+    for c, port in zip(connections, ports):
+        if port == two_listening[0]:
+            c.close()
+        else:
+            c.release()
+    new = yield from asyncio.gather(
+        *[conn._create_connection(req) for _ in range(2)], loop=loop)
+    assert ([two_listening[0]] * 2 ==
+            [tr.get_extra_info('peername')[1] for tr, proto in new])
+    for tr, proto in new:
+        tr.close()
+    conn.close()
+
+
+def test_tcp_connector_ssl_session_cache_disabled(loop):
+    conn = aiohttp.TCPConnector(loop=loop, ssl_session_cache_size=0)
+    assert 0 == conn.ssl_session_cache_size
+    assert conn._ssl_sessions is None
+    assert 0 == conn.ssl_session_hits
+    assert 0 == conn.ssl_session_misses
+
+
+@pytest.mark.skipif(not hasattr(ssl, 'SSLSession'),
+                    reason="TLS session resumption requires Python 3.6+")
+def test_tcp_connector_ssl_session_cache_lru(loop):
+    conn = aiohttp.TCPConnector(loop=loop, ssl_session_cache_size=2)
+    assert 2 == conn.ssl_session_cache_size
+
+    def ssl_object(session):
+        return unittest.mock.Mock(session=session)
+
+    conn._store_ssl_session(('a', 443), ssl_object('a1'))
+    conn._store_ssl_session(('b', 443), ssl_object('b1'))
+    conn._store_ssl_session(('a', 443), ssl_object('a2'))
+    conn._store_ssl_session(('c', 443), ssl_object(None))
+    conn._store_ssl_session(('c', 443), ssl_object('c1'))
+
+    assert ([(('a', 443), 'a2'), (('c', 443), 'c1')] ==
+            list(conn._ssl_sessions.items()))
+
+
+@pytest.mark.skipif(not hasattr(ssl, 'SSLSession'),
+                    reason="TLS session resumption requires Python 3.6+")
+def test_tcp_connector_ssl_session_stored_on_release(loop):
+    conn = aiohttp.TCPConnector(loop=loop)
+    tr, proto = unittest.mock.Mock(), unittest.mock.Mock()
+    tr.get_extra_info.return_value = unittest.mock.Mock(session='session')
+    key = ('host', 443, True)
+    conn._acquired.add(tr)
+    conn._release(key, unittest.mock.Mock(), tr, proto, should_close=True)
+
+    tr.get_extra_info.assert_called_with('ssl_object')
+    assert {('host', 443): 'session'} == conn._ssl_sessions
+    conn.close()
+
+
+def test_session_context():
+    context = unittest.mock.Mock()
+    ctx = connector_module._SessionContext(context, 'session')
+
+    assert context.check_hostname is ctx.check_hostname
+    ctx.wrap_bio('in', 'out', server_side=False, server_hostname='host')
+    context.wrap_bio.assert_called_with(
+        'in', 'out', server_side=False, server_hostname='host',
+        session='session')
+
+
 def test_tcp_connector_ctor_fingerprint_valid(loop):
     valid = b'\xa2\x06G\xad\xaa\xf5\xd8\\J\x99^by;\x06='
     conn = aiohttp.TCPConnector(loop=loop, fingerprint=valid)
@@ -795,6 +1431,428 @@ def test_connect_with_capacity_cancelled(loop):
     connection.close()
 
 
+def make_warm_connector(loop, **kwargs):
+    conn = aiohttp.BaseConnector(loop=loop, **kwargs)
+    conn.created = created = []
+
+    @asyncio.coroutine
+    def create_connection(req):
+        yield from asyncio.sleep(0, loop=loop)
+        tr, proto = unittest.mock.Mock(), unittest.mock.Mock()
+        proto.is_connected.return_value = True
+        proto.should_close = False
+        created.append(tr)
+        return tr, proto
+
+    conn._create_connection = create_connection
+    return conn
+
+
+@asyncio.coroutine
+def test_prewarm(loop):
+    conn = make_warm_connector(loop)
+    key = ('host', 80, False)
+
+    assert 3 == (yield from conn.prewarm('http://host:80/path', 3))
+    assert 3 == len(conn._conns[key])
+    assert not conn._acquired
+    assert 1 == (yield from conn.prewarm('http://host', 4))
+    assert 0 == (yield from conn.prewarm('http://host', 2))
+    assert 4 == len(conn._conns[key])
+
+    req = ClientRequest('GET', URL('http://host/'), loop=loop,
+                        response_class=unittest.mock.Mock())
+    connection = yield from conn.connect(req)
+    assert 4 == len(conn.created)
+    connection.release()
+    conn.close()
+
+
+@asyncio.coroutine
+def test_prewarm_limited(loop):
+    conn = make_warm_connector(loop, limit_per_host=2)
+    assert 2 == (yield from conn.prewarm('http://host', 3))
+    assert 2 == (yield from conn.prewarm('http://other', 3))
+    conn.close()
+
+    conn = make_warm_connector(loop, capacity=3)
+    conn._acquired.add(_TransportPlaceholder())
+    assert 2 == (yield from conn.prewarm('http://host', 3))
+    conn.close()
+
+
+@asyncio.coroutine
+def test_prewarm_error(loop):
+    conn = aiohttp.BaseConnector(loop=loop)
+    conn._create_connection = unittest.mock.Mock()
+    conn._create_connection.return_value = helpers.create_future(loop)
+    conn._create_connection.return_value.set_exception(
+        OSError(111, 'Connection refused'))
+
+    with pytest.raises(aiohttp.ClientOSError):
+        yield from conn.prewarm('http://host', 2)
+    assert not conn._conns
+    assert not conn._acquired
+    assert not conn._acquired_per_host
+    conn.close()
+
+
+@asyncio.coroutine
+def test_prewarm_cancelled(loop):
+    conn = aiohttp.BaseConnector(loop=loop)
+    conn._create_connection = unittest.mock.Mock(
+        return_value=helpers.create_future(loop))
+
+    task = helpers.ensure_future(conn.prewarm('http://host', 2), loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    assert 2 == len(conn._acquired)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        yield from task
+    assert not conn._acquired
+    conn.close()
+
+
+@asyncio.coroutine
+def test_prewarm_wakes_waiters(loop):
+    conn = make_warm_connector(loop, capacity=1)
+    req = ClientRequest('GET', URL('http://host/'), loop=loop,
+                        response_class=unittest.mock.Mock())
+
+    warm = helpers.ensure_future(conn.prewarm('http://host'), loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    connection = yield from conn.connect(req)
+    yield from warm
+    assert 1 == len(conn.created)
+    connection.release()
+    conn.close()
+
+
+def test_min_idle_per_host_ctor(loop):
+    conn = aiohttp.BaseConnector(loop=loop)
+    assert 0 == conn.min_idle_per_host
+    conn.close()
+    conn = aiohttp.BaseConnector(loop=loop, min_idle_per_host=2)
+    assert 2 == conn.min_idle_per_host
+    conn.close()
+    with pytest.raises(ValueError):
+        aiohttp.BaseConnector(loop=loop, force_close=True,
+                              min_idle_per_host=2)
+    with pytest.raises(ValueError):
+        aiohttp.BaseConnector(loop=loop, keepalive_timeout=None,
+                              min_idle_per_host=2)
+
+
+@asyncio.coroutine
+def test_min_idle_per_host_top_up(loop):
+    conn = make_warm_connector(loop, min_idle_per_host=2)
+    key = ('host', 80, False)
+    req = ClientRequest('GET', URL('http://host/'), loop=loop,
+                        response_class=unittest.mock.Mock())
+
+    connection = yield from conn.connect(req)
+    connection.release()
+    assert 1 == len(conn._conns[key])
+
+    conn._cleanup()
+    assert key in conn._warming
+    conn._cleanup()
+    yield from conn._warming[key]
+    assert not conn._warming
+    assert 2 == len(conn._conns[key])
+    assert 2 == len(conn.created)
+
+    # keep-alive expired connections are replaced
+    conn._keepalive_timeout = 0
+    conn._time_service.loop_time = unittest.mock.Mock(
+        return_value=loop.time() + 1)
+    conn._warm_used[key] = loop.time() + 1
+    conn._cleanup()
+    assert key not in conn._conns
+    yield from conn._warming[key]
+    assert 2 == len(conn._conns[key])
+    assert 4 == len(conn.created)
+    conn.close()
+
+
+@asyncio.coroutine
+def test_min_idle_per_host_forgets_unused(loop):
+    conn = make_warm_connector(loop, min_idle_per_host=1,
+                               keepalive_timeout=10)
+    conn._time_service.loop_time = unittest.mock.Mock(return_value=100)
+    warm = yield from conn.prewarm('http://warm', 1)
+    assert 1 == warm
+    for i in range(100):
+        req = ClientRequest('GET', URL('http://host%d/' % i), loop=loop,
+                            response_class=unittest.mock.Mock())
+        connection = yield from conn.connect(req)
+        connection.close()
+    assert 101 == len(conn._warm_urls)
+
+    conn._time_service.loop_time.return_value = 105
+    connection = yield from conn.connect(req)
+    connection.close()
+    conn._time_service.loop_time.return_value = 111
+    conn._cleanup()
+    assert {('warm', 80, False), ('host99', 80, False)} == set(
+        conn._warm_urls)
+    assert [('host99', 80, False)] == list(conn._warm_used)
+    yield from asyncio.wait(list(conn._warming.values()), loop=loop)
+    conn.close()
+
+
+@asyncio.coroutine
+def test_min_idle_per_host_failed(loop):
+    conn = make_warm_connector(loop, min_idle_per_host=2)
+    conn._warm_urls[('host', 80, False)] = URL('http://host')
+    conn._create_connection = unittest.mock.Mock()
+    conn._create_connection.return_value = helpers.create_future(loop)
+    conn._create_connection.return_value.set_exception(OSError())
+
+    conn._cleanup()
+    yield from asyncio.wait(list(conn._warming.values()), loop=loop)
+    assert not conn._warming
+    assert not conn._conns
+    conn.close()
+
+
+def test_close_cancels_warming(loop):
+    conn = aiohttp.BaseConnector(loop=loop, min_idle_per_host=2)
+    task = unittest.mock.Mock()
+    conn._warming[('host', 80, False)] = task
+    conn.close()
+    task.cancel.assert_called_with()
+    assert not conn._warming
+
+
+@asyncio.coroutine
+def test_connect_with_limit_per_host(loop):
+
+    @asyncio.coroutine
+    def create_connection(req):
+        tr, proto = unittest.mock.Mock(), unittest.mock.Mock()
+        proto.should_close = False
+        return tr, proto
+
+    def make_req(host):
+        return ClientRequest('GET', URL('http://{}:80'.format(host)),
+                             loop=loop,
+                             response_class=unittest.mock.Mock(
+                                 _should_close=True))
+
+    conn = aiohttp.BaseConnector(loop=loop, capacity=10, limit_per_host=1)
+    conn._create_connection = create_connection
+    assert 1 == conn.limit_per_host
+
+    connection1 = yield from conn.connect(make_req('host1'))
+
+    # other host is not blocked
+    connection2 = yield from conn.connect(make_req('host2'))
+    connection2.release()
+
+    task = helpers.ensure_future(conn.connect(make_req('host1')), loop=loop)
+    yield from asyncio.sleep(0.01, loop=loop)
+    assert not task.done()
+    assert 1 == len(conn._waiters[('host1', 80, False)])
+
+    connection1.release()
+    connection3 = yield from task
+    assert not conn._waiters
+    assert 1 == len(conn._acquired_per_host[('host1', 80, False)])
+    connection3.release()
+    assert not conn._acquired
+    assert not conn._acquired_per_host
+    conn.close()
+
+
+@asyncio.coroutine
+def test_connect_waiter_cancelled_after_wakeup(loop):
+
+    @asyncio.coroutine
+    def create_connection(req):
+        return unittest.mock.Mock(), unittest.mock.Mock()
+
+    req = ClientRequest('GET', URL('http://host:80'), loop=loop,
+                        response_class=unittest.mock.Mock(
+                            _should_close=True))
+    conn = aiohttp.BaseConnector(loop=loop, capacity=1)
+    conn._create_connection = create_connection
+
+    connection = yield from conn.connect(req)
+    task1 = helpers.ensure_future(conn.connect(req), loop=loop)
+    task2 = helpers.ensure_future(conn.connect(req), loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+
+    # the slot is reserved for task1, which is cancelled before it runs
+    connection.release()
+    task1.cancel()
+    connection2 = yield from task2
+    assert task1.cancelled()
+    assert 1 == len(conn._acquired)
+    connection2.release()
+    conn.close()
+
+
+@asyncio.coroutine
+def test_connect_waiter_cancelled(loop):
+    req = ClientRequest('GET', URL('http://host:80'), loop=loop,
+                        response_class=unittest.mock.Mock())
+    conn = aiohttp.BaseConnector(loop=loop, capacity=1)
+    conn._acquired.add(unittest.mock.Mock())
+
+    with pytest.raises(asyncio.TimeoutError):
+        yield from asyncio.wait_for(conn.connect(req), 0.01, loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    assert not conn._waiters
+    conn.close()
+
+
+def make_pipelining_connector(loop, **kwargs):
+
+    @asyncio.coroutine
+    def create_connection(req):
+        tr, proto = unittest.mock.Mock(), unittest.mock.Mock()
+        proto.should_close = False
+        return tr, proto
+
+    conn = aiohttp.BaseConnector(loop=loop, **kwargs)
+    conn._create_connection = create_connection
+    return conn
+
+
+def test_pipeline_depth_ctor(loop):
+    conn = aiohttp.BaseConnector(loop=loop)
+    assert 1 == conn.pipeline_depth
+    conn.close()
+    conn = aiohttp.BaseConnector(loop=loop, pipeline_depth=4)
+    assert 4 == conn.pipeline_depth
+    conn.close()
+    with pytest.raises(ValueError):
+        aiohttp.BaseConnector(loop=loop, pipeline_depth=0)
+    with pytest.raises(ValueError):
+        aiohttp.BaseConnector(loop=loop, force_close=True, pipeline_depth=2)
+
+
+def test_can_pipeline(loop):
+    def make_req(method='GET', url='http://host', **kwargs):
+        return ClientRequest(method, URL(url), loop=loop, **kwargs)
+
+    can_pipeline = aiohttp.BaseConnector._can_pipeline
+    assert can_pipeline(make_req())
+    assert can_pipeline(make_req('HEAD'))
+    assert not can_pipeline(make_req('POST'))
+    assert not can_pipeline(make_req(data=b'data'))
+    assert not can_pipeline(make_req(expect100=True))
+    assert not can_pipeline(make_req(proxy=URL('http://proxy')))
+    assert not can_pipeline(make_req(version=aiohttp.HttpVersion10))
+    assert not can_pipeline(make_req(headers={'Upgrade': 'websocket'}))
+
+
+@asyncio.coroutine
+def test_connect_pipelined_at_limit(loop):
+    conn = make_pipelining_connector(loop, capacity=1, pipeline_depth=2)
+    key = ('host', 80, False)
+    req = ClientRequest('GET', URL('http://host:80'), loop=loop)
+
+    connection1 = yield from conn.connect(req)
+    assert not connection1.pipelined
+    transport = connection1._transport
+    connection2 = yield from conn.connect(req)
+    assert connection2.pipelined
+    assert connection2._transport is transport
+    assert 2 == conn._pipelines[key][transport].requests
+
+    # pipeline is full
+    task = helpers.ensure_future(conn.connect(req), loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    assert not task.done()
+
+    connection1.release()
+    assert not task.done()
+    assert 1 == len(conn._acquired)
+    assert key not in conn._conns
+
+    # the last response returns connection to pool
+    connection2.release()
+    connection3 = yield from task
+    assert connection3._transport is transport
+    assert not connection3.pipelined
+    connection3.release()
+    assert not conn._acquired
+    assert not conn._pipelines
+    assert 1 == len(conn._conns[key])
+    conn.close()
+
+
+@asyncio.coroutine
+def test_connect_pipelined_least_loaded(loop):
+    conn = make_pipelining_connector(loop, capacity=2, pipeline_depth=3)
+    req = ClientRequest('GET', URL('http://host:80'), loop=loop)
+
+    connection1 = yield from conn.connect(req)
+    connection2 = yield from conn.connect(req)
+    connection3 = yield from conn.connect(req)
+    connection4 = yield from conn.connect(req)
+    assert connection3._transport is connection1._transport
+    assert connection4._transport is connection2._transport
+    for connection in (connection1, connection2, connection3, connection4):
+        connection.release()
+    conn.close()
+
+
+@asyncio.coroutine
+def test_connect_not_pipelined(loop):
+    conn = make_pipelining_connector(loop, capacity=1, pipeline_depth=2)
+    req = ClientRequest('GET', URL('http://host:80'), loop=loop)
+    post = ClientRequest('POST', URL('http://host:80'), loop=loop)
+
+    connection = yield from conn.connect(req)
+    task1 = helpers.ensure_future(conn.connect(post), loop=loop)
+    task2 = helpers.ensure_future(conn.connect(req, pipeline=False),
+                                  loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    assert not task1.done()
+    assert not task2.done()
+
+    connection.release()
+    connection = yield from task1
+    assert ('host', 80, False) not in conn._pipelines
+    connection.release()
+    connection = yield from task2
+    assert not connection.pipelined
+    connection.release()
+    conn.close()
+
+
+@asyncio.coroutine
+def test_release_pipelined_should_close(loop):
+    conn = make_pipelining_connector(loop, capacity=1, pipeline_depth=3)
+    req = ClientRequest('GET', URL('http://host:80'), loop=loop)
+
+    connection1 = yield from conn.connect(req)
+    connection2 = yield from conn.connect(req)
+    connection3 = yield from conn.connect(req)
+    transport = connection1._transport
+
+    connection1.close()
+    transport.close.assert_called_with()
+    assert 1 == len(conn._acquired)
+
+    # closed pipeline is not joined
+    task = helpers.ensure_future(conn.connect(req), loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+    assert not task.done()
+
+    connection2.close()
+    connection3.release()
+    assert 1 == transport.close.call_count
+    connection4 = yield from task
+    assert connection4._transport is not transport
+    assert not conn._conns
+    connection4.release()
+    conn.close()
+
+
 @asyncio.coroutine
 def test_connect_with_capacity_release_waiters(loop):
 
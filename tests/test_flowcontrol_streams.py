@@ -235,6 +235,17 @@ class FlowControlMixin:
         self.assertTrue(self.protocol.transport.pause_reading.called)
         self.assertTrue(self.protocol._reading_paused)
 
+    def test_resume_on_read_nowait(self):
+        out = self._make_one()
+        out.feed_data(object(), 100)
+        out.feed_data(object(), 100)
+        self.assertTrue(self.protocol._reading_paused)
+
+        self.assertEqual(2, len(out.read_nowait()))
+
+        self.assertTrue(self.protocol.transport.resume_reading.called)
+        self.assertFalse(self.protocol._reading_paused)
+
     def test_no_pause_on_read(self):
         item = object()
 
@@ -447,6 +447,30 @@ class TestTimeService:
         # second call should use cached value
         assert time_service.strtime() == 'Sun, 30 Oct 2016 03:13:52 GMT'
 
+    def test_date_header(self, time_service):
+        time_service._time = 1477797232
+        assert (time_service.date_header() ==
+                b'Date: Sun, 30 Oct 2016 03:13:52 GMT\r\n')
+        assert time_service.date_header() is time_service.date_header()
+
+    def test_default_headers(self, time_service):
+        time_service._time = 1477797232
+        assert (time_service.default_headers('aiohttp') ==
+                b'Date: Sun, 30 Oct 2016 03:13:52 GMT\r\n'
+                b'Server: aiohttp\r\n')
+        assert (time_service.default_headers('custom') ==
+                b'Date: Sun, 30 Oct 2016 03:13:52 GMT\r\n'
+                b'Server: custom\r\n')
+
+    def test_default_headers_refreshed_on_tick(self, time_service):
+        time_service._time = 1477797232
+        time_service.default_headers('aiohttp')
+        time_service._on_cb()
+        time_service._time = 1477797233
+        assert (time_service.default_headers('aiohttp') ==
+                b'Date: Sun, 30 Oct 2016 03:13:53 GMT\r\n'
+                b'Server: aiohttp\r\n')
+
     def test_recalc_time(self, time_service, mocker):
         mocker.spy(time_service._loop, 'time')
 
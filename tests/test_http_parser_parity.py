@@ -0,0 +1,313 @@
+"""Pure python and compiled parsers must produce the same results."""
+
+import zlib
+from unittest import mock
+
+import pytest
+
+import aiohttp
+from aiohttp import errors, protocol
+
+REQUEST_PARSERS = [protocol.HttpRequestParserPy]
+if hasattr(protocol, 'HttpRequestParserC'):
+    REQUEST_PARSERS.append(protocol.HttpRequestParserC)
+
+requires_cython = pytest.mark.skipif(
+    not hasattr(protocol, 'HttpRequestParserC'), reason='Requires Cython')
+
+
+RESPONSE_PARSERS = [protocol.HttpResponseParserPy]
+if hasattr(protocol, 'HttpResponseParserC'):
+    RESPONSE_PARSERS.append(protocol.HttpResponseParserC)
+
+PAYLOAD_PARSERS = [protocol.HttpPayloadParserPy]
+if hasattr(protocol, 'HttpPayloadParserC'):
+    PAYLOAD_PARSERS.append(protocol.HttpPayloadParserC)
+
+
+REQUESTS = [
+    b'GET / HTTP/1.1\r\n\r\n',
+    b'get /path HTTP/1.1\r\n\r\n',
+    b'GET //path?a=b&c=d HTTP/1.0\r\n\r\n',
+    b'GET /path HTTP/1.1\r\n'
+    b'Host: example.com\r\n'
+    b'User-Agent: test\r\n'
+    b'Accept: */*\r\n\r\n',
+    b'POST /path HTTP/1.1\r\n'
+    b'content-length: 10\r\n'
+    b'Content-Type: application/json\r\n\r\n',
+    b'GET /path HTTP/1.1\r\nConnection: close\r\n\r\n',
+    b'GET /path HTTP/1.0\r\nConnection: keep-alive\r\n\r\n',
+    b'GET /path HTTP/1.1\r\nConnection: Upgrade\r\n'
+    b'Upgrade: websocket\r\n\r\n',
+    b'GET /path HTTP/1.1\r\nConnection: other\r\n\r\n',
+    b'POST /path HTTP/1.1\r\nTransfer-Encoding: gzip, chunked\r\n\r\n',
+    b'POST /path HTTP/1.1\r\nContent-Encoding: GZIP\r\n\r\n',
+    b'POST /path HTTP/1.1\r\nContent-Encoding: deflate\r\n\r\n',
+    b'POST /path HTTP/1.1\r\nContent-Encoding: compress\r\n\r\n',
+    b'GET /path HTTP/1.1\r\n'
+    b'Set-Cookie: c1=cookie1\r\n'
+    b'set-cookie: c2=cookie2\r\n\r\n',
+    b'GET /path HTTP/1.1\r\n'
+    b'Connection: close\r\nConnection: keep-alive\r\n\r\n',
+    b'GET /path HTTP/1.1\r\n'
+    b'test: line\r\n continue\r\n\tmore\r\ntest2: data\r\n\r\n',
+    b'GET /path HTTP/1.1\r\ntest: line\r\n continue\r\n\r\n',
+    b'GET /path HTTP/1.1\r\n  x-padded \t:  \t value \x0b\r\n\r\n',
+    b'GET /path HTTP/1.1\r\nx-empty:\r\n\r\n',
+    b'GET /path HTTP/1.1\r\nx-colon: a:b:c\r\n\r\n',
+    'GET /path HTTP/1.1\r\nx-test:тест\r\n\r\n'.encode('utf-8'),
+    'GET /path HTTP/1.1\r\nx-test:тест\r\n\r\n'.encode('cp1251'),
+    'GET /path HTTP/1.1\r\nx-тест: value\r\n\r\n'.encode('utf-8'),
+    b'GET /path HTTP/2.0\r\n\r\n',
+    b'GET /path HTTP/0.9\r\n\r\n',
+    b'GET /path HTTP/1.1 extra\r\n\r\n',
+    b'GET /path HT/11\r\n\r\n',
+    b'GET /path\r\n\r\n',
+    b'\r\n\r\n',
+    b'!12%()+=~$ /get HTTP/1.1\r\n\r\n',
+    b'$GET /path HTTP/1.1\r\n\r\n',
+    b'GET /path HTTP/1.1\r\nno colon\r\n\r\n',
+    b'GET /path HTTP/1.1\r\nbad name: value\r\n\r\n',
+    b'GET /path HTTP/1.1\r\nbad[name]: value\r\n\r\n',
+    b'GET /path HTTP/1.1\r\nbad\x01name: value\r\n\r\n',
+    b'GET /path HTTP/1.1\r\n: value\r\n\r\n',
+]
+
+
+def _parse(parser, lines):
+    try:
+        return parser.parse_message(lines)
+    except errors.HttpProcessingError as exc:
+        return type(exc), exc.args, exc.message
+
+
+@pytest.fixture(params=REQUEST_PARSERS)
+def parser(request):
+    return request.param()
+
+
+@requires_cython
+@pytest.mark.parametrize('message', REQUESTS)
+def test_request_parity(message):
+    lines = message.split(b'\r\n')
+    expected = _parse(protocol.HttpRequestParserPy(), lines)
+    result = _parse(protocol.HttpRequestParserC(), lines)
+    assert expected == result
+    if isinstance(expected, protocol.RawRequestMessage):
+        assert [type(k) for k in expected.headers] == \
+            [type(k) for k in result.headers]
+
+
+@requires_cython
+@pytest.mark.parametrize('max_field_size', [5, 10, 15, 8190])
+def test_request_parity_max_field_size(max_field_size):
+    lines = (b'GET /path HTTP/1.1\r\n'
+             b'test: line\r\n data\r\n'
+             b'test2: line data data\r\n\r\n').split(b'\r\n')
+    expected = _parse(
+        protocol.HttpRequestParserPy(max_field_size=max_field_size), lines)
+    result = _parse(
+        protocol.HttpRequestParserC(max_field_size=max_field_size), lines)
+    assert expected == result
+
+
+def test_parse_message(parser):
+    msg = parser.parse_message(
+        b'GET /path HTTP/1.1\r\nHost: example.com\r\n\r\n'.split(b'\r\n'))
+    assert isinstance(msg, protocol.RawRequestMessage)
+    assert msg.method == 'GET'
+    assert msg.path == '/path'
+    assert msg.version == protocol.HttpVersion11
+    assert msg.headers['HOST'] == 'example.com'
+    assert msg.raw_headers == [(b'HOST', b'example.com')]
+    assert not msg.should_close
+
+
+def test_parse_headers(parser):
+    headers, raw_headers, close, compression, upgrade, chunked = \
+        parser.parse_headers([b'', b'connection: close',
+                              b'transfer-encoding: chunked', b''])
+    assert headers['Connection'] == 'close'
+    assert close
+    assert chunked
+    assert compression is None
+    assert not upgrade
+
+
+def test_parse_headers_continuation_at_end(parser):
+    headers, *_ = parser.parse_headers([b'', b'test: line',
+                                        b' continue', b''])
+    assert headers['Test'] == 'line\r\n continue'
+
+
+def test_invalid_header(parser):
+    with pytest.raises(errors.InvalidHeader) as ctx:
+        parser.parse_message(
+            b'GET /path HTTP/1.1\r\nbad name: value\r\n\r\n'.split(b'\r\n'))
+    assert ctx.value.hdr == 'BAD NAME'
+
+
+def test_max_field_size(parser):
+    parser.max_field_size = 5
+    with pytest.raises(errors.LineTooLong) as ctx:
+        parser.parse_message(
+            b'GET /path HTTP/1.1\r\ntest: line\r\n\r\n'.split(b'\r\n'))
+    assert 'request header field TEST' in str(ctx.value)
+
+
+def test_subclass_parser():
+    for cls in REQUEST_PARSERS:
+        class Parser(cls):
+            pass
+
+        msg = Parser().parse_message(
+            b'GET /path HTTP/1.1\r\n\r\n'.split(b'\r\n'))
+        assert msg.path == '/path'
+
+
+RESPONSES = [
+    b'HTTP/1.1 200 OK\r\n\r\n',
+    b'HTTP/1.0 200 OK\r\n\r\n',
+    b'HTTP/1.1 200\r\n\r\n',
+    b'HTTP/1.1 404 Not   Found  \r\n\r\n',
+    b'HTTP/1.1 200 OK\r\n'
+    b'Content-Length: 10\r\n'
+    b'Content-Type: text/plain\r\n'
+    b'Connection: keep-alive\r\n\r\n',
+    b'HTTP/1.0 200 OK\r\nConnection: keep-alive\r\n\r\n',
+    b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n'
+    b'Content-Encoding: gzip\r\n\r\n',
+    b'HTTP/1.1 101 Switching Protocols\r\nConnection: upgrade\r\n'
+    b'Upgrade: websocket\r\n\r\n',
+    b'HTTP/1.1 200 OK\r\n'
+    b'Set-Cookie: c1=cookie1\r\nSet-Cookie: c2=cookie2\r\n\r\n',
+    'HTTP/1.1 200 Ok\r\nx-test:тест\r\n\r\n'.encode('utf-8'),
+    b'HTTP/2.0 200 OK\r\n\r\n',
+    b'HTTP/1.1x 200 OK\r\n\r\n',
+    b'HT/11 200 Ok\r\n\r\n',
+    b'HTT/1\r\n\r\n',
+    b'\r\n\r\n',
+    b'HTTP/1.1 99 test\r\n\r\n',
+    b'HTTP/1.1 099 test\r\n\r\n',
+    b'HTTP/1.1 9999 test\r\n\r\n',
+    b'HTTP/1.1 ttt test\r\n\r\n',
+    b'HTTP/1.1 +200 OK\r\n\r\n',
+    b'HTTP/1.1 200 OK\r\nbad name: value\r\n\r\n',
+]
+
+
+def _parse_response(parser, lines):
+    try:
+        return parser.parse_message(lines)
+    except errors.HttpProcessingError as exc:
+        return type(exc), exc.args, exc.message
+
+
+@requires_cython
+@pytest.mark.parametrize('message', RESPONSES)
+def test_response_parity(message):
+    lines = message.split(b'\r\n')
+    expected = _parse_response(protocol.HttpResponseParserPy(), lines)
+    result = _parse_response(protocol.HttpResponseParserC(), lines)
+    assert expected == result
+
+
+@pytest.fixture(params=RESPONSE_PARSERS)
+def response_parser(request):
+    return request.param()
+
+
+def test_parse_response_message(response_parser):
+    msg = response_parser.parse_message(
+        b'HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\n'.split(b'\r\n'))
+    assert isinstance(msg, protocol.RawResponseMessage)
+    assert msg.version == protocol.HttpVersion11
+    assert msg.code == 200
+    assert msg.reason == 'OK'
+    assert msg.headers['Content-Length'] == '4'
+    assert not msg.should_close
+
+
+_comp = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+_COMPRESSED = _comp.compress(b'data' * 100) + _comp.flush()
+
+PAYLOADS = [
+    (dict(length=4), b'data'),
+    (dict(length=4), b'datatail'),
+    (dict(length=0), b'data'),
+    (dict(readall=True), b'data'),
+    (dict(chunked=True), b'4\r\ndata\r\n4\r\nline\r\n0\r\ntest\r\n'),
+    (dict(chunked=True), b'4\r\ndata\r\n0\r\n\r\ntail'),
+    (dict(chunked=True), b'4;ext=1\r\ndata\r\n0;ext\r\n\r\n'),
+    (dict(chunked=True), b'A\r\n0123456789\r\na\r\n0123456789\r\n0\r\n\r\n'),
+    (dict(chunked=True), b'000004\r\ndata\r\n0\r\n\r\n'),
+    (dict(chunked=True), b' 4 \r\ndata\r\n0\r\n\r\n'),
+    (dict(chunked=True), b'0x4\r\ndata\r\n0\r\n\r\n'),
+    (dict(chunked=True), b'blah\r\n'),
+    (dict(chunked=True), b'\r\ndata'),
+    (dict(chunked=True), b'4\r\ndataXX4\r\nline\r\n0\r\n\r\n'),
+    (dict(chunked=True, compression='deflate'),
+     '{:x}'.format(len(_COMPRESSED)).encode() + b'\r\n' +
+     _COMPRESSED + b'\r\n0\r\n\r\n'),
+    (dict(length=len(_COMPRESSED), compression='deflate'), _COMPRESSED),
+    (dict(response_with_body=False), b'data'),
+]
+
+
+def _feed(cls, kwargs, data, step):
+    out = aiohttp.FlowControlDataQueue(mock.Mock())
+    results = []
+    try:
+        parser = cls(out, **kwargs)
+        results.append(parser.done)
+        for i in range(0, len(data), step):
+            results.append(parser.feed_data(data[i:i+step]))
+            if results[-1][0]:
+                break
+        parser.feed_eof()
+    except errors.HttpProcessingError as exc:
+        results.append((type(exc), exc.args))
+    return (results, b''.join(d for d, _ in out._buffer),
+            out.is_eof(), type(out.exception()))
+
+
+@requires_cython
+@pytest.mark.parametrize('kwargs,data', PAYLOADS)
+@pytest.mark.parametrize('step', [1, 2, 3, 7, 1024])
+def test_payload_parity(kwargs, data, step):
+    expected = _feed(protocol.HttpPayloadParserPy, kwargs, data, step)
+    result = _feed(protocol.HttpPayloadParserC, kwargs, data, step)
+    assert expected == result
+
+
+@pytest.fixture(params=PAYLOAD_PARSERS)
+def payload_parser(request):
+    return request.param
+
+
+def test_parse_chunked_payload(payload_parser):
+    out = aiohttp.FlowControlDataQueue(mock.Mock())
+    p = payload_parser(out, chunked=True)
+    eof, tail = p.feed_data(b'4\r\ndata\r\n4\r\nline\r\n0\r\n\r\nHTTP')
+    assert eof
+    assert tail == b'HTTP'
+    assert b'dataline' == b''.join(d for d, _ in out._buffer)
+    assert out.is_eof()
+
+
+def test_parse_chunked_payload_size_error(payload_parser):
+    out = aiohttp.FlowControlDataQueue(mock.Mock())
+    p = payload_parser(out, chunked=True)
+    with pytest.raises(errors.TransferEncodingError):
+        p.feed_data(b'blah\r\n')
+    assert isinstance(out.exception(), errors.TransferEncodingError)
+
+
+@requires_cython
+def test_parse_chunked_payload_negative_size():
+    out = aiohttp.FlowControlDataQueue(mock.Mock())
+    p = protocol.HttpPayloadParserC(out, chunked=True)
+    with pytest.raises(errors.TransferEncodingError):
+        p.feed_data(b'-4\r\ndata\r\n')
+    assert isinstance(out.exception(), errors.TransferEncodingError)
@@ -1,12 +1,15 @@
 """Tests for aiohttp/protocol.py"""
 
 import asyncio
+import collections
 import zlib
 from unittest import mock
 
 import pytest
+from multidict import CIMultiDict
 
 from aiohttp import hdrs, protocol
+from aiohttp.streams import StreamWriter
 
 
 @pytest.fixture
@@ -269,6 +272,66 @@ def test_send_headers(stream):
     assert msg.is_headers_sent()
 
 
+def test_encode_headers():
+    headers = CIMultiDict([('Content-Type', 'text/plain'),
+                           ('Content-Length', '4'),
+                           ('Date', 'Sun, 06 Nov 1994 08:49:37 GMT'),
+                           ('X-Header', 'значение')])
+    content = protocol.encode_headers('HTTP/1.1 200 OK\r\n', headers)
+    assert content == ('HTTP/1.1 200 OK\r\n'
+                       'Content-Type: text/plain\r\n'
+                       'Content-Length: 4\r\n'
+                       'Date: Sun, 06 Nov 1994 08:49:37 GMT\r\n'
+                       'X-Header: значение\r\n\r\n').encode('utf-8')
+    assert content == protocol.encode_headers(
+        'HTTP/1.1 200 OK\r\n', headers)
+
+
+def test_encode_headers_cache():
+    lines = collections.OrderedDict()
+    headers = CIMultiDict([('Content-Type', 'text/plain'),
+                           ('Server', 'aiohttp')])
+    protocol.encode_headers('HTTP/1.1 200 OK\r\n', headers, _lines=lines)
+    assert ['HTTP/1.1 200 OK\r\n',
+            ('Content-Type', 'text/plain', ': ', '\r\n'),
+            ('Server', 'aiohttp', ': ', '\r\n')] == list(lines)
+
+    content = protocol.encode_headers('HTTP/1.1 200 OK\r\n', headers,
+                                      _sep=':', _lines=lines)
+    assert b'Content-Type:text/plain\r\n' in content
+    assert ('Content-Type', 'text/plain', ':', '\r\n') in lines
+
+
+def test_encode_headers_cache_skips_parameters():
+    lines = collections.OrderedDict()
+    headers = CIMultiDict(
+        [('Content-Type', 'multipart/form-data; boundary=1234')])
+    content = protocol.encode_headers('HTTP/1.1 200 OK\r\n', headers,
+                                      _lines=lines)
+    assert b'Content-Type: multipart/form-data; boundary=1234\r\n' in content
+    assert ['HTTP/1.1 200 OK\r\n'] == list(lines)
+
+
+def test_encode_headers_cache_lru():
+    lines = collections.OrderedDict()
+    with mock.patch('aiohttp.protocol._ENCODED_LINES_LIMIT', 3):
+        for value in ('a', 'b', 'a', 'c'):
+            protocol.encode_headers('HTTP/1.1 200 OK\r\n',
+                                    CIMultiDict(Server=value),
+                                    _lines=lines)
+    assert [('Server', 'a', ': ', '\r\n'),
+            'HTTP/1.1 200 OK\r\n',
+            ('Server', 'c', ': ', '\r\n')] == list(lines)
+
+
+def test_encode_headers_date_changed():
+    headers = CIMultiDict(Date='Sun, 06 Nov 1994 08:49:37 GMT')
+    protocol.encode_headers('HTTP/1.1 200 OK\r\n', headers)
+    headers['Date'] = 'Sun, 06 Nov 1994 08:49:38 GMT'
+    content = protocol.encode_headers('HTTP/1.1 200 OK\r\n', headers)
+    assert b'Date: Sun, 06 Nov 1994 08:49:38 GMT\r\n' in content
+
+
 def test_send_headers_non_ascii(stream):
     msg = protocol.Response(stream, 200)
     msg.add_headers(('x-header', 'текст'))
@@ -463,6 +526,65 @@ def test_write_payload_deflate_and_chunked(stream, loop):
             content.split(b'\r\n\r\n', 1)[-1])
 
 
+@pytest.fixture
+def vectored_stream(loop):
+    transport = mock.Mock()
+    transport.is_closing.return_value = False
+    proto = mock.Mock()
+    proto._drain_helper.return_value = ()
+    return StreamWriter(proto, transport, loop, vectored=True)
+
+
+@asyncio.coroutine
+def test_write_payload_chunked_vectored(vectored_stream, loop):
+    transport = vectored_stream.transport
+    writelines = vectored_stream.writelines = mock.Mock()
+    msg = protocol.Response(vectored_stream, 200, loop=loop)
+    msg.enable_chunking()
+    msg.send_headers()
+
+    data = b'd' * (protocol.COALESCE_LIMIT + 1)
+    msg.write(data)
+    yield from msg.write_eof(b'end')
+
+    # framing is passed as separate buffers, payload is not copied
+    chunks = [c for call in writelines.mock_calls for c in call[1][0]]
+    size = ('%x\r\n' % len(data)).encode('ascii')
+    assert [size, data, b'\r\n'] == chunks[-3:]
+    assert chunks[-2] is data
+    transport.write.assert_called_with(b'3\r\nend\r\n0\r\n\r\n')
+
+
+@asyncio.coroutine
+def test_write_payload_vectored_small_coalesced(vectored_stream, loop):
+    transport = vectored_stream.transport
+    msg = protocol.Response(vectored_stream, 200, loop=loop)
+    msg.add_header('Content-Length', '4')
+    msg.send_headers()
+    yield from msg.write_eof(b'data')
+
+    # headers and body are sent by single write
+    assert 1 == transport.write.call_count
+    content = transport.write.call_args[0][0]
+    assert content.startswith(b'HTTP/1.1 200 OK\r\n')
+    assert content.endswith(b'\r\n\r\ndata')
+    assert not transport.writelines.called
+
+
+def test_write_payload_not_vectored_stream(loop):
+    transport = mock.Mock()
+    stream = StreamWriter(mock.Mock(), transport, loop)
+    assert not stream.vectored
+    msg = protocol.Response(stream, 200, loop=loop)
+    msg.enable_chunking()
+    msg.send_headers()
+    msg.write(b'data')
+
+    content = b''.join(c[1][0] for c in transport.write.mock_calls)
+    assert content.endswith(b'4\r\ndata\r\n')
+    assert not transport.writelines.called
+
+
 def test_write_drain(stream, loop):
     msg = protocol.Response(stream, 200, http_version=(1, 0), loop=loop)
     msg.drain = mock.Mock()
@@ -110,3 +110,31 @@ async def test_closed_async_for(loop, test_client):
     assert resp.closed
 
     await closed
+
+
+async def test_client_ws_iter_batches(loop, test_client):
+    items = ['q{}'.format(i) for i in range(10)]
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for i in items[:5]:
+            ws.send_str(i)
+        ws.ping()
+        for i in items[5:]:
+            ws.send_str(i)
+        await ws.close()
+        return ws
+
+    app = web.Application(loop=loop)
+    app.router.add_route('GET', '/', handler)
+
+    client = await test_client(app)
+    resp = await client.ws_connect('/')
+    received = []
+    async for batch in resp.iter_batches(4):
+        assert 1 <= len(batch) <= 4
+        received.extend(msg.data for msg in batch)
+
+    assert items == received
+    assert resp.closed
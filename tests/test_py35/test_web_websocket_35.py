@@ -69,3 +69,31 @@ async def test_closed_async_for(loop, test_client):
 
     await ws.close()
     await closed
+
+
+async def test_server_ws_iter_batches(loop, test_client):
+    received = helpers.create_future(loop)
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        batches = []
+        async for batch in ws.iter_batches():
+            batches.append([msg.data for msg in batch])
+        received.set_result(batches)
+        return ws
+
+    app = web.Application(loop=loop)
+    app.router.add_route('GET', '/', handler)
+
+    client = await test_client(app)
+    resp = await client.ws_connect('/')
+    items = ['q{}'.format(i) for i in range(10)]
+    for item in items:
+        resp.send_str(item)
+    resp.ping()
+    await resp.close()
+
+    batches = await received
+    assert items == [data for batch in batches for data in batch]
+    assert all(batches)
@@ -1,9 +1,13 @@
+import asyncio
+import multiprocessing
 import os
+import signal
 import socket
 import ssl
-
+import time
 from io import StringIO
 from unittest import mock
+from urllib.request import urlopen
 from uuid import uuid4
 
 import pytest
@@ -354,3 +358,110 @@ def test_run_app_existing_file_conflict(loop, mocker, shorttmpdir):
 
     # No attempt should be made to remove a non-socket file
     assert mock.call([sock_path_str]) not in os.remove.mock_calls
+
+
+skip_if_no_fork = pytest.mark.skipif(
+    not hasattr(os, 'fork'),
+    reason="Worker processes are not supported"
+)
+
+
+@pytest.mark.parametrize('workers', [0, -1])
+def test_run_app_workers_not_positive(loop, mocker, workers):
+    mocker.spy(loop, 'create_server')
+    app = web.Application(loop=loop)
+
+    with pytest.raises(ValueError):
+        web.run_app(app, workers=workers, print=lambda *args: None)
+    assert not loop.create_server.called
+
+
+def _serve_with_workers(port, tmpdir, **kwargs):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    app = web.Application(loop=loop)
+
+    @asyncio.coroutine
+    def on_startup(app):
+        assert app.loop is asyncio.get_event_loop()
+        tmpdir.join('started-{}'.format(os.getpid())).ensure()
+
+    @asyncio.coroutine
+    def on_cleanup(app):
+        tmpdir.join('cleaned-{}'.format(os.getpid())).ensure()
+
+    @asyncio.coroutine
+    def handler(request):
+        return web.Response(text=str(os.getpid()))
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_get('/', handler)
+    web.run_app(app, host='127.0.0.1', port=port, workers=2,
+                print=lambda *args: None, **kwargs)
+
+
+def _wait_files(tmpdir, prefix, count, timeout=5):
+    end = time.monotonic() + timeout
+    while True:
+        files = tmpdir.listdir(lambda p: p.basename.startswith(prefix))
+        if len(files) >= count:
+            return files
+        if time.monotonic() > end:
+            raise AssertionError('{} {} files expected'.format(count, prefix))
+        time.sleep(0.05)
+
+
+@skip_if_no_fork
+@pytest.mark.parametrize('reuse_port', [
+    False,
+    pytest.mark.skipif(not hasattr(socket, 'SO_REUSEPORT'),
+                       reason="SO_REUSEPORT is not supported")(True),
+])
+def test_run_app_workers(unused_port, tmpdir, reuse_port):
+    port = unused_port()
+    proc = multiprocessing.Process(target=_serve_with_workers,
+                                   args=(port, tmpdir),
+                                   kwargs={'reuse_port': reuse_port})
+    proc.start()
+    try:
+        started = _wait_files(tmpdir, 'started-', 2)
+        pids = {p.basename.split('-')[1] for p in started}
+        assert str(proc.pid) not in pids
+
+        with urlopen('http://127.0.0.1:{}/'.format(port)) as resp:
+            assert resp.read().decode() in pids
+
+        os.kill(proc.pid, signal.SIGTERM)
+        proc.join(10)
+        assert 0 == proc.exitcode
+        cleaned = _wait_files(tmpdir, 'cleaned-', 2, timeout=0)
+        assert pids == {p.basename.split('-')[1] for p in cleaned}
+    finally:
+        if proc.is_alive():  # pragma: no cover
+            proc.terminate()
+
+
+@skip_if_no_fork
+def test_run_app_workers_restart(unused_port, tmpdir):
+    port = unused_port()
+    proc = multiprocessing.Process(target=_serve_with_workers,
+                                   args=(port, tmpdir))
+    proc.start()
+    try:
+        _wait_files(tmpdir, 'started-', 2)
+        os.kill(proc.pid, signal.SIGHUP)
+        # new workers are started, old ones are shut down gracefully
+        _wait_files(tmpdir, 'started-', 4)
+        _wait_files(tmpdir, 'cleaned-', 2)
+
+        with urlopen('http://127.0.0.1:{}/'.format(port)) as resp:
+            assert 200 == resp.status
+
+        os.kill(proc.pid, signal.SIGTERM)
+        proc.join(10)
+        assert 0 == proc.exitcode
+        _wait_files(tmpdir, 'cleaned-', 4, timeout=0)
+    finally:
+        if proc.is_alive():  # pragma: no cover
+            proc.terminate()
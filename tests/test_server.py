@@ -8,6 +8,7 @@ from unittest import mock
 
 import pytest
 
+import aiohttp
 from aiohttp import errors, helpers, server
 
 
@@ -693,3 +694,65 @@ def test_content_length_0(srv, loop):
 
     assert m_handle_request.called
     assert m_handle_request.call_args[0] == (mock.ANY, server.EMPTY_PAYLOAD)
+
+
+class PipelineServer(server.ServerHttpProtocol):
+
+    delays = {}
+
+    @asyncio.coroutine
+    def handle_request(self, message, payload):
+        response = aiohttp.Response(
+            self._get_request_writer(), 200,
+            http_version=message.version, loop=self._loop)
+        body = message.path.encode('ascii')
+        response.add_header('Content-Length', str(len(body)))
+        yield from asyncio.sleep(self.delays.get(message.path, 0),
+                                 loop=self._loop)
+        response.send_headers()
+        response.write(body)
+        yield from response.write_eof()
+        self.keep_alive(message.path != '/close')
+
+
+@asyncio.coroutine
+def test_pipelined_responses_order(make_srv, loop, transport):
+    transport, buf = transport
+    srv = make_srv(PipelineServer, max_concurrent_handlers=3)
+    srv.delays = {'/a': 0.05, '/c': 0.01}
+    srv.connection_made(transport)
+
+    srv.data_received(
+        b'GET /a HTTP/1.1\r\n\r\n'
+        b'GET /b HTTP/1.1\r\n\r\n'
+        b'GET /c HTTP/1.1\r\n\r\n'
+        b'GET /close HTTP/1.1\r\n\r\n')
+
+    yield from asyncio.sleep(0.1, loop=loop)
+    bodies = [resp.rsplit(b'\r\n', 1)[-1]
+              for resp in bytes(buf).split(b'HTTP/1.1 200 OK')[1:]]
+    assert [b'/a', b'/b', b'/c', b'/close'] == bodies
+    # responses completed before /a are sent by single write
+    assert any(b'/b' in call[0][0] and b'/c' in call[0][0]
+               for call in transport.write.call_args_list)
+    assert transport.close.called
+
+
+@asyncio.coroutine
+def test_pipelined_close_waits_previous(make_srv, loop, transport):
+    transport, buf = transport
+    srv = make_srv(PipelineServer, max_concurrent_handlers=2)
+    srv.delays = {'/a': 0.05}
+    srv.connection_made(transport)
+
+    srv.data_received(
+        b'GET /a HTTP/1.1\r\n\r\n'
+        b'GET /close HTTP/1.1\r\n\r\n')
+
+    yield from asyncio.sleep(0.02, loop=loop)
+    assert not transport.close.called
+    assert b'/close' not in buf
+
+    yield from asyncio.sleep(0.05, loop=loop)
+    assert transport.close.called
+    assert bytes(buf).index(b'/a') < bytes(buf).index(b'/close')
@@ -1,3 +1,4 @@
+import asyncio
 import socket
 from unittest import mock
 
@@ -239,3 +240,212 @@ def test_set_enabling_nodelay_disables_cork(loop):
     assert s.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
     assert not writer.tcp_cork
     assert not s.getsockopt(socket.IPPROTO_TCP, CORK)
+
+
+# ordered slots
+
+def make_slots_writer(loop, **kwargs):
+    transport = mock.Mock()
+    transport.get_extra_info.return_value = None
+    transport.is_closing.return_value = False
+    proto = mock.Mock()
+    proto._drain_helper.return_value = ()
+    return StreamWriter(proto, transport, loop, **kwargs), transport
+
+
+def test_slots_write_in_order(loop):
+    writer, transport = make_slots_writer(loop)
+    slot1 = writer.reserve()
+    slot2 = writer.reserve()
+    slot3 = writer.reserve()
+
+    slot1.write(b'1')
+    slot3.write(b'3')
+    slot2.write(b'2')
+    transport.write.assert_called_once_with(b'1')
+    assert 2 == writer.buffer_size
+
+    slot3.finish()
+    assert 1 == transport.write.call_count
+
+    slot1.finish()
+    transport.write.assert_called_with(b'2')
+    assert 1 == writer.buffer_size
+
+    # slot2 is active now
+    slot2.write(b'4')
+    transport.write.assert_called_with(b'4')
+    slot2.finish()
+    transport.write.assert_called_with(b'3')
+    assert 0 == writer.buffer_size
+    assert not writer._slots
+
+
+def test_slots_batch_finished(loop):
+    writer, transport = make_slots_writer(loop)
+    slot1 = writer.reserve()
+    slot2 = writer.reserve()
+    slot3 = writer.reserve()
+    slot4 = writer.reserve()
+
+    slot2.write(b'2')
+    slot2.finish()
+    slot3.write(b'3')
+    slot3.finish()
+    slot4.write(b'4')
+    slot1.finish()
+    transport.write.assert_called_once_with(b'234')
+
+
+def test_slots_close(loop):
+    writer, transport = make_slots_writer(loop)
+    slot1 = writer.reserve()
+    slot2 = writer.reserve()
+    slot3 = writer.reserve()
+
+    slot2.write(b'2')
+    slot3.write(b'3')
+    slot2.finish(close=True)
+    assert not transport.close.called
+
+    slot1.finish()
+    transport.write.assert_called_once_with(b'2')
+    assert transport.close.called
+    assert 0 == writer.buffer_size
+
+
+def test_slots_is_closing(loop):
+    writer, transport = make_slots_writer(loop)
+    slot = writer.reserve()
+    assert not slot.is_closing()
+    transport.is_closing.return_value = True
+    assert slot.is_closing()
+
+
+def test_slots_is_closing_not_supported(loop):
+    writer, transport = make_slots_writer(loop)
+    del transport.is_closing
+    assert not writer.reserve().is_closing()
+
+
+def test_slots_write_after_finish(loop):
+    writer, transport = make_slots_writer(loop)
+    slot1 = writer.reserve()
+    slot2 = writer.reserve()
+    slot2.finish()
+    slot2.write(b'2')
+    slot1.finish()
+    assert not transport.write.called
+
+
+def test_slots_drain_buffer_limit(loop):
+    writer, transport = make_slots_writer(loop, buffer_limit=2)
+    slot1 = writer.reserve()
+    slot2 = writer.reserve()
+
+    slot2.write(b'22')
+    loop.run_until_complete(slot2.drain())
+
+    slot2.write(b'2')
+    task = loop.create_task(slot2.drain())
+    loop.run_until_complete(asyncio.sleep(0, loop=loop))
+    assert not task.done()
+
+    slot1.finish()
+    loop.run_until_complete(task)
+    transport.write.assert_called_once_with(b'222')
+
+
+def test_slots_wait_active(loop):
+    writer, transport = make_slots_writer(loop)
+    slot1 = writer.reserve()
+    slot2 = writer.reserve()
+    assert loop.run_until_complete(slot1.wait_active())
+
+    slot2.write(b'2')
+    task = loop.create_task(slot2.wait_active())
+    loop.run_until_complete(asyncio.sleep(0, loop=loop))
+    assert not task.done()
+
+    slot1.finish()
+    assert loop.run_until_complete(task)
+    transport.write.assert_called_once_with(b'2')
+
+
+def test_slots_wait_active_discarded(loop):
+    writer, transport = make_slots_writer(loop)
+    slot1 = writer.reserve()
+    slot2 = writer.reserve()
+    task = loop.create_task(slot2.wait_active())
+    loop.run_until_complete(asyncio.sleep(0, loop=loop))
+
+    slot1.finish(close=True)
+    assert not loop.run_until_complete(task)
+    slot2.write(b'2')
+    assert not transport.write.called
+    assert 0 == writer.buffer_size
+
+
+# vectored writes
+
+def make_sendmsg_writer(loop, sslcontext=None):
+    rsock, wsock = socket.socketpair()
+    wsock.setblocking(False)
+    transport = mock.Mock()
+    transport.get_extra_info.side_effect = {
+        'socket': wsock, 'sslcontext': sslcontext}.get
+    transport.get_write_buffer_size.return_value = 0
+    transport.is_closing.return_value = False
+    writer = StreamWriter(mock.Mock(), transport, loop, vectored=True)
+    return writer, transport, rsock, wsock
+
+
+def test_writelines_sendmsg(loop):
+    writer, transport, rsock, wsock = make_sendmsg_writer(loop)
+    writer.writelines([b'1', b'22', b'333'])
+    assert b'122333' == rsock.recv(100)
+    assert not transport.write.called
+    rsock.close()
+    wsock.close()
+
+
+def test_writelines_sendmsg_partial(loop):
+    writer, transport, rsock, wsock = make_sendmsg_writer(loop)
+    wsock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    data = [bytes([i]) * 100000 for i in range(1, 5)]
+    writer.writelines(data)
+
+    rest = transport.write.call_args[0][0]
+    received = b''
+    while len(received) + len(rest) < 400000:
+        received += rsock.recv(400000)
+    assert b''.join(data) == received + rest
+    rsock.close()
+    wsock.close()
+
+
+def test_writelines_transport_buffer_not_empty(loop):
+    writer, transport, rsock, wsock = make_sendmsg_writer(loop)
+    transport.get_write_buffer_size.return_value = 1
+    writer.writelines([b'1', b'22'])
+    transport.write.assert_called_with(b'122')
+    rsock.close()
+    wsock.close()
+
+
+def test_writelines_sendmsg_error(loop):
+    writer, transport, rsock, wsock = make_sendmsg_writer(loop)
+    rsock.close()
+    wsock.shutdown(socket.SHUT_WR)
+    writer.writelines([b'1', b'22'])
+    transport.write.assert_called_with(b'122')
+    wsock.close()
+
+
+def test_writelines_ssl(loop):
+    writer, transport, rsock, wsock = make_sendmsg_writer(
+        loop, sslcontext=mock.Mock())
+    writer.writelines([b'1', b'22'])
+    transport.write.assert_called_with(b'122')
+    rsock.close()
+    wsock.close()
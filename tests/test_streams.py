@@ -720,6 +720,26 @@ class DataQueueMixin:
         self.assertRaises(
             ValueError, self.loop.run_until_complete, read_task)
 
+    def test_read_nowait(self):
+        items = [object() for _ in range(3)]
+        for item in items:
+            self.buffer.feed_data(item, 1)
+
+        self.assertEqual(items[:2], self.buffer.read_nowait(2))
+        self.assertEqual(1, self.buffer._size)
+        self.assertEqual(items[2:], self.buffer.read_nowait(5))
+        self.assertEqual([], self.buffer.read_nowait())
+        self.assertEqual(0, self.buffer._size)
+
+    def test_read_nowait_all(self):
+        items = [object() for _ in range(3)]
+        for item in items:
+            self.buffer.feed_data(item, 1)
+        self.buffer.set_exception(ValueError())
+
+        self.assertEqual(items, self.buffer.read_nowait())
+        self.assertEqual([], self.buffer.read_nowait())
+
     def test_exception(self):
         self.assertIsNone(self.buffer.exception())
 
@@ -1018,3 +1018,205 @@ def test_convert_empty_path_to_slash_on_freezing(router):
     assert resource.get_info() == {'path': ''}
     router.freeze()
     assert resource.get_info() == {'path': '/'}
+
+
+@asyncio.coroutine
+def test_frozen_resolve_first_registered_wins(router):
+    handler1 = make_handler()
+    handler2 = make_handler()
+    handler3 = make_handler()
+    router.add_route('GET', '/{name}/tail', handler1)
+    router.add_route('GET', '/users/tail', handler2)
+    router.add_route('GET', '/users/{name}', handler3)
+    router.freeze()
+
+    info = yield from router.resolve(make_request('GET', '/users/tail'))
+    assert info.handler is handler1
+
+    info = yield from router.resolve(make_request('GET', '/users/john'))
+    assert info.handler is handler3
+    assert info == {'name': 'john'}
+
+
+@asyncio.coroutine
+def test_frozen_resolve_plain_before_dynamic(router):
+    handler1 = make_handler()
+    handler2 = make_handler()
+    router.add_route('GET', '/users/me', handler1)
+    router.add_route('GET', '/users/{name}', handler2)
+    router.freeze()
+
+    info = yield from router.resolve(make_request('GET', '/users/me'))
+    assert info.handler is handler1
+
+
+@asyncio.coroutine
+def test_frozen_resolve_method_not_allowed(router):
+    router.add_route('POST', '/users/{name}', make_handler())
+    router.add_route('PUT', '/users/me', make_handler())
+    router.add_route('DELETE', '/{path:.*}', make_handler())
+    router.add_route('PATCH', '/other', make_handler())
+    router.freeze()
+
+    info = yield from router.resolve(make_request('GET', '/users/me'))
+    assert isinstance(info.http_exception, HTTPMethodNotAllowed)
+    assert info.http_exception.allowed_methods == {'POST', 'PUT', 'DELETE'}
+
+
+@asyncio.coroutine
+def test_frozen_resolve_not_found(router):
+    router.add_route('GET', '/users/{name}', make_handler())
+    router.add_route('GET', '/users', make_handler())
+    router.freeze()
+
+    info = yield from router.resolve(make_request('GET', '/users/a/b'))
+    assert isinstance(info.http_exception, HTTPNotFound)
+
+    info = yield from router.resolve(make_request('GET', '/other'))
+    assert isinstance(info.http_exception, HTTPNotFound)
+
+
+@asyncio.coroutine
+def test_frozen_resolve_static_prefix_is_not_segment(router):
+    router.add_static('/st', os.path.dirname(aiohttp.__file__))
+    router.freeze()
+
+    info = yield from router.resolve(make_request('GET', '/static/file.py'))
+    assert info.get_info()['prefix'] == '/st'
+
+
+@asyncio.coroutine
+def test_frozen_resolve_custom_resource_order(router):
+    handler = make_handler()
+
+    class CustomResource(web.Resource):
+
+        def _match(self, path):
+            return {}
+
+        def add_prefix(self, prefix):
+            pass  # pragma: no cover
+
+        def get_info(self):
+            return {}  # pragma: no cover
+
+        def url_for(self):
+            pass  # pragma: no cover
+
+        def url(self):
+            pass  # pragma: no cover
+
+    router.add_route('GET', '/api/users/{name}', make_handler())
+    resource = CustomResource()
+    resource.add_route('GET', handler)
+    router.register_resource(resource)
+    router.add_route('GET', '/api/users', make_handler())
+    router.freeze()
+
+    info = yield from router.resolve(make_request('GET', '/api/users'))
+    assert info.handler is handler
+
+
+@asyncio.coroutine
+def test_frozen_resolve_subapp_prefix_changed(app, loop):
+    handler = make_handler()
+    subapp = web.Application(loop=loop)
+    subapp.router.add_get('/{name}', handler)
+    middle = web.Application(loop=loop)
+    middle.add_subapp('/b', subapp)
+    app.add_subapp('/a', middle)
+    app.freeze()
+
+    info = yield from app.router.resolve(make_request('GET', '/a/b/c'))
+    assert info.handler is handler
+    assert info == {'name': 'c'}
+
+    info = yield from subapp.router.resolve(make_request('GET', '/a/b/c'))
+    assert info.handler is handler
+
+
+def resolve_without_suspending(router, request):
+    coro = router.resolve(request)
+    with pytest.raises(StopIteration) as ctx:
+        coro.send(None)
+    return ctx.value.value
+
+
+def test_frozen_resolve_sync(router):
+    handler = make_handler()
+    router.add_route('GET', '/plain', make_handler())
+    router.add_route('GET', '/users/{name}', handler)
+    router.add_static('/static', os.path.dirname(aiohttp.__file__))
+    router.freeze()
+
+    assert router._sync
+    info = resolve_without_suspending(
+        router, make_request('GET', '/users/john'))
+    assert info.handler is handler
+    assert info == {'name': 'john'}
+
+    info = resolve_without_suspending(
+        router, make_request('POST', '/plain'))
+    assert isinstance(info.http_exception, HTTPMethodNotAllowed)
+
+    info = resolve_without_suspending(
+        router, make_request('GET', '/static/file.py'))
+    assert info == {'filename': 'file.py'}
+
+
+def test_frozen_resolve_sync_subapp(app, loop):
+    handler = make_handler()
+    subapp = web.Application(loop=loop)
+    subapp.router.add_get('/{name}', handler)
+    app.add_subapp('/a', subapp)
+    app.freeze()
+
+    assert app.router._sync
+    info = resolve_without_suspending(
+        app.router, make_request('GET', '/a/b'))
+    assert info.handler is handler
+    assert info.apps == (subapp,)
+
+
+@asyncio.coroutine
+def test_frozen_resolve_async_resource(router, loop):
+    handler = make_handler()
+
+    class AsyncResource(web.PlainResource):
+
+        @asyncio.coroutine
+        def resolve(self, request):
+            yield from asyncio.sleep(0, loop=loop)
+            return (yield from super().resolve(request))
+
+    router.add_route('GET', '/plain', make_handler())
+    resource = AsyncResource('/async')
+    resource.add_route('GET', handler)
+    router.register_resource(resource)
+    router.freeze()
+
+    assert not router._sync
+    info = yield from router.resolve(make_request('GET', '/async'))
+    assert info.handler is handler
+
+
+@asyncio.coroutine
+def test_frozen_resolve_async_subapp_resource(app, loop):
+    handler = make_handler()
+
+    class AsyncResource(web.PlainResource):
+
+        @asyncio.coroutine
+        def resolve(self, request):
+            return (yield from super().resolve(request))
+
+    subapp = web.Application(loop=loop)
+    resource = AsyncResource('/b')
+    resource.add_route('GET', handler)
+    subapp.router.register_resource(resource)
+    app.add_subapp('/a', subapp)
+    app.freeze()
+
+    assert not app.router._sync
+    info = yield from app.router.resolve(make_request('GET', '/a/b'))
+    assert info.handler is handler
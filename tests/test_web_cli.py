@@ -139,5 +139,50 @@ def test_running_application(mocker):
     with pytest.raises(SystemExit):
         web.main(argv)
 
-    run_app.assert_called_with(app, host="testhost", port=6666, path=None)
+    run_app.assert_called_with(app, host="testhost", port=6666, path=None,
+                               workers=1, reuse_port=False)
     exit.assert_called_with(message="Stopped\n")
+
+
+def test_running_application_workers(mocker):
+    run_app = mocker.patch("aiohttp.web.run_app")
+    import_module = mocker.patch("aiohttp.web.import_module")
+    mocker.patch("aiohttp.web.ArgumentParser.exit", side_effect=SystemExit)
+    argv = "-w 4 --reuse-port alpha.beta:func".split()
+    module = import_module("alpha.beta")
+    app = module.func()
+
+    with pytest.raises(SystemExit):
+        web.main(argv)
+
+    run_app.assert_called_with(app, host="localhost", port=8080, path=None,
+                               workers=4, reuse_port=True)
+
+
+@pytest.mark.parametrize('workers', ['0', '-1'])
+def test_workers_not_positive(mocker, workers):
+    argv = ["-w", workers, "alpha.beta:func"]
+    mocker.patch("aiohttp.web.import_module")
+    run_app = mocker.patch("aiohttp.web.run_app")
+
+    error = mocker.patch("aiohttp.web.ArgumentParser.error",
+                         side_effect=SystemExit)
+    with pytest.raises(SystemExit):
+        web.main(argv)
+
+    error.assert_called_with("workers should be positive")
+    assert not run_app.called
+
+
+def test_workers_when_unsupported(mocker, monkeypatch):
+    argv = "-w 2 alpha.beta:func".split()
+    mocker.patch("aiohttp.web.import_module")
+    monkeypatch.delattr("os.fork", raising=False)
+
+    error = mocker.patch("aiohttp.web.ArgumentParser.error",
+                         side_effect=SystemExit)
+    with pytest.raises(SystemExit):
+        web.main(argv)
+
+    error.assert_called_with("workers not supported by your"
+                             " operating environment")
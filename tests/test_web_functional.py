@@ -1225,3 +1225,29 @@ def test_response_prepared_with_clone(loop, test_client):
 
     resp = yield from client.get('/')
     assert 200 == resp.status
+
+
+@asyncio.coroutine
+def test_pipelined_requests_responses_order(loop, test_client):
+
+    @asyncio.coroutine
+    def handler(request):
+        delay = request.match_info['delay']
+        yield from asyncio.sleep(float(delay), loop=loop)
+        return web.Response(text='[{}]'.format(delay))
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/{delay}', handler)
+    client = yield from test_client(app)
+
+    url = client.make_url('/')
+    reader, writer = yield from asyncio.open_connection(
+        url.host, url.port, loop=loop)
+    writer.write(b'GET /0.05 HTTP/1.1\r\nHost: localhost\r\n\r\n'
+                 b'GET /0 HTTP/1.1\r\nHost: localhost\r\n'
+                 b'Connection: close\r\n\r\n')
+    data = yield from reader.read()
+    writer.close()
+
+    assert 2 == data.count(b'HTTP/1.1 200 OK')
+    assert data.index(b'[0.05]') < data.index(b'[0]')
@@ -94,6 +94,127 @@ def test_middleware_chain(loop, test_client):
     assert 'OK[2][1]' == txt
 
 
+@asyncio.coroutine
+def test_middleware_chain_is_cached(loop, test_client):
+
+    @asyncio.coroutine
+    def handler(request):
+        return web.Response(text='OK')
+
+    calls = []
+
+    @asyncio.coroutine
+    def factory(app, handler):
+        calls.append(handler)
+        return handler
+
+    app = web.Application(loop=loop)
+    app.middlewares.append(factory)
+    app.router.add_route('GET', '/', handler)
+    app.router.add_route('GET', '/other', handler)
+    client = yield from test_client(app)
+
+    for path in ('/', '/', '/other', '/other'):
+        resp = yield from client.get(path)
+        assert 200 == resp.status
+    assert 2 == len(calls)
+
+
+@asyncio.coroutine
+def test_middleware_chain_not_cached_for_not_found(loop, test_client):
+    calls = []
+
+    @asyncio.coroutine
+    def factory(app, handler):
+        calls.append(handler)
+        return handler
+
+    app = web.Application(loop=loop)
+    app.middlewares.append(factory)
+    client = yield from test_client(app)
+
+    for i in range(2):
+        resp = yield from client.get('/')
+        assert 404 == resp.status
+    assert 2 == len(calls)
+
+
+@asyncio.coroutine
+def test_dynamic_middleware(loop, test_client):
+
+    @asyncio.coroutine
+    def handler(request):
+        return web.Response(text='OK')
+
+    calls = []
+
+    def make_factory(num):
+
+        @asyncio.coroutine
+        def factory(app, handler):
+            calls.append(num)
+
+            def middleware(request):
+                resp = yield from handler(request)
+                resp.text = resp.text + '[{}]'.format(num)
+                return resp
+
+            return middleware
+        return factory
+
+    app = web.Application(loop=loop)
+    app.middlewares.append(make_factory(1))
+    app.middlewares.append(web.dynamic_middleware(make_factory(2)))
+    app.middlewares.append(make_factory(3))
+    app.router.add_route('GET', '/', handler)
+    client = yield from test_client(app)
+
+    for i in range(2):
+        resp = yield from client.get('/')
+        assert 200 == resp.status
+        txt = yield from resp.text()
+        assert 'OK[3][2][1]' == txt
+    # factories applied after the dynamic one are called per request
+    assert [3, 2, 1, 2, 1] == calls
+
+
+@asyncio.coroutine
+def test_subapp_middleware_chain_is_cached(loop, test_client):
+
+    @asyncio.coroutine
+    def handler(request):
+        return web.Response(text='OK')
+
+    calls = []
+
+    def make_factory(num):
+
+        @asyncio.coroutine
+        def factory(app, handler):
+            calls.append(num)
+
+            def middleware(request):
+                resp = yield from handler(request)
+                resp.text = resp.text + '[{}]'.format(num)
+                return resp
+
+            return middleware
+        return factory
+
+    app = web.Application(loop=loop, middlewares=[make_factory(1)])
+    subapp = web.Application(loop=loop, middlewares=[make_factory(2)])
+    subapp.router.add_get('/to', handler)
+    app.add_subapp('/path', subapp)
+    client = yield from test_client(app)
+
+    for i in range(2):
+        resp = yield from client.get('/path/to')
+        assert 200 == resp.status
+        txt = yield from resp.text()
+        assert 'OK[1][2]' == txt
+    assert [1, 2] == calls
+
+
 @pytest.fixture
 def cli(loop, test_client):
     def wrapper(extra_middlewares):
@@ -8,7 +8,8 @@ import pytest
 from multidict import CIMultiDict
 
 from aiohttp import hdrs, signals
-from aiohttp.protocol import HttpVersion, HttpVersion10, HttpVersion11
+from aiohttp.protocol import (SERVER_SOFTWARE, HttpVersion, HttpVersion10,
+                              HttpVersion11)
 from aiohttp.test_utils import make_mocked_request
 from aiohttp.web import ContentCoding, Response, StreamResponse, json_response
 
@@ -829,6 +830,53 @@ def test_render_with_body(transport):
                     'data', txt)
 
 
+@asyncio.coroutine
+def test_render_with_body_single_write(transport):
+    writer, buf = transport
+    req = make_request('GET', '/', writer=writer)
+    resp = Response(text='data')
+
+    yield from resp.prepare(req)
+    yield from resp.write_eof()
+
+    assert 1 == writer.transport.write.call_count
+    assert buf.startswith(b'HTTP/1.1 200 OK\r\n')
+    assert buf.endswith(b'\r\n\r\ndata')
+
+
+@asyncio.coroutine
+def test_default_headers_after_prepare(transport):
+    writer, buf = transport
+    req = make_request('GET', '/', writer=writer)
+    resp = Response()
+
+    yield from resp.prepare(req)
+    yield from resp.write_eof()
+
+    assert resp.headers['Date'] == 'Tue, 15 Nov 1994 08:12:31 GMT'
+    assert resp.headers['Server'] == SERVER_SOFTWARE
+    assert buf.endswith(b'Date: Tue, 15 Nov 1994 08:12:31 GMT\r\n'
+                        b'Server: ' + SERVER_SOFTWARE.encode() +
+                        b'\r\n\r\n')
+
+
+@asyncio.coroutine
+def test_custom_server_header(transport):
+    writer, buf = transport
+    req = make_request('GET', '/', writer=writer)
+    resp = Response(headers={'Server': 'custom'})
+
+    yield from resp.prepare(req)
+    yield from resp.write_eof()
+
+    txt = buf.decode('utf8')
+    assert re.match('HTTP/1.1 200 OK\r\n'
+                    'Server: custom\r\n'
+                    'Content-Length: 0\r\n'
+                    'Content-Type: application/octet-stream\r\n'
+                    'Date: .+\r\n\r\n', txt)
+
+
 @asyncio.coroutine
 def test_send_set_cookie_header(transport):
     writer, buf = transport
@@ -449,3 +449,43 @@ def test_static_file_invalid_range(loop, test_client, sender):
     resp = yield from client.get('/', headers={'Range': 'bytes=-'})
     assert resp.status == 416, 'no range given'
     resp.close()
+
+
+@asyncio.coroutine
+def test_static_file_pipelined(loop, test_client, sender):
+    filepath = pathlib.Path(__file__).parent / 'sample.key'
+
+    @asyncio.coroutine
+    def slow(request):
+        yield from asyncio.sleep(0.1, loop=loop)
+        return web.Response(text='[slow]')
+
+    @asyncio.coroutine
+    def handler(request):
+        resp = yield from sender().send(request, filepath)
+        return resp
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/slow', slow)
+    app.router.add_get('/file', handler)
+    app.router.add_static('/static', filepath.parent)
+    client = yield from test_client(app)
+
+    url = client.make_url('/')
+    reader, writer = yield from asyncio.open_connection(
+        url.host, url.port, loop=loop)
+    writer.write(b'GET /slow HTTP/1.1\r\nHost: localhost\r\n\r\n'
+                 b'GET /file HTTP/1.1\r\nHost: localhost\r\n\r\n'
+                 b'GET /slow HTTP/1.1\r\nHost: localhost\r\n\r\n'
+                 b'GET /static/sample.key HTTP/1.1\r\nHost: localhost\r\n'
+                 b'Connection: close\r\n\r\n')
+    data = yield from reader.read()
+    writer.close()
+
+    with filepath.open('rb') as f:
+        content = f.read()
+    assert 4 == data.count(b'HTTP/1.1 200 OK')
+    # responses are in order of requests
+    pos = 0
+    for part in (b'[slow]', content, b'[slow]', content):
+        pos = data.index(part, pos) + len(part)
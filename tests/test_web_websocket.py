@@ -527,6 +527,213 @@ def test_prepare_twice_idempotent(make_request):
     assert impl1 is impl2
 
 
+def test_broadcast_nonstring():
+    with pytest.raises(TypeError):
+        web.broadcast([], 1)
+
+
+@asyncio.coroutine
+def test_broadcast(make_request, writer):
+    writer.transport.is_closing.return_value = False
+    writer.transport.get_write_buffer_size.return_value = 0
+    ws = WebSocketResponse()
+    yield from ws.prepare(make_request('GET', '/'))
+    busy = WebSocketResponse()
+    yield from busy.prepare(make_request('GET', '/'))
+    busy._writer.writer = mock.Mock()
+    busy._writer.writer.is_closing.return_value = False
+    busy._writer.writer.get_write_buffer_size.return_value = 2 ** 17
+    closed = WebSocketResponse()
+    yield from closed.prepare(make_request('GET', '/'))
+    closed._reader.feed_data(CLOSED_MESSAGE, 0)
+    yield from closed.close()
+    not_prepared = WebSocketResponse()
+
+    writer.transport.write.reset_mock()
+    skipped, pending = web.broadcast([ws, busy, closed, not_prepared],
+                                     'text')
+    assert [busy, closed, not_prepared] == skipped
+    assert [] == pending
+    writer.transport.write.assert_called_once_with(b'\x81\x04text')
+
+
+@asyncio.coroutine
+def test_broadcast_same_frame(make_request, writer):
+    writer.transport.is_closing.return_value = False
+    writer.transport.get_write_buffer_size.return_value = 0
+    sockets = [WebSocketResponse() for _ in range(3)]
+    for ws in sockets:
+        yield from ws.prepare(make_request('GET', '/'))
+
+    writer.transport.write.reset_mock()
+    assert ([], []) == web.broadcast(sockets, bytearray(b'data'))
+    frames = [c[0][0] for c in writer.transport.write.call_args_list]
+    assert [b'\x82\x04data'] * 3 == frames
+    assert frames[0] is frames[1] is frames[2]
+
+
+@asyncio.coroutine
+def test_broadcast_pending(make_request, writer):
+    writer.transport.is_closing.return_value = False
+    writer.transport.get_write_buffer_size.return_value = 0
+    ws = WebSocketResponse()
+    yield from ws.prepare(make_request('GET', '/'))
+    writer.transport.get_write_buffer_size.side_effect = [0, 2 ** 17]
+    writer.drain.reset_mock()
+
+    result = web.broadcast([ws], b'x' * 2 ** 16)
+    assert [] == result.skipped
+    assert [ws] == result.pending
+    assert not writer.drain.called
+
+
+def test_write_buffer_limits_invalid():
+    with pytest.raises(ValueError):
+        WebSocketResponse(high_water=10, low_water=20)
+    with pytest.raises(ValueError):
+        WebSocketResponse(overflow='drop_newest')
+
+
+@asyncio.coroutine
+def test_write_buffer_limits(make_request, writer):
+    ws = WebSocketResponse()
+    assert 0 == ws.dropped_frames
+    yield from ws.prepare(make_request('GET', '/'))
+    assert not writer.transport.set_write_buffer_limits.called
+
+    ws = WebSocketResponse(high_water=100, overflow='drop_newest')
+    yield from ws.prepare(make_request('GET', '/'))
+    writer.transport.set_write_buffer_limits.assert_called_with(
+        high=100, low=25)
+    writer.transport.get_write_buffer_size.return_value = 101
+    writer.transport.write.reset_mock()
+    ws.send_str('text')
+    ws.send_bytes(b'bytes')
+    assert not writer.transport.write.called
+    assert 2 == ws.dropped_frames
+
+
+@asyncio.coroutine
+def test_overflow_close(make_request, writer):
+    req = make_request('GET', '/')
+    ws = WebSocketResponse(high_water=100, overflow='close')
+    yield from ws.prepare(req)
+    writer.transport.get_write_buffer_size.return_value = 101
+    writer.transport.write.reset_mock()
+
+    ws.send_str('text')
+    assert ws.closed
+    assert 1013 == ws.close_code
+    assert 1 == ws.dropped_frames
+    writer.transport.write.assert_called_once_with(b'\x88\x02\x03\xf5')
+    assert req.transport.close.called
+    assert not (yield from ws.close())
+
+
+@asyncio.coroutine
+def test_broadcast_overflow_policy(make_request, writer):
+    writer.transport.is_closing.return_value = False
+    writer.transport.get_write_buffer_size.return_value = 2 ** 17
+    ws = WebSocketResponse(high_water=2 ** 16, overflow='drop_newest')
+    yield from ws.prepare(make_request('GET', '/'))
+
+    writer.transport.write.reset_mock()
+    assert ([], []) == web.broadcast([ws], 'text')
+    assert not writer.transport.write.called
+    assert 1 == ws.dropped_frames
+
+
+@asyncio.coroutine
+def test_receive_many_nonstarted():
+    ws = WebSocketResponse()
+    with pytest.raises(RuntimeError):
+        yield from ws.receive_many()
+
+
+@asyncio.coroutine
+def test_receive_many_invalid(make_request):
+    ws = WebSocketResponse()
+    yield from ws.prepare(make_request('GET', '/'))
+    with pytest.raises(ValueError):
+        yield from ws.receive_many(0)
+
+
+@asyncio.coroutine
+def test_receive_many(make_request, writer):
+    ws = WebSocketResponse()
+    yield from ws.prepare(make_request('GET', '/'))
+    messages = [WSMessage(WSMsgType.TEXT, 'text', ''),
+                WSMessage(WSMsgType.PING, b'ping', ''),
+                WSMessage(WSMsgType.BINARY, b'binary', ''),
+                WSMessage(WSMsgType.PONG, b'pong', ''),
+                WSMessage(WSMsgType.TEXT, 'last', '')]
+    for msg in messages:
+        ws._reader.feed_data(msg, 0)
+
+    writer.transport.write.reset_mock()
+    batch = yield from ws.receive_many(4)
+    assert [messages[0], messages[2]] == batch
+    writer.transport.write.assert_called_once_with(b'\x8a\x04ping')
+    assert [messages[4]] == (yield from ws.receive_many(4))
+
+
+@asyncio.coroutine
+def test_receive_many_no_autoping(make_request, writer):
+    ws = WebSocketResponse(autoping=False)
+    yield from ws.prepare(make_request('GET', '/'))
+    messages = [WSMessage(WSMsgType.PING, b'ping', ''),
+                WSMessage(WSMsgType.PONG, b'pong', '')]
+    for msg in messages:
+        ws._reader.feed_data(msg, 0)
+
+    writer.transport.write.reset_mock()
+    assert messages == (yield from ws.receive_many())
+    assert not writer.transport.write.called
+
+
+@asyncio.coroutine
+def test_receive_many_close(make_request, writer):
+    ws = WebSocketResponse()
+    yield from ws.prepare(make_request('GET', '/'))
+    messages = [WSMessage(WSMsgType.TEXT, 'text', ''),
+                WSMessage(WSMsgType.CLOSE, 1000, ''),
+                WSMessage(WSMsgType.TEXT, 'ignored', '')]
+    for msg in messages:
+        ws._reader.feed_data(msg, 0)
+
+    writer.transport.write.reset_mock()
+    assert messages[:2] == (yield from ws.receive_many())
+    assert ws.closed
+    assert 1000 == ws.close_code
+    writer.transport.write.assert_called_once_with(b'\x88\x02\x03\xe8')
+    assert [CLOSED_MESSAGE] == (yield from ws.receive_many())
+
+
+@asyncio.coroutine
+def test_receive_many_close_first(make_request):
+    ws = WebSocketResponse(autoclose=False)
+    yield from ws.prepare(make_request('GET', '/'))
+    close = WSMessage(WSMsgType.CLOSE, 1000, '')
+    ws._reader.feed_data(close, 0)
+    ws._reader.feed_data(WSMessage(WSMsgType.TEXT, 'text', ''), 0)
+
+    assert [close] == (yield from ws.receive_many())
+    assert not ws.closed
+
+
+@asyncio.coroutine
+def test_receive_many_error(make_request):
+    ws = WebSocketResponse()
+    yield from ws.prepare(make_request('GET', '/'))
+    exc = ValueError()
+    ws._reader.set_exception(exc)
+
+    batch = yield from ws.receive_many()
+    assert 1 == len(batch)
+    assert WSMsgType.ERROR == batch[0].type
+    assert exc is batch[0].data
+
+
 def test_msgtype_alias():
     # deprecated since 1.0
     assert web.MsgType is WSMsgType
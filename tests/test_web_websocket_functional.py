@@ -4,7 +4,7 @@ import asyncio
 
 import aiohttp
 from aiohttp import helpers, web
-from aiohttp._ws_impl import WSMsgType
+from aiohttp._ws_impl import WSCloseCode, WSMsgType
 
 
 @asyncio.coroutine
@@ -733,3 +733,114 @@ def test_heartbeat_no_pong(loop, test_client):
     yield from ws.receive()
 
     assert cancelled
+
+
+@asyncio.coroutine
+def test_broadcast(loop, test_client):
+    sockets = []
+    connected = helpers.create_future(loop)
+
+    @asyncio.coroutine
+    def handler(request):
+        ws = web.WebSocketResponse(compress=True)
+        yield from ws.prepare(request)
+        sockets.append(ws)
+        if len(sockets) == 3:
+            connected.set_result(None)
+        yield from ws.receive()
+        yield from ws.close()
+        return ws
+
+    app = web.Application(loop=loop)
+    app.router.add_route('GET', '/', handler)
+    client = yield from test_client(app)
+
+    clients = [(yield from client.ws_connect('/')),
+               (yield from client.ws_connect('/', compress=15)),
+               (yield from client.ws_connect('/'))]
+    yield from connected
+
+    assert ([], []) == web.broadcast(sockets, 'text' * 100)
+    assert ([], []) == web.broadcast(sockets, b'binary')
+    for ws in clients:
+        msg = yield from ws.receive()
+        assert msg.type == WSMsgType.TEXT
+        assert msg.data == 'text' * 100
+        msg = yield from ws.receive()
+        assert msg.type == WSMsgType.BINARY
+        assert msg.data == b'binary'
+
+    yield from clients[0].close()
+    yield from sockets[0].close()
+    assert [sockets[0]] == web.broadcast(sockets, 'after close').skipped
+    for ws in clients[1:]:
+        msg = yield from ws.receive()
+        assert msg.data == 'after close'
+        yield from ws.close()
+
+
+@asyncio.coroutine
+def test_compressed_message_too_big(loop, test_client):
+    closed = helpers.create_future(loop)
+
+    @asyncio.coroutine
+    def handler(request):
+        ws = web.WebSocketResponse(compress=True, max_msg_size=1000)
+        yield from ws.prepare(request)
+        closed.set_result((yield from ws.receive()))
+        return ws
+
+    app = web.Application(loop=loop)
+    app.router.add_route('GET', '/', handler)
+    client = yield from test_client(app)
+
+    ws = yield from client.ws_connect('/', compress=15)
+    ws.send_str('x' * 1001)
+    msg = yield from ws.receive()
+    assert msg.type == WSMsgType.CLOSE
+    assert msg.data == 1009
+    yield from ws.close()
+    msg = yield from closed
+    assert msg.type == WSMsgType.ERROR
+    assert WSCloseCode.MESSAGE_TOO_BIG == msg.data.code
+
+
+@asyncio.coroutine
+def test_pipelined_handshake(loop, test_client):
+
+    @asyncio.coroutine
+    def slow(request):
+        yield from asyncio.sleep(0.1, loop=loop)
+        return web.Response(text='[slow]')
+
+    @asyncio.coroutine
+    def handler(request):
+        ws = web.WebSocketResponse()
+        yield from ws.prepare(request)
+        ws.send_str('hello')
+        yield from ws.receive()
+        return ws
+
+    app = web.Application(loop=loop)
+    app.router.add_get('/slow', slow)
+    app.router.add_get('/ws', handler)
+    client = yield from test_client(app)
+
+    url = client.make_url('/')
+    reader, writer = yield from asyncio.open_connection(
+        url.host, url.port, loop=loop)
+    writer.write(b'GET /slow HTTP/1.1\r\nHost: localhost\r\n\r\n'
+                 b'GET /ws HTTP/1.1\r\nHost: localhost\r\n'
+                 b'Upgrade: websocket\r\nConnection: Upgrade\r\n'
+                 b'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n'
+                 b'Sec-WebSocket-Version: 13\r\n\r\n')
+    data = b''
+    while b'hello' not in data:
+        chunk = yield from reader.read(1024)
+        assert chunk
+        data += chunk
+    writer.close()
+
+    assert (data.index(b'[slow]') <
+            data.index(b'HTTP/1.1 101 Switching Protocols') <
+            data.index(b'\x81\x05hello'))
@@ -9,7 +9,7 @@ import multidict
 import pytest
 
 from aiohttp import errors, protocol
-from aiohttp._ws_impl import WS_KEY, do_handshake
+from aiohttp._ws_impl import WS_KEY, do_handshake, ws_ext_gen, ws_ext_parse
 
 
 @pytest.fixture()
@@ -24,7 +24,7 @@ def message():
         'GET', '/path', (1, 0), headers, [], True, None, True, False)
 
 
-def gen_ws_headers(protocols=''):
+def gen_ws_headers(protocols='', extensions=''):
     key = base64.b64encode(os.urandom(16)).decode()
     hdrs = [('Upgrade', 'websocket'),
             ('Connection', 'upgrade'),
@@ -32,6 +32,8 @@ def gen_ws_headers(protocols=''):
             ('Sec-Websocket-Key', key)]
     if protocols:
         hdrs += [('Sec-Websocket-Protocol', protocols)]
+    if extensions:
+        hdrs += [('Sec-Websocket-Extensions', extensions)]
     return hdrs, key
 
 
@@ -147,3 +149,95 @@ def test_handshake_protocol_unsupported(log, message, transport):
         assert protocol is None
     assert (ctx.records[-1].msg ==
             'Client protocols %r don’t overlap server-known ones %r')
+
+
+def test_handshake_compress(message, transport):
+    message.headers.extend(gen_ws_headers(
+        extensions='permessage-deflate; client_max_window_bits')[0])
+    _, resp_headers, _, writer, _ = do_handshake(
+        message.method, message.headers, transport, compress=True)
+
+    assert dict(resp_headers)['Sec-Websocket-Extensions'] == \
+        'permessage-deflate'
+    assert writer.compress == 15
+
+
+def test_handshake_compress_disabled(message, transport):
+    message.headers.extend(gen_ws_headers(
+        extensions='permessage-deflate')[0])
+    _, resp_headers, _, writer, _ = do_handshake(
+        message.method, message.headers, transport)
+
+    assert 'Sec-Websocket-Extensions' not in dict(resp_headers)
+    assert not writer.compress
+
+
+def test_handshake_compress_not_offered(message, transport):
+    message.headers.extend(gen_ws_headers()[0])
+    _, resp_headers, _, writer, _ = do_handshake(
+        message.method, message.headers, transport, compress=True)
+
+    assert 'Sec-Websocket-Extensions' not in dict(resp_headers)
+    assert not writer.compress
+
+
+def test_handshake_compress_options(message, transport):
+    message.headers.extend(gen_ws_headers(
+        extensions='permessage-deflate; server_max_window_bits=10; '
+                   'server_no_context_takeover')[0])
+    _, resp_headers, _, writer, _ = do_handshake(
+        message.method, message.headers, transport, compress=True)
+
+    assert dict(resp_headers)['Sec-Websocket-Extensions'] == \
+        'permessage-deflate; server_no_context_takeover; ' \
+        'server_max_window_bits=10'
+    assert writer.compress == 10
+
+
+@pytest.mark.parametrize('extensions,result', [
+    ('permessage-deflate', (15, False)),
+    ('x-webkit-deflate-frame, permessage-deflate', (15, False)),
+    ('permessage-deflate; server_max_window_bits=8, permessage-deflate',
+     (15, False)),
+    ('permessage-deflate; unknown=1, '
+     'permessage-deflate; server_max_window_bits="9"', (9, False)),
+    ('permessage-deflate; server_max_window_bits', (0, False)),
+    ('permessage-deflate; server_max_window_bits=16', (0, False)),
+    ('permessage-deflate; server_no_context_takeover=1', (0, False)),
+    ('permessage-deflate; client_no_context_takeover; '
+     'client_no_context_takeover', (0, False)),
+    ('PerMessage-Deflate; Server_No_Context_Takeover', (15, True)),
+    ('x-webkit-deflate-frame', (0, False)),
+])
+def test_ws_ext_parse_server(extensions, result):
+    assert ws_ext_parse(extensions, isserver=True) == result
+
+
+@pytest.mark.parametrize('extensions,result', [
+    ('', (0, False)),
+    ('permessage-deflate', (15, False)),
+    ('permessage-deflate; client_max_window_bits=12', (12, False)),
+    ('permessage-deflate; client_no_context_takeover; '
+     'server_max_window_bits=9', (15, True)),
+])
+def test_ws_ext_parse_client(extensions, result):
+    assert ws_ext_parse(extensions) == result
+
+
+@pytest.mark.parametrize('extensions', [
+    'x-webkit-deflate-frame',
+    'permessage-deflate, permessage-deflate',
+    'permessage-deflate; client_max_window_bits=8',
+    'permessage-deflate; unknown',
+])
+def test_ws_ext_parse_client_invalid(extensions):
+    with pytest.raises(ValueError):
+        ws_ext_parse(extensions)
+
+
+def test_ws_ext_gen():
+    assert ws_ext_gen() == 'permessage-deflate; client_max_window_bits'
+    assert ws_ext_gen(10, notakeover=True) == \
+        'permessage-deflate; client_max_window_bits=10; ' \
+        'client_no_context_takeover'
+    assert ws_ext_gen(isserver=True) == 'permessage-deflate'
@@ -1,5 +1,6 @@
 import random
 import struct
+import zlib
 from unittest import mock
 
 import pytest
@@ -7,7 +8,8 @@ import pytest
 import aiohttp
 from aiohttp import WebSocketError, WSCloseCode, WSMessage, WSMsgType, _ws_impl
 from aiohttp._ws_impl import (PACK_CLOSE_CODE, PACK_LEN1, PACK_LEN2, PACK_LEN3,
-                              WebSocketReader, _websocket_mask)
+                              WebSocketReader, WebSocketReaderPy,
+                              _websocket_mask)
 
 
 def build_frame(message, opcode, use_mask=False, noheader=False):
@@ -59,7 +61,7 @@ def out(loop):
 
 @pytest.fixture()
 def parser(out):
-    return WebSocketReader(out)
+    return WebSocketReaderPy(out)
 
 
 def test_parse_frame(parser):
@@ -387,3 +389,63 @@ def test_msgtype_aliases():
     assert aiohttp.WSMsgType.CLOSE == aiohttp.WSMsgType.close
     assert aiohttp.WSMsgType.CLOSED == aiohttp.WSMsgType.closed
     assert aiohttp.WSMsgType.ERROR == aiohttp.WSMsgType.error
+
+
+def compress(data, compressobj=None):
+    if compressobj is None:
+        compressobj = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    data = compressobj.compress(data) + compressobj.flush(zlib.Z_SYNC_FLUSH)
+    assert data.endswith(b'\x00\x00\xff\xff')
+    return data[:-4]
+
+
+def test_compressed_frame(out):
+    parser = WebSocketReader(out, compress=True)
+    compressobj = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    data = compress(b'text' * 100, compressobj)
+    frame = build_frame(data, 0x40 | WSMsgType.TEXT)
+    parser.feed_data(frame[:5])
+    parser.feed_data(frame[5:] + build_frame(b'raw', WSMsgType.BINARY))
+    # context is kept between messages
+    parser.feed_data(build_frame(compress(b'text' * 100, compressobj),
+                                 0x40 | WSMsgType.TEXT))
+
+    assert out._buffer[0] == (WSMessage(WSMsgType.TEXT, 'text' * 100, ''),
+                              400)
+    assert out._buffer[1] == (WSMessage(WSMsgType.BINARY, b'raw', ''), 3)
+    assert out._buffer[2] == (WSMessage(WSMsgType.TEXT, 'text' * 100, ''),
+                              400)
+
+
+def test_compressed_fragmented_frame(out):
+    parser = WebSocketReader(out, compress=True)
+    data = compress(b'binary' * 100)
+    # first frame without fin bit
+    parser.feed_data(
+        struct.pack('!BB', 0x40 | WSMsgType.BINARY, 10) + data[:10])
+    parser.feed_data(build_frame(b'', WSMsgType.PING))
+    parser.feed_data(build_frame(data[10:], WSMsgType.CONTINUATION))
+
+    assert out._buffer[0] == (WSMessage(WSMsgType.PING, b'', ''), 0)
+    assert out._buffer[1] == (
+        WSMessage(WSMsgType.BINARY, b'binary' * 100, ''), 600)
+
+
+def test_compressed_frame_not_negotiated(out, parser):
+    parser.feed_data(build_frame(compress(b'text'), 0x40 | WSMsgType.TEXT))
+    assert isinstance(out.exception(), WebSocketError)
+    assert out.exception().code == WSCloseCode.PROTOCOL_ERROR
+
+
+def test_compressed_control_frame(out):
+    parser = WebSocketReader(out, compress=True)
+    parser.feed_data(build_frame(compress(b'data'), 0x40 | WSMsgType.PING))
+    assert isinstance(out.exception(), WebSocketError)
+    assert out.exception().code == WSCloseCode.PROTOCOL_ERROR
+
+
+def test_compressed_frame_invalid(out):
+    parser = WebSocketReader(out, compress=True)
+    parser.feed_data(build_frame(b'\xff\xff', 0x40 | WSMsgType.TEXT))
+    assert isinstance(out.exception(), WebSocketError)
+    assert out.exception().code == WSCloseCode.PROTOCOL_ERROR
@@ -0,0 +1,244 @@
+"""Pure python and compiled websocket readers must produce the same results."""
+
+import zlib
+from unittest import mock
+
+import pytest
+
+from aiohttp import WebSocketError, _ws_impl
+from aiohttp._ws_impl import (PACK_CLOSE_CODE, PACK_LEN1, PACK_LEN2, PACK_LEN3,
+                              WSCloseCode, WSMsgType, _websocket_mask)
+
+READERS = [_ws_impl.WebSocketReaderPy]
+if hasattr(_ws_impl, 'WebSocketReaderC'):
+    READERS.append(_ws_impl.WebSocketReaderC)
+
+requires_cython = pytest.mark.skipif(
+    not hasattr(_ws_impl, 'WebSocketReaderC'), reason='Requires Cython')
+
+
+def build_frame(payload, opcode, fin=True, mask=None, rsv=0):
+    first_byte = (0x80 if fin else 0) | rsv | opcode
+    mask_bit = 0x80 if mask is not None else 0
+    length = len(payload)
+    if length < 126:
+        header = PACK_LEN1(first_byte, length | mask_bit)
+    elif length < (1 << 16):
+        header = PACK_LEN2(first_byte, 126 | mask_bit, length)
+    else:
+        header = PACK_LEN3(first_byte, 127 | mask_bit, length)
+    if mask is not None:
+        return header + mask + bytes(_websocket_mask(mask,
+                                                     bytearray(payload)))
+    return header + payload
+
+
+def compress(data, compressobj=None):
+    if compressobj is None:
+        compressobj = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    data = compressobj.compress(data) + compressobj.flush(zlib.Z_SYNC_FLUSH)
+    return data[:-4]
+
+
+MASK = b'\x01\x02\x03\x04'
+COMPRESSOBJ = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+
+STREAMS = [
+    build_frame(b'', WSMsgType.TEXT),
+    build_frame(b'text', WSMsgType.TEXT),
+    build_frame('тест'.encode('utf-8'), WSMsgType.TEXT, mask=MASK),
+    build_frame(b'binary', WSMsgType.BINARY),
+    build_frame(b'x' * 125, WSMsgType.BINARY, mask=MASK),
+    build_frame(b'x' * 126, WSMsgType.BINARY),
+    build_frame(b'x' * 1000, WSMsgType.BINARY, mask=MASK),
+    build_frame(b'x' * 70000, WSMsgType.BINARY),
+    build_frame(b'x' * 70000, WSMsgType.BINARY, mask=MASK),
+    build_frame(b'ping', WSMsgType.PING),
+    build_frame(b'pong', WSMsgType.PONG, mask=MASK),
+    build_frame(b'', WSMsgType.CLOSE),
+    build_frame(PACK_CLOSE_CODE(1000) + b'bye', WSMsgType.CLOSE),
+    build_frame(PACK_CLOSE_CODE(3001), WSMsgType.CLOSE, mask=MASK),
+    # fragmented messages with interleaved control frame
+    build_frame(b'frag', WSMsgType.TEXT, fin=False) +
+    build_frame(b'ment', WSMsgType.CONTINUATION, fin=False, mask=MASK) +
+    build_frame(b'ping', WSMsgType.PING) +
+    build_frame(b'ed', WSMsgType.CONTINUATION) +
+    build_frame(b'bin', WSMsgType.BINARY, fin=False) +
+    build_frame(b'ary', WSMsgType.CONTINUATION),
+    # many small messages in a row
+    b''.join(build_frame(str(i).encode(), WSMsgType.TEXT, mask=MASK)
+             for i in range(50)),
+]
+
+COMPRESSED_STREAMS = [
+    build_frame(compress(b'compressed'), WSMsgType.TEXT, rsv=0x40),
+    build_frame(compress(b'x' * 70000), WSMsgType.BINARY, rsv=0x40,
+                mask=MASK),
+    # context takeover between messages
+    build_frame(compress(b'message', COMPRESSOBJ), WSMsgType.TEXT,
+                rsv=0x40) +
+    build_frame(compress(b'message', COMPRESSOBJ), WSMsgType.TEXT,
+                rsv=0x40) +
+    build_frame(b'plain', WSMsgType.TEXT),
+]
+
+INVALID_STREAMS = [
+    (bytes([0b10100001, 0]), False),
+    (bytes([0b11000001, 0]), False),
+    (bytes([0b11001001, 0]), True),
+    (bytes([0b00001001, 0]), False),
+    (bytes([0b00000000, 0]), False),
+    (bytes([0b10001001, 126]) + b'\x00\x7e' + b'x' * 126, False),
+    (build_frame(b'x', 0x3), False),
+    (build_frame(b'x', WSMsgType.CONTINUATION), False),
+    (build_frame(b'x', WSMsgType.CLOSE), False),
+    (build_frame(PACK_CLOSE_CODE(1), WSMsgType.CLOSE), False),
+    (build_frame(PACK_CLOSE_CODE(1000) + b'\xff', WSMsgType.CLOSE), False),
+    (build_frame(b'\xff', WSMsgType.TEXT), False),
+    (build_frame(b'a', WSMsgType.TEXT, fin=False) +
+     build_frame(b'b', WSMsgType.TEXT), False),
+    (build_frame(b'compressed', WSMsgType.TEXT, rsv=0x40), True),
+]
+
+
+def chunkings(data):
+    yield [data]
+    if len(data) < 2000:
+        for i in range(1, len(data)):
+            yield [data[:i], data[i:]]
+        yield [data[i:i + 1] for i in range(len(data))]
+    else:
+        for size in (1, 7, 1000, 65536):
+            yield [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def feed(reader_cls, chunks, compress=False, **kwargs):
+    queue = mock.Mock()
+    reader = reader_cls(queue, compress=compress, **kwargs)
+    for chunk in chunks:
+        eof, tail = reader.feed_data(chunk)
+        if eof:
+            break
+    messages = [c[0] for c in queue.feed_data.call_args_list]
+    exc = (queue.set_exception.call_args[0][0]
+           if queue.set_exception.called else None)
+    return messages, exc
+
+
+@requires_cython
+def test_default_reader():
+    assert _ws_impl.WebSocketReader is _ws_impl.WebSocketReaderC
+
+
+@pytest.mark.parametrize('reader_cls', READERS)
+@pytest.mark.parametrize('data', STREAMS)
+def test_messages(reader_cls, data):
+    expected, exc = feed(_ws_impl.WebSocketReaderPy, [data])
+    assert exc is None
+    assert expected
+    for chunks in chunkings(data):
+        assert (expected, None) == feed(reader_cls, chunks)
+
+
+@pytest.mark.parametrize('reader_cls', READERS)
+@pytest.mark.parametrize('data', COMPRESSED_STREAMS)
+def test_compressed_messages(reader_cls, data):
+    expected, exc = feed(_ws_impl.WebSocketReaderPy, [data], compress=True)
+    assert exc is None
+    assert expected
+    for chunks in chunkings(data):
+        assert (expected, None) == feed(reader_cls, chunks, compress=True)
+
+
+@pytest.mark.parametrize('reader_cls', READERS)
+@pytest.mark.parametrize('data,compress', INVALID_STREAMS)
+def test_errors(reader_cls, data, compress):
+    for chunks in chunkings(data):
+        _, exc = feed(reader_cls, chunks, compress=compress)
+        _, expected = feed(_ws_impl.WebSocketReaderPy, chunks,
+                           compress=compress)
+        assert isinstance(exc, WebSocketError)
+        assert type(expected) is type(exc)
+        assert expected.code == exc.code
+        assert expected.args == exc.args
+
+
+def fragmented(data):
+    data = compress(data)
+    size = len(data) // 3 + 1
+    return (
+        build_frame(data[:size], WSMsgType.BINARY, fin=False, rsv=0x40) +
+        build_frame(data[size:size * 2], WSMsgType.CONTINUATION, fin=False) +
+        build_frame(data[size * 2:], WSMsgType.CONTINUATION))
+
+
+@pytest.mark.parametrize('reader_cls', READERS)
+@pytest.mark.parametrize('data', [
+    build_frame(compress(b'x' * 1001), WSMsgType.BINARY, rsv=0x40),
+    fragmented(bytes(range(256)) * 4),
+])
+def test_compressed_message_too_big(reader_cls, data):
+    for chunks in chunkings(data):
+        messages, exc = feed(reader_cls, chunks, compress=True,
+                             max_msg_size=1000)
+        assert [] == messages
+        assert isinstance(exc, WebSocketError)
+        assert WSCloseCode.MESSAGE_TOO_BIG == exc.code
+        assert 'Message size exceeds limit 1000' == str(exc)
+
+
+@pytest.mark.parametrize('reader_cls', READERS)
+def test_compressed_message_size_limit(reader_cls):
+    data = (build_frame(compress(b'x' * 1000), WSMsgType.BINARY, rsv=0x40) +
+            fragmented(bytes(range(250)) * 4))
+    messages, exc = feed(reader_cls, [data], compress=True,
+                         max_msg_size=1000)
+    assert exc is None
+    assert [b'x' * 1000, bytes(range(250)) * 4] == [
+        args[0].data for args in messages]
+
+
+@pytest.mark.parametrize('reader_cls', READERS)
+def test_compressed_message_no_size_limit(reader_cls):
+    data = build_frame(compress(b'x' * 70000), WSMsgType.BINARY, rsv=0x40)
+    messages, exc = feed(reader_cls, [data], compress=True, max_msg_size=0)
+    assert exc is None
+    assert [b'x' * 70000] == [args[0].data for args in messages]
+
+
+@pytest.mark.parametrize('reader_cls', READERS)
+def test_parse_frame(reader_cls):
+    reader = reader_cls(mock.Mock())
+    data = (build_frame(b'frag', WSMsgType.TEXT, fin=False, mask=MASK) +
+            build_frame(b'x' * 200, WSMsgType.BINARY))
+    assert [] == reader.parse_frame(data[:3])
+    assert [(0, 1, b'frag')] == reader.parse_frame(data[3:12])
+    assert [(1, 2, b'x' * 200)] == reader.parse_frame(data[12:])
+
+
+@pytest.mark.parametrize('reader_cls', READERS)
+def test_feed_data_after_error(reader_cls):
+    queue = mock.Mock()
+    reader = reader_cls(queue)
+    data = bytes([0b10100001, 0])
+    assert (True, b'') == reader.feed_data(data)
+    assert (True, b'next') == reader.feed_data(b'next')
+    assert 1 == queue.set_exception.call_count
+
+
+@pytest.mark.parametrize('reader_cls', READERS)
+def test_stray_continuation_after_message(reader_cls):
+    queue = mock.Mock()
+    reader = reader_cls(queue)
+    reader.feed_data(build_frame(b'a', WSMsgType.TEXT, fin=False) +
+                     build_frame(b'b', WSMsgType.CONTINUATION) +
+                     build_frame(b'c', WSMsgType.CONTINUATION))
+    exc = queue.set_exception.call_args[0][0]
+    assert 'Unexpected opcode=0' == str(exc)
+
+
+@pytest.mark.parametrize('reader_cls', READERS)
+def test_feed_eof(reader_cls):
+    queue = mock.Mock()
+    reader_cls(queue).feed_eof()
+    queue.feed_eof.assert_called_with()
@@ -1,9 +1,13 @@
+import asyncio
 import random
+import zlib
 from unittest import mock
 
 import pytest
 
-from aiohttp._ws_impl import WebSocketWriter
+from aiohttp import helpers
+from aiohttp._ws_impl import (WebSocketWriter, WSMsgType, build_frame,
+                              write_buffer_limits)
 
 
 @pytest.fixture
@@ -41,6 +45,24 @@ def test_send_binary_long(stream, writer):
     assert stream.transport.write.call_args[0][0].startswith(b'\x82~\x00\x7fb')
 
 
+def test_build_frame():
+    assert b'\x81\x04text' == build_frame(b'text', WSMsgType.TEXT)
+    assert (b'\x82~\x00\x7f' + b'b' * 127 ==
+            build_frame(b'b' * 127, WSMsgType.BINARY))
+
+
+def test_send_frame(stream, writer):
+    frame = build_frame(b'text', WSMsgType.TEXT)
+    assert () == writer.send_frame(frame)
+    stream.transport.write.assert_called_with(frame)
+
+
+def test_send_frame_drain(stream):
+    writer = WebSocketWriter(stream, limit=100)
+    frame = build_frame(b'b' * 127, WSMsgType.BINARY)
+    assert stream.drain.return_value == writer.send_frame(frame)
+
+
 def test_send_binary_very_long(stream, writer):
     writer.send(b'b' * 65537, True)
     assert (stream.transport.write.call_args_list[0][0][0] ==
@@ -66,3 +88,203 @@ def test_send_text_masked(stream, writer):
                              random=random.Random(123))
     writer.send(b'text')
     stream.transport.write.assert_called_with(b'\x81\x84\rg\xb3fy\x02\xcb\x12')
+
+
+def decompress(data, decompressobj=None):
+    if decompressobj is None:
+        decompressobj = zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+    return decompressobj.decompress(data + b'\x00\x00\xff\xff')
+
+
+def test_send_compressed(stream):
+    writer = WebSocketWriter(stream, compress=15)
+    writer.send(b'text' * 100)
+    frame = stream.transport.write.call_args[0][0]
+    # fin, rsv1, text
+    assert frame[0] == 0xc1
+    assert frame[1] == len(frame) - 2
+    assert decompress(frame[2:]) == b'text' * 100
+
+
+def test_send_compressed_threshold(stream):
+    writer = WebSocketWriter(stream, compress=15, compress_threshold=5)
+    writer.send(b'text')
+    stream.transport.write.assert_called_with(b'\x81\x04text')
+    writer.ping(b'ping' * 10)
+    stream.transport.write.assert_called_with(b'\x89\x28' + b'ping' * 10)
+
+
+def test_send_compressed_takeover(stream):
+    writer = WebSocketWriter(stream, compress=15)
+    decompressobj = zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+    writer.send(b'text' * 100)
+    first = stream.transport.write.call_args[0][0]
+    writer.send(b'text' * 100)
+    second = stream.transport.write.call_args[0][0]
+
+    # second message refers to the first one
+    assert len(second) < len(first)
+    assert decompress(first[2:], decompressobj) == b'text' * 100
+    assert decompress(second[2:], decompressobj) == b'text' * 100
+
+
+def test_send_compressed_notakeover(stream):
+    writer = WebSocketWriter(stream, compress=15, notakeover=True)
+    writer.send(b'text' * 100)
+    first = stream.transport.write.call_args[0][0]
+    writer.send(b'text' * 100)
+    second = stream.transport.write.call_args[0][0]
+
+    assert first == second
+    assert decompress(second[2:]) == b'text' * 100
+
+
+def test_send_compressed_masked(stream):
+    writer = WebSocketWriter(stream, use_mask=True, compress=15,
+                             random=random.Random(123))
+    writer.send(b'text' * 100)
+    frame = stream.transport.write.call_args[0][0]
+    assert frame[0] == 0xc1
+    length = frame[1] & 0x7f
+    mask, data = frame[2:6], bytearray(frame[6:])
+    assert len(data) == length
+    for i in range(length):
+        data[i] ^= mask[i % 4]
+    assert decompress(bytes(data)) == b'text' * 100
+
+
+def test_write_buffer_limits():
+    assert (None, None) == write_buffer_limits(None, None, 'wait')
+    assert (100, 25) == write_buffer_limits(100, None, 'wait')
+    assert (100, 50) == write_buffer_limits(100, 50, 'drop_oldest')
+    with pytest.raises(ValueError):
+        write_buffer_limits(100, 200, 'wait')
+    with pytest.raises(ValueError):
+        write_buffer_limits(100, -1, 'wait')
+    with pytest.raises(ValueError):
+        write_buffer_limits(None, 10, 'wait')
+    with pytest.raises(ValueError):
+        write_buffer_limits(None, None, 'drop_newest')
+    with pytest.raises(ValueError):
+        write_buffer_limits(100, None, 'unknown')
+
+
+def test_set_write_buffer_limits(stream, writer):
+    writer.set_write_buffer_limits(100, 10)
+    stream.transport.set_write_buffer_limits.assert_called_with(
+        high=100, low=10)
+
+
+def test_overflow_wait(stream, writer):
+    writer.set_write_buffer_limits(100)
+    stream.transport.get_write_buffer_size.return_value = 100
+    assert () == writer.send(b'text')
+    stream.transport.get_write_buffer_size.return_value = 101
+    assert stream.drain.return_value == writer.send(b'text')
+    stream.transport.write.assert_called_with(b'\x81\x04text')
+    assert 0 == writer.dropped
+
+
+def test_overflow_drop_newest(stream, writer):
+    writer.set_write_buffer_limits(100, overflow='drop_newest')
+    stream.transport.get_write_buffer_size.return_value = 101
+    assert () == writer.send(b'text')
+    assert () == writer.send_frame(build_frame(b'text', WSMsgType.TEXT))
+    assert not stream.transport.write.called
+    assert 2 == writer.dropped
+
+    # control frames are not dropped
+    writer.ping()
+    stream.transport.write.assert_called_with(b'\x89\x00')
+
+    stream.transport.get_write_buffer_size.return_value = 0
+    assert () == writer.send(b'text')
+    stream.transport.write.assert_called_with(b'\x81\x04text')
+    assert 2 == writer.dropped
+
+
+def test_overflow_drop_newest_compressed(stream):
+    writer = WebSocketWriter(stream, compress=15)
+    writer.set_write_buffer_limits(100, overflow='drop_newest')
+    stream.transport.get_write_buffer_size.return_value = 101
+    writer.send(b'dropped' * 100)
+    stream.transport.get_write_buffer_size.return_value = 0
+    writer.send(b'text' * 100)
+
+    # dropped message is not in compression context
+    frame = stream.transport.write.call_args[0][0]
+    assert decompress(frame[2:]) == b'text' * 100
+
+
+def test_overflow_close(stream, writer):
+    on_overflow = mock.Mock()
+    writer.set_write_buffer_limits(100, overflow='close',
+                                   on_overflow=on_overflow)
+    stream.transport.get_write_buffer_size.return_value = 101
+    assert () == writer.send(b'text')
+    assert () == writer.send(b'text')
+    assert not stream.transport.write.called
+    assert 2 == writer.dropped
+    on_overflow.assert_called_once_with()
+
+
+@asyncio.coroutine
+def test_overflow_drop_oldest(stream, writer, loop):
+    drained = helpers.create_future(loop)
+
+    @asyncio.coroutine
+    def drain():
+        yield from drained
+
+    stream.drain = drain
+    writer.set_write_buffer_limits(100, overflow='drop_oldest', loop=loop)
+    stream.transport.get_write_buffer_size.return_value = 101
+    for data in (b'a' * 40, b'b' * 40, b'c' * 40):
+        assert () == writer.send(data)
+    assert not stream.transport.write.called
+    assert 1 == writer.dropped
+
+    yield from asyncio.sleep(0, loop=loop)
+    stream.transport.get_write_buffer_size.return_value = 0
+    drained.set_result(None)
+    yield from asyncio.sleep(0, loop=loop)
+    assert [mock.call(b'\x81\x28' + b'b' * 40),
+            mock.call(b'\x81\x28' + b'c' * 40)] == (
+                stream.transport.write.call_args_list)
+    assert writer._flusher is None
+
+    assert () == writer.send(b'text')
+    stream.transport.write.assert_called_with(b'\x81\x04text')
+
+
+@asyncio.coroutine
+def test_overflow_drop_oldest_order(stream, writer, loop):
+    stream.drain = mock.Mock(return_value=helpers.create_future(loop))
+    writer.set_write_buffer_limits(100, overflow='drop_oldest', loop=loop)
+    stream.transport.get_write_buffer_size.return_value = 101
+    writer.send(b'a')
+    # buffer is not full but queued messages go first
+    stream.transport.get_write_buffer_size.return_value = 0
+    writer.send(b'b')
+    assert not stream.transport.write.called
+
+    writer.close()
+    assert [mock.call(b'\x81\x01a'), mock.call(b'\x81\x01b'),
+            mock.call(b'\x88\x02\x03\xe8')] == (
+                stream.transport.write.call_args_list)
+    assert writer._flusher is None
+    assert 0 == writer.dropped
+
+
+@asyncio.coroutine
+def test_overflow_drop_oldest_connection_lost(stream, writer, loop):
+    stream.drain = mock.Mock(return_value=helpers.create_future(loop))
+    stream.drain.return_value.set_exception(ConnectionResetError())
+    writer.set_write_buffer_limits(100, overflow='drop_oldest', loop=loop)
+    stream.transport.get_write_buffer_size.return_value = 101
+    writer.send(b'a')
+    writer.send(b'b')
+    yield from asyncio.sleep(0, loop=loop)
+    assert not stream.transport.write.called
+    assert 2 == writer.dropped
+    assert writer._flusher is None